@@ -0,0 +1,110 @@
+"""
+🔥 Devil Broadcast Benchmark
+Fan-out to thousands of WebSocket clients, a few of them deliberately slow
+
+Simulated sockets take a fixed time per send: almost no time for most
+clients, SLOW_SEND seconds for the slow ones. Measured for the old
+sequential loop (await send_text per connection) and for the queued
+ConnectionManager under each slow-consumer policy:
+
+- sender blocked: total time spent inside the broadcast calls
+- fast delivered: time until every fast client has every message
+- frames dropped / slow clients disconnected
+
+Usage: python benchmarks/bench_broadcast.py [connections] [slow] [messages]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import devil_json  # noqa: E402
+from devil_connections import SLOW_CONSUMER_POLICIES, ConnectionManager  # noqa: E402
+
+SLOW_SEND = 0.5
+
+
+class SimulatedSocket:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received = 0
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+def sockets(connections: int, slow: int):
+    return [SimulatedSocket(SLOW_SEND if i < slow else 0) for i in range(connections)]
+
+
+def message(i: int) -> dict:
+    return {'type': 'encrypted-message', 'encrypted_data': 'x' * 256, 'sender_id': 'bench', 'seq': i}
+
+
+async def sequential(connections: int, slow: int, messages: int):
+    """The previous broadcast: one awaited send per connection, in order"""
+    clients = sockets(connections, slow)
+    started = time.perf_counter()
+    for i in range(messages):
+        text = devil_json.dumps(message(i))
+        for client in clients:
+            await client.send_text(text)
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed, 0, 0
+
+
+async def queued(policy: str, connections: int, slow: int, messages: int):
+    manager = ConnectionManager(max_queue=32, slow_consumer_policy=policy, send_timeout=None)
+    clients = sockets(connections, slow)
+    for client in clients:
+        await manager.connect(client)
+    fast = clients[slow:]
+
+    started = time.perf_counter()
+    blocked = 0.0
+    for i in range(messages):
+        sent = time.perf_counter()
+        await manager.broadcast_json(message(i))
+        blocked += time.perf_counter() - sent
+        # A real sender yields to the loop awaiting its next frame; writers run meanwhile
+        await asyncio.sleep(0)
+    while any(client.received < messages for client in fast):
+        await asyncio.sleep(0.001)
+    delivered = time.perf_counter() - started
+
+    stats = dict(manager.stats)
+    for client in list(manager.connections):
+        manager.disconnect(client)
+    await asyncio.sleep(0)
+    return blocked, delivered, stats['dropped'], stats['slow_disconnects']
+
+
+async def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    slow = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    messages = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+    print(f'{connections:,} connections ({slow} take {SLOW_SEND}s per send), {messages} broadcasts')
+    print(f'{"fan-out":<24}{"sender blocked s":>18}{"fast delivered s":>18}{"dropped":>9}{"closed":>8}')
+    # The sequential loop would take messages * slow * SLOW_SEND seconds; time one broadcast
+    blocked, delivered, dropped, closed = await sequential(connections, slow, 1)
+    print(f'{"sequential (1 message)":<24}{blocked:>18.3f}{delivered:>18.3f}{dropped:>9}{closed:>8}')
+    for policy in SLOW_CONSUMER_POLICIES:
+        blocked, delivered, dropped, closed = await queued(policy, connections, slow, messages)
+        print(f'{"queued " + policy:<24}{blocked:>18.3f}{delivered:>18.3f}{dropped:>9}{closed:>8}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+🔥 Devil Streaming Chat Benchmark
+Time to first token and per-turn transcript encryption for /api/ai/chat/stream
+
+- first token: a FakeProvider streams a jargon reply in small pieces with
+  a pause before each. Buffered collects the whole reply and reveals it
+  at once, as /api/ai/chat would have to; streamed reveals each piece as
+  it arrives with a TermStream.
+- transcript: a conversation of TURNS user/assistant exchanges. Whole
+  history re-serializes and encrypts the full conversation every turn
+  (what /api/ai/chat does); chained seals only the two new messages.
+- reveal: revealing one long reply at once versus piece by piece.
+
+Usage: python benchmarks/bench_chat_stream.py [turns] [message_chars] [provider_delay]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import devil_json  # noqa: E402
+from devil_chat import FakeProvider, Transcripts  # noqa: E402
+from devil_crypto import DevilCipher  # noqa: E402
+from devil_jargon import JargonTranslator  # noqa: E402
+
+SECRET = 'bench-secret'
+
+
+def message(role: str, turn: int, chars: int):
+    filler = f'turn {turn}: the account is active and the request was approved with success. '
+    return {'role': role, 'content': (filler * (chars // len(filler) + 1))[:chars]}
+
+
+async def first_token(translator: JargonTranslator, provider: FakeProvider, messages):
+    started = time.perf_counter()
+    pieces = [piece async for piece in provider.stream(messages)]
+    translator.reveal(''.join(pieces))
+    buffered = time.perf_counter() - started
+
+    started = time.perf_counter()
+    reveal = translator.reveal_stream()
+    streamed = None
+    async for piece in provider.stream(messages):
+        if reveal.feed(piece) and streamed is None:
+            streamed = time.perf_counter() - started
+    reveal.flush()
+    return buffered, streamed, len(pieces)
+
+
+async def transcripts(turns: int, chars: int):
+    cipher = DevilCipher()
+    context = {'user_id': 'bench', 'session_id': 'conversation', 'data_type': 'ai-conversation'}
+    # Derive the master key once so neither side pays scrypt in the timings
+    await cipher.encrypt(b'warm', SECRET, context)
+    chains = Transcripts(cipher)
+    history, whole, chained = [], [], []
+    for turn in range(turns):
+        history += [message('user', turn, chars), message('assistant', turn, chars)]
+
+        started = time.perf_counter()
+        await cipher.encrypt(devil_json.dumps_bytes({'messages': history}), SECRET, context)
+        whole.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        pending, new_messages = chains.begin(SECRET, 'bench', 'conversation', history)
+        for new_message in new_messages:
+            await pending.seal(new_message)
+        chains.commit(pending)
+        chained.append(time.perf_counter() - started)
+    cipher.shutdown()
+    return whole, chained
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    chars = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.02
+    translator = JargonTranslator()
+    messages = [{'role': 'user', 'content': translator.text(message('user', 0, 400)['content'])}]
+
+    buffered, streamed, pieces = asyncio.run(first_token(translator, FakeProvider(delay, seed=1), messages))
+    print(f'reply of {pieces} pieces, {delay * 1e3:.0f} ms apart')
+    print(f'{"first token, buffered":<32}{buffered * 1e3:>10.1f} ms')
+    print(f'{"first token, streamed":<32}{streamed * 1e3:>10.1f} ms')
+
+    whole, chained = asyncio.run(transcripts(turns, chars))
+    print(f'\n{turns} turns of two {chars:,}-character messages, encryption per turn')
+    print(f'{"turn":<10}{"whole history":>16}{"chained":>12}')
+    for turn in sorted({0, 9, 99, turns - 1} & set(range(turns))):
+        print(f'{turn + 1:<10}{whole[turn] * 1e3:>13.2f} ms{chained[turn] * 1e3:>9.2f} ms')
+    print(f'{"total":<10}{sum(whole) * 1e3:>13.0f} ms{sum(chained) * 1e3:>9.0f} ms')
+
+    reply = translator.text(message('assistant', 0, 200_000)['content'])
+    pieces = [reply[i:i + 5] for i in range(0, len(reply), 5)]
+    started = time.perf_counter()
+    translator.reveal(reply)
+    at_once = time.perf_counter() - started
+    started = time.perf_counter()
+    reveal = translator.reveal_stream()
+    ''.join([reveal.feed(piece) for piece in pieces]) + reveal.flush()
+    incremental = time.perf_counter() - started
+    print(f'\nreveal {len(reply):,} characters: at once {at_once * 1e3:.1f} ms, '
+          f'in {len(pieces):,} pieces {incremental * 1e3:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+🔥 Devil Batch Credit Scoring Benchmark
+One million applicants through the scalar rules and the vectorized batch
+
+- scalar: calculate_user_credit_score once per applicant, which is the
+  scoring work /api/user/credit-score does per request
+- per-request encrypt: the same, plus one encrypt_data-sized seal per
+  applicant (warm key cache), as the single endpoint needs
+- batch: parse the NDJSON or columnar body, score with NumPy, then encode
+  and encrypt BATCH_CHUNK_ROWS results at a time, as the batch endpoint
+  streams them
+
+Every batch score is checked against the scalar function.
+
+Usage: python benchmarks/bench_credit_batch.py [rows] [chunk_rows]
+"""
+
+import asyncio
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import devil_json  # noqa: E402
+from devil_crypto import DevilCipher  # noqa: E402
+from devil_scoring import calculate_user_credit_score, parse_columnar, parse_ndjson, score_columns  # noqa: E402
+
+SECRET = 'bench-secret'
+
+
+def applicants(rows: int):
+    rng = random.Random(21)
+    return [{
+        'user_id': f'user_{i}',
+        'user_data': {
+            'income': rng.randrange(10_000, 150_000),
+            'age': rng.randrange(18, 80),
+            'employment': rng.choice(('stable', 'contract', 'unemployed')),
+            'debt_ratio': rng.random(),
+            'payment_history': rng.choice(('excellent', 'good', 'poor'))
+        }
+    } for i in range(rows)]
+
+
+async def stream(cipher: DevilCipher, batch, batch_format: str, chunk_rows: int) -> int:
+    sent = 0
+    for index, start in enumerate(range(0, len(batch), chunk_rows)):
+        plaintext = await asyncio.to_thread(batch.encode, start, min(start + chunk_rows, len(batch)), batch_format)
+        sealed = await cipher.encrypt(plaintext, SECRET, {
+            'user_id': 'bench', 'session_id': 'batch', 'data_type': 'credit-score-batch', 'chunk': str(index)
+        })
+        sent += len(sealed)
+    return sent
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    chunk_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    records = applicants(rows)
+    ndjson = b'\n'.join(map(devil_json.dumps_bytes, records))
+    columnar = devil_json.dumps_bytes({
+        'user_id': [record['user_id'] for record in records],
+        **{field: [record['user_data'][field] for record in records]
+           for field in ('income', 'age', 'employment', 'debt_ratio', 'payment_history')}
+    })
+    cipher = DevilCipher()
+    await cipher.encrypt(b'{}', SECRET, {'user_id': 'bench'})
+
+    started = time.perf_counter()
+    expected = [calculate_user_credit_score(record['user_data']) for record in records]
+    scalar = time.perf_counter() - started
+
+    sample = records[:10_000]
+    # A server holds only the request body; a million live dicts would slow every GC pass
+    del records
+    gc.collect()
+    started = time.perf_counter()
+    for record in sample:
+        # One owner's secret, so every call hits the warm key cache
+        await cipher.encrypt(devil_json.dumps_bytes(record), SECRET, {
+            'user_id': 'bench', 'session_id': record['user_id'], 'data_type': 'document'
+        })
+    per_request = scalar + (time.perf_counter() - started) * rows / len(sample)
+
+    print(f'{rows:,} applicants, NDJSON {len(ndjson) / 1e6:.0f} MB, columnar {len(columnar) / 1e6:.0f} MB, '
+          f'{chunk_rows:,} rows per encrypted chunk ({devil_json.BACKEND})')
+    print(f'{"":<24}{"parse s":>10}{"score s":>10}{"stream s":>10}{"total s":>10}{"rows/s":>12}')
+    print(f'{"scalar":<24}{"":>10}{scalar:>10.3f}{"":>10}{scalar:>10.3f}{rows / scalar:>12,.0f}')
+    print(f'{"per-request encrypt":<24}{"":>10}{"":>10}{"":>10}{per_request:>10.2f}{rows / per_request:>12,.0f}'
+          f'  (encrypt extrapolated from {len(sample):,})')
+
+    for batch_format, body in (('ndjson', ndjson), ('columnar', columnar)):
+        started = time.perf_counter()
+        if batch_format == 'ndjson':
+            columns, valid = parse_ndjson(body)
+        else:
+            columns, valid = parse_columnar(body), None
+        parsed = time.perf_counter()
+        batch = score_columns(columns, nulls_missing=batch_format == 'columnar', valid=valid)
+        scored = time.perf_counter()
+        await stream(cipher, batch, batch_format, chunk_rows)
+        done = time.perf_counter()
+        assert batch.scores.tolist() == expected and batch.invalid == 0, 'batch scores differ from the scalar rules'
+        total = done - started
+        print(f'{"batch " + batch_format:<24}{parsed - started:>10.3f}{scored - parsed:>10.3f}'
+              f'{done - scored:>10.3f}{total:>10.3f}{rows / total:>12,.0f}')
+    print('batch scores identical to calculate_user_credit_score for every row')
+    cipher.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
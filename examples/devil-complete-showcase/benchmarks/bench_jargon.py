@@ -0,0 +1,129 @@
+"""
+🔥 Devil Jargon Benchmark
+Translating deep, large /api/status-style responses to jargon
+
+The payload nests server_info-like objects and lists of status records.
+Compared per response:
+
+- replace loop: the previous translation (one str.replace per jargon
+  term, a fresh random name for every unknown key), applied at every
+  depth so it does the same work as the compiled walk
+- compiled walk: JargonTranslator.translate over the whole object
+
+and, for a response that is already serialized:
+
+- decode + walk + encode: devil_json.loads, translate, dumps_bytes
+- translate_json: one pass over the bytes
+- stream: translate_json_stream over 64 KiB chunks of the same bytes
+
+Finally, the first response after a mutation: with a fresh, cold
+generation (what clearing the maps amounted to) and with a successor
+prepared from the warm generation in the background.
+
+Usage: python benchmarks/bench_jargon.py [records] [depth] [iterations]
+"""
+
+import asyncio
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import devil_json  # noqa: E402
+from devil_jargon import KEY_JARGON, VALUE_JARGON, JargonGenerations, JargonTranslator  # noqa: E402
+
+
+def replace_loop(data):
+    """The translation generate_jargon_response used before, at every depth"""
+    if isinstance(data, str):
+        for original, jargon in VALUE_JARGON.items():
+            data = data.replace(original, jargon)
+        return data
+    if isinstance(data, dict):
+        return {KEY_JARGON.get(key) or f'obfuscated_{secrets.token_hex(4)}': replace_loop(value)
+                for key, value in data.items()}
+    if isinstance(data, list):
+        return [replace_loop(item) for item in data]
+    return data
+
+
+def payload(records: int, depth: int):
+    def server_info(level: int):
+        info = {
+            'language': 'python',
+            'framework': 'fastapi',
+            'algorithm': 'quantum-resistant',
+            'encryption': 'AES-256-GCM',
+            'obfuscation': 'extreme'
+        }
+        if level < depth:
+            info['upstream'] = server_info(level + 1)
+        return info
+
+    return {
+        'status': 'active',
+        'message': 'Brolostack Devil is protecting this Python server',
+        'protection_level': 'devil',
+        'server_info': server_info(0),
+        'records': [{
+            'user_id': f'user_{i}',
+            'status': 'approved' if i % 3 else 'error',
+            'message': f'request {i} protected with success',
+            'scores': [i, i * 2, i * 3],
+            'server_info': server_info(depth - 1)
+        } for i in range(records)]
+    }
+
+
+def timed(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    iterations = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    data = payload(records, depth)
+    raw = devil_json.dumps_bytes(data)
+    chunks = [raw[i:i + 64 * 1024] for i in range(0, len(raw), 64 * 1024)]
+    translator = JargonTranslator()
+
+    print(f'{records:,} records, depth {depth}, {len(raw) / 1e6:.1f} MB serialized ({devil_json.BACKEND})')
+    results = [
+        ('replace loop', timed(lambda: replace_loop(data), iterations)),
+        ('compiled walk', timed(lambda: translator.translate(data), iterations)),
+        ('decode + walk + encode',
+         timed(lambda: devil_json.dumps_bytes(translator.translate(devil_json.loads(raw))), iterations)),
+        ('translate_json', timed(lambda: translator.translate_json(raw), iterations)),
+        ('stream (64 KiB chunks)', timed(lambda: b''.join(translator.translate_json_stream(chunks)), iterations)),
+    ]
+    for name, seconds in results:
+        print(f'{name:<28}{seconds * 1e3:>10.2f} ms')
+    small = payload(0, 1)
+    print(f'{"small: replace loop":<28}{timed(lambda: replace_loop(small), 10_000) * 1e6:>10.2f} us')
+    print(f'{"small: compiled walk":<28}{timed(lambda: translator.translate(small), 10_000) * 1e6:>10.2f} us')
+    asyncio.run(after_mutation(data, translator))
+
+
+async def after_mutation(data, warm: JargonTranslator, runs: int = 5):
+    cold = prepared = build = 0.0
+    for _ in range(runs):
+        cold += timed(lambda: JargonTranslator(warm.generation + 1).translate(data), 1)
+        generations = JargonGenerations(warm)
+        started = time.perf_counter()
+        await generations.prepare()
+        build += time.perf_counter() - started
+        following = await generations.rotate()
+        generations.cancel()
+        prepared += timed(lambda: following.translate(data), 1)
+    print(f'{"after mutation: cold":<28}{cold / runs * 1e3:>10.2f} ms')
+    print(f'{"after mutation: prepared":<28}{prepared / runs * 1e3:>10.2f} ms '
+          f'(built off-loop in {build / runs * 1e3:.1f} ms)')
+
+if __name__ == '__main__':
+    main()
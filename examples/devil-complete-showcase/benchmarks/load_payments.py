@@ -0,0 +1,124 @@
+"""
+🔥 Devil Payment Load Test
+Throughput and retry behavior of /api/payment/process and /api/payment/batch
+
+Runs against a live server (python server.py):
+
+- single: one request per payment, with and without Idempotency-Key
+- retry storm: every payment sent RETRIES times at once, as clients that
+  time out and retry do, then once more after it completed. Counts how
+  many copies were processed (charged) and how many replayed, and checks
+  that all copies of a keyed payment got the same token.
+- batch: the same payments submitted BATCH_SIZE per call to the batch
+  endpoint, then the identical batches resubmitted
+
+Usage: python benchmarks/load_payments.py [url] [payments] [concurrency]
+"""
+
+import asyncio
+import json
+import secrets
+import sys
+import time
+
+import httpx
+
+RETRIES = 5
+BATCH_SIZE = 100
+USER = {'user_id': 'load_test', 'user_secret': 'load-test-secret'}
+
+
+def payment(i: int):
+    return {'card_number': '4111111111111111', 'amount': 10 + i % 90, 'currency': 'USD'}
+
+
+async def pooled(jobs, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(job):
+        async with semaphore:
+            return await job
+
+    return await asyncio.gather(*(run(job) for job in jobs))
+
+
+async def pay(client: httpx.AsyncClient, i: int, key=None):
+    headers = {'Idempotency-Key': key} if key else {}
+    response = await client.post('/api/payment/process', json={**USER, 'payment_data': payment(i)}, headers=headers)
+    response.raise_for_status()
+    return response.json()['token'], response.headers.get('idempotent-replayed') == 'true'
+
+
+async def single(client, payments: int, concurrency: int, keyed: bool):
+    run = secrets.token_hex(4)
+    started = time.perf_counter()
+    await pooled((pay(client, i, f'{run}-{i}' if keyed else None) for i in range(payments)), concurrency)
+    return payments / (time.perf_counter() - started)
+
+
+async def retry_storm(client, payments: int, concurrency: int, keyed: bool):
+    run = secrets.token_hex(4)
+    keys = [f'{run}-{i}' if keyed else None for i in range(payments)]
+    started = time.perf_counter()
+    copies = await pooled((pay(client, i, keys[i]) for i in range(payments) for _ in range(RETRIES)), concurrency)
+    late = await pooled((pay(client, i, keys[i]) for i in range(payments)), concurrency)
+    elapsed = time.perf_counter() - started
+    tokens = [set() for _ in range(payments)]
+    for n, (token, _) in enumerate(copies):
+        tokens[n // RETRIES].add(token)
+    for i, (token, _) in enumerate(late):
+        tokens[i].add(token)
+    replayed = sum(was_replayed for _, was_replayed in copies + late)
+    sent = len(copies) + len(late)
+    consistent = sum(len(seen) == 1 for seen in tokens)
+    return sent, sent - replayed, replayed, consistent, sent / elapsed
+
+
+async def batch(client, payments: int, keyed: bool = True):
+    run = secrets.token_hex(4)
+    batches = [[{'payment_data': payment(i), **({'idempotency_key': f'{run}-{i}'} if keyed else {})}
+                for i in range(start, min(start + BATCH_SIZE, payments))]
+               for start in range(0, payments, BATCH_SIZE)]
+    rates, summaries = [], []
+    for _ in range(2):
+        started = time.perf_counter()
+        summary = {}
+        for items in batches:
+            async with client.stream('POST', '/api/payment/batch', json={**USER, 'payments': items}) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    result = json.loads(line)
+                    if result.get('done'):
+                        for name in ('processed', 'replayed', 'failed'):
+                            summary[name] = summary.get(name, 0) + result[name]
+        rates.append(payments / (time.perf_counter() - started))
+        summaries.append(summary)
+    return rates, summaries
+
+
+async def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else 'http://localhost:8000'
+    payments = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        print(f'{payments:,} payments against {url}, {concurrency} concurrent requests')
+        print(f'single, no key:            {await single(client, payments, concurrency, False):>9,.0f} payments/s')
+        print(f'single, Idempotency-Key:   {await single(client, payments, concurrency, True):>9,.0f} payments/s')
+
+        storm = max(1, payments // RETRIES)
+        print(f'\nretry storm: {storm:,} payments x {RETRIES} concurrent copies + 1 late retry')
+        print(f'{"":<14}{"requests":>10}{"charged":>10}{"replayed":>10}{"one token":>11}{"req/s":>9}')
+        for keyed in (False, True):
+            sent, charged, replayed, consistent, rate = await retry_storm(client, storm, concurrency, keyed)
+            print(f'{"keyed" if keyed else "no key":<14}{sent:>10,}{charged:>10,}{replayed:>10,}'
+                  f'{consistent:>11,}{rate:>9,.0f}')
+
+        rates, summaries = await batch(client, payments)
+        print(f'\nbatch of {BATCH_SIZE}:              {rates[0]:>9,.0f} payments/s  {summaries[0]}')
+        print(f'batch resubmitted:         {rates[1]:>9,.0f} payments/s  {summaries[1]}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+🔥 Brolostack Devil - Streaming AI chat
+A local provider that streams tokens, and transcripts encrypted one turn at a time
+"""
+
+import asyncio
+import base64
+import hashlib
+import random
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import devil_json
+from devil_crypto import DevilCipher
+
+
+def sse(event: str, data: Any) -> bytes:
+    """One Server-Sent Events frame"""
+    return b'event: ' + event.encode() + b'\ndata: ' + devil_json.dumps_bytes(data) + b'\n\n'
+
+
+class FakeProvider:
+    """Streams a jargon reply in small, irregular pieces, as a real provider streams tokens.
+
+    Pieces are cut at random offsets, so jargon terms regularly arrive
+    split across pieces. delay is the pause before each piece.
+    """
+
+    name = 'fake'
+
+    def __init__(self, delay: float = 0.02, max_piece: int = 8, seed: Optional[int] = None):
+        self.delay = delay
+        self.max_piece = max_piece
+        self.random = random.Random(seed)
+
+    def reply(self, messages: List[Dict[str, str]]) -> str:
+        last = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        return (f'quantumProcessorActive: {last} Result: algorithmExecutorSuccess, '
+                f'request dataMatrixApproved and entityContainerSecured.')
+
+    async def stream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        text = self.reply(messages)
+        position = 0
+        while position < len(text):
+            size = self.random.randint(1, self.max_piece)
+            await asyncio.sleep(self.delay)
+            yield text[position:position + size]
+            position += size
+
+
+class TranscriptConflict(ValueError):
+    """The conversation sent does not continue the transcript recorded so far"""
+
+
+def _message_digest(message: Dict[str, Any]) -> str:
+    return hashlib.sha256(devil_json.dumps_bytes(message)).hexdigest()
+
+
+class TranscriptTurn:
+    """The messages one request adds to a transcript, sealed as they are appended"""
+
+    def __init__(self, cipher: DevilCipher, secret: str, user_id: str, conversation_id: str,
+                 turns: int, digest: str, last_message: Optional[str]):
+        self.cipher = cipher
+        self.secret = secret
+        self.user_id = user_id
+        self.conversation_id = conversation_id
+        self.base = (turns, digest)
+        self.turns = turns
+        self.digest = digest
+        self.last_message = last_message
+
+    async def seal(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Encrypt one message as the next record, chained to the record before it"""
+        context = {
+            'user_id': self.user_id,
+            'session_id': self.conversation_id,
+            'data_type': 'ai-conversation',
+            'turn': str(self.turns),
+            'previous': self.digest
+        }
+        sealed = await self.cipher.encrypt(devil_json.dumps_bytes(message), self.secret, context)
+        record = {
+            'turn': self.turns,
+            'role': message.get('role'),
+            'previous': self.digest,
+            'encrypted_data': base64.b64encode(sealed).decode()
+        }
+        self.turns += 1
+        self.digest = hashlib.sha256(sealed).hexdigest()
+        self.last_message = _message_digest(message)
+        return record
+
+
+class Transcripts:
+    """Where each conversation's encrypted transcript has got to, for up to max_conversations.
+
+    A transcript is a chain of records, one per message, each sealed once
+    when it is appended: its key context names its turn and the digest of
+    the record before it, so records cannot be reordered or dropped
+    unnoticed. Only the chain's head is kept here (turn count, last
+    digest, digest of the last message); the records go to the client. A
+    new turn seals just the messages added since, so the cost of a turn
+    does not grow with the length of the conversation.
+    """
+
+    def __init__(self, cipher: DevilCipher, max_conversations: int = 10_000):
+        self.cipher = cipher
+        self.max_conversations = max_conversations
+        # (user id, conversation id) -> (turns, chain digest, last message digest)
+        self._heads: 'OrderedDict[Tuple[str, str], Tuple[int, str, Optional[str]]]' = OrderedDict()
+
+    def begin(self, secret: str, user_id: str, conversation_id: str,
+              messages: List[Dict[str, Any]]) -> Tuple[TranscriptTurn, List[Dict[str, Any]]]:
+        """Start a turn; returns it with the messages not yet in the transcript"""
+        turns, digest, last_message = self._heads.get((user_id, conversation_id), (0, '', None))
+        # Comparing only the last recorded message catches a rewound or forked conversation
+        # without hashing the whole history again
+        if len(messages) < turns or (turns and _message_digest(messages[turns - 1]) != last_message):
+            raise TranscriptConflict('Conversation does not continue the recorded transcript')
+        turn = TranscriptTurn(self.cipher, secret, user_id, conversation_id, turns, digest, last_message)
+        return turn, messages[turns:]
+
+    def commit(self, turn: TranscriptTurn):
+        key = (turn.user_id, turn.conversation_id)
+        head = self._heads.get(key)
+        if (head[:2] if head else (0, '')) != turn.base:
+            raise TranscriptConflict('Transcript was extended by another request')
+        self._heads[key] = (turn.turns, turn.digest, turn.last_message)
+        self._heads.move_to_end(key)
+        if len(self._heads) > self.max_conversations:
+            self._heads.popitem(last=False)
@@ -0,0 +1,129 @@
+"""
+🔥 Brolostack Devil - WebSocket connection manager
+Per-connection outbound queues so one slow client never holds up the others
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import devil_json
+
+SLOW_CONSUMER_POLICIES = ('drop-oldest', 'disconnect')
+
+
+class Connection:
+    """One client socket with its bounded outbound queue and writer task"""
+
+    __slots__ = ('websocket', 'queue', 'ready', 'writer', 'dropped')
+
+    def __init__(self, websocket, max_queue: int):
+        self.websocket = websocket
+        self.queue: Deque[str] = deque(maxlen=max_queue)
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+
+class ConnectionManager:
+    """Fan-out to WebSocket clients through per-connection queues.
+
+    Sending only appends a frame to each connection's queue, so a broadcast
+    costs one encode plus one append per client and never waits on a
+    socket. Each connection's writer task drains its queue in order. When a
+    client falls max_queue frames behind, the slow-consumer policy applies:
+    'drop-oldest' discards its oldest queued frames, 'disconnect' closes it
+    with code 1013 (try again later). A send stuck for send_timeout seconds
+    also closes the connection.
+    """
+
+    def __init__(self, max_queue: int = 256, slow_consumer_policy: str = 'drop-oldest',
+                 send_timeout: Optional[float] = 10.0):
+        if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy '{slow_consumer_policy}', "
+                             f"expected one of {SLOW_CONSUMER_POLICIES}")
+        self.max_queue = max_queue
+        self.slow_consumer_policy = slow_consumer_policy
+        self.send_timeout = send_timeout
+        self.connections: Dict[Any, Connection] = {}
+        self.stats = {'sent': 0, 'dropped': 0, 'slow_disconnects': 0, 'send_failures': 0}
+
+    @property
+    def active_connections(self):
+        return list(self.connections)
+
+    async def connect(self, websocket):
+        await websocket.accept()
+        connection = Connection(websocket, self.max_queue)
+        connection.writer = asyncio.create_task(self._write(connection))
+        self.connections[websocket] = connection
+
+    def disconnect(self, websocket):
+        """Forget a client; safe to call more than once"""
+        connection = self.connections.pop(websocket, None)
+        if connection is not None and connection.writer is not None:
+            connection.writer.cancel()
+
+    async def send_personal_message(self, message: str, websocket):
+        self._enqueue(self.connections.get(websocket), message)
+
+    async def send_json(self, data: Any, websocket):
+        self._enqueue(self.connections.get(websocket), devil_json.dumps(data))
+
+    async def broadcast(self, message: str):
+        # No awaits in the loop, so connections cannot change underneath it
+        for connection in tuple(self.connections.values()):
+            self._enqueue(connection, message)
+
+    async def broadcast_json(self, data: Any):
+        """Serialize once and queue the same text frame for every connection"""
+        await self.broadcast(devil_json.dumps(data))
+
+    def queued(self) -> int:
+        return sum(len(connection.queue) for connection in self.connections.values())
+
+    def _enqueue(self, connection: Optional[Connection], message: str):
+        if connection is None:
+            return
+        if len(connection.queue) == self.max_queue:
+            if self.slow_consumer_policy == 'disconnect':
+                self.stats['slow_disconnects'] += 1
+                self._close(connection, 1013)
+                return
+            # deque(maxlen) drops the oldest frame on append
+            connection.dropped += 1
+            self.stats['dropped'] += 1
+        connection.queue.append(message)
+        connection.ready.set()
+
+    async def _write(self, connection: Connection):
+        queue, websocket = connection.queue, connection.websocket
+        try:
+            while True:
+                await connection.ready.wait()
+                connection.ready.clear()
+                while queue:
+                    message = queue.popleft()
+                    if self.send_timeout:
+                        await asyncio.wait_for(websocket.send_text(message), self.send_timeout)
+                    else:
+                        await websocket.send_text(message)
+                    self.stats['sent'] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Gone, broken or stuck past send_timeout: stop writing to it
+            self.stats['send_failures'] += 1
+            self._close(connection, 1011)
+
+    def _close(self, connection: Connection, code: int):
+        if self.connections.get(connection.websocket) is not connection:
+            return
+        self.disconnect(connection.websocket)
+        asyncio.create_task(self._close_socket(connection.websocket, code))
+
+    async def _close_socket(self, websocket, code: int):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), self.send_timeout or None)
+        except Exception:
+            pass
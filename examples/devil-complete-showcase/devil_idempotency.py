@@ -0,0 +1,105 @@
+"""
+🔥 Brolostack Devil - Idempotency keys
+Retried requests replay the first result instead of running again
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import devil_json
+
+
+class IdempotencyConflict(ValueError):
+    """An idempotency key was reused for a different request"""
+
+
+def request_fingerprint(payload: Any) -> str:
+    return hashlib.sha256(devil_json.dumps_bytes(payload)).hexdigest()
+
+
+class IdempotencyCache:
+    """Results by idempotency key: bounded, expiring, with in-flight de-duplication.
+
+    The first request for a key runs; a retry that arrives while it is
+    still running awaits the same result, and one that arrives later gets
+    the stored result until ttl seconds have passed. At most max_entries
+    results are kept, the oldest evicted first. Failures are not stored,
+    so a failed request can be retried for real. Reusing a key with a
+    different request fingerprint raises IdempotencyConflict.
+    """
+
+    def __init__(self, max_entries: int = 100_000, ttl: float = 24 * 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        # key -> (expires at, fingerprint, result), oldest first
+        self._results: 'OrderedDict[Hashable, Tuple[float, str, Any]]' = OrderedDict()
+        self._pending: Dict[Hashable, Tuple[str, asyncio.Future]] = {}
+        self.stats = {'executed': 0, 'replayed': 0, 'joined': 0, 'conflicts': 0, 'evicted': 0}
+
+    def __len__(self):
+        return len(self._results)
+
+    async def run(self, key: Hashable, fingerprint: str,
+                  compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, replayed) for key, running compute only if nothing is stored or running"""
+        stored = self._stored(key)
+        if stored is not None:
+            self._check(stored[1], fingerprint)
+            self.stats['replayed'] += 1
+            return stored[2], True
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self._check(pending[0], fingerprint)
+            self.stats['joined'] += 1
+            # shield: a retry giving up must not cancel the request it joined
+            return await asyncio.shield(pending[1]), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = (fingerprint, future)
+        self.stats['executed'] += 1
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here, in case no retry was waiting on it
+            future.exception()
+            raise
+        else:
+            self._store(key, fingerprint, result)
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._pending[key]
+
+    def _stored(self, key: Hashable) -> Optional[Tuple[float, str, Any]]:
+        stored = self._results.get(key)
+        if stored is not None and stored[0] <= self.clock():
+            del self._results[key]
+            return None
+        return stored
+
+    def _check(self, expected: str, fingerprint: str):
+        if expected != fingerprint:
+            self.stats['conflicts'] += 1
+            raise IdempotencyConflict('Idempotency key was already used for a different request')
+
+    def _store(self, key: Hashable, fingerprint: str, result: Any):
+        now = self.clock()
+        self._results[key] = (now + self.ttl, fingerprint, result)
+        self._results.move_to_end(key)
+        # Entries share one ttl, so insertion order is expiry order
+        while self._results:
+            oldest = next(iter(self._results.values()))
+            if oldest[0] > now and len(self._results) <= self.max_entries:
+                break
+            self._results.popitem(last=False)
+            self.stats['evicted'] += 1
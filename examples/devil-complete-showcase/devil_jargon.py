@@ -0,0 +1,285 @@
+"""
+🔥 Brolostack Devil - Jargon translation
+Compiled single-pass translation of responses, nested objects and serialized JSON
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import re
+import secrets
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+KEY_JARGON = {
+    'user_id': 'quantumEntityId',
+    'credit_score': 'dataMatrixValue',
+    'status': 'algorithmState',
+    'message': 'vectorMessage'
+}
+
+VALUE_JARGON = {
+    'active': 'quantumProcessorActive',
+    'success': 'algorithmExecutorSuccess',
+    'approved': 'dataMatrixApproved',
+    'error': 'vectorArrayError',
+    'protected': 'entityContainerSecured'
+}
+
+# Strings and tokens longer than this are translated every time instead of memoized
+MEMO_MAX_LENGTH = 256
+
+# A whole JSON string token, plus the colon that makes it an object key
+JSON_STRING = re.compile(rb'"([^"\\]*(?:\\.[^"\\]*)*)"(\s*:)?', re.DOTALL)
+
+
+def _alternation(words: Iterable[str]) -> str:
+    # Longest first, so a term that extends another wins at the same position
+    return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+class TermRewriter:
+    """Rewrites whole terms of a mapping in one regex pass, all at once or as text streams in"""
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.mapping = dict(mapping)
+        self.pattern = re.compile(_alternation(self.mapping))
+        # Text that may still grow into a longer term once more of it arrives
+        self.prefixes = frozenset(term[:end] for term in self.mapping for end in range(1, len(term)))
+        self.longest = max(map(len, self.mapping), default=0)
+
+    def sub(self, text: str) -> str:
+        return self.pattern.sub(self._match, text)
+
+    def _match(self, match) -> str:
+        return self.mapping[match.group()]
+
+    def stream(self) -> 'TermStream':
+        return TermStream(self)
+
+
+class TermStream:
+    """Incremental TermRewriter.sub for text arriving in pieces, such as provider tokens.
+
+    The concatenated output equals sub() of the concatenated input. Only
+    the shortest tail that could still be the start of a term is held
+    back; everything before it is decided and returned right away.
+    """
+
+    __slots__ = ('rewriter', 'carry')
+
+    def __init__(self, rewriter: TermRewriter):
+        self.rewriter = rewriter
+        self.carry = ''
+
+    def feed(self, text: str) -> str:
+        buffer = self.carry + text
+        prefixes = self.rewriter.prefixes
+        hold = 0
+        for size in range(min(self.rewriter.longest - 1, len(buffer)), 0, -1):
+            if buffer[-size:] in prefixes:
+                hold = size
+                break
+        # Before safe, what matches at each position no longer depends on text still to come
+        safe = len(buffer) - hold
+        out, position = [], 0
+        for match in self.rewriter.pattern.finditer(buffer):
+            if match.start() >= safe:
+                break
+            out.append(buffer[position:match.start()])
+            out.append(self.rewriter.mapping[match.group()])
+            position = match.end()
+        end = max(position, safe)
+        out.append(buffer[position:end])
+        self.carry = buffer[end:]
+        return ''.join(out)
+
+    def flush(self) -> str:
+        text, self.carry = self.carry, ''
+        return self.rewriter.sub(text)
+
+
+class JargonTranslator:
+    """One generation of jargon: a fixed key mapping plus compiled value patterns.
+
+    Values are rewritten by one regex pass over all jargon terms instead of
+    one str.replace per term. Keys outside KEY_JARGON become
+    obfuscated_<8 hex>, derived from this generation's seed with HMAC, so a
+    key maps to the same name for every response of the generation (and to
+    a new one after a mutation). Translated keys, short strings and JSON
+    string tokens are memoized for the generation, up to max_entries each.
+    reveal_stream() maps jargon terms back, for provider replies that
+    answer in jargon.
+    """
+
+    def __init__(self, generation: int = 0, seed: Optional[bytes] = None,
+                 key_jargon: Dict[str, str] = KEY_JARGON, value_jargon: Dict[str, str] = VALUE_JARGON,
+                 max_entries: int = 16384):
+        self.generation = generation
+        self.seed = seed if seed is not None else secrets.token_bytes(16)
+        self.key_jargon = dict(key_jargon)
+        self.value_jargon = dict(value_jargon)
+        self.max_entries = max_entries
+        self.keys: Dict[str, str] = {}
+        self._texts: Dict[str, str] = {}
+        self._tokens: Dict[bytes, bytes] = {}
+        self._values = re.compile(_alternation(self.value_jargon))
+        self._values_bytes = re.compile(_alternation(self.value_jargon).encode())
+        self._value_bytes = {k.encode(): v.encode() for k, v in self.value_jargon.items()}
+        self.revealer = TermRewriter({v: k for k, v in self.value_jargon.items()})
+
+    def successor(self, warm: Optional[Tuple[Iterable[str], Dict[str, str], Dict[bytes, bytes]]] = None
+                  ) -> 'JargonTranslator':
+        """Build the next generation, warmed with what this one has translated.
+
+        warm is a (keys, texts, tokens) snapshot of this generation's
+        memos. Value translations do not depend on the seed and are copied
+        as is; keys are mapped again under the new seed. Building touches
+        nothing shared, so it can run on another thread.
+        """
+        keys, texts, tokens = warm if warm is not None else self.snapshot()
+        following = JargonTranslator(self.generation + 1, key_jargon=self.key_jargon,
+                                     value_jargon=self.value_jargon, max_entries=self.max_entries)
+        following._texts = texts
+        following._tokens = {token: translated for token, translated in tokens.items() if token[-1:] == b'"'}
+        for key in keys:
+            following.key(key)
+        return following
+
+    def snapshot(self) -> Tuple[Tuple[str, ...], Dict[str, str], Dict[bytes, bytes]]:
+        return tuple(self.keys), dict(self._texts), dict(self._tokens)
+
+    def key(self, key: str) -> str:
+        jargon = self.keys.get(key)
+        if jargon is None:
+            jargon = self.key_jargon.get(key)
+            if jargon is None:
+                digest = hmac.new(self.seed, key.encode(), hashlib.sha256).hexdigest()
+                jargon = f'obfuscated_{digest[:8]}'
+            if len(self.keys) < self.max_entries:
+                self.keys[key] = jargon
+        return jargon
+
+    def text(self, text: str) -> str:
+        jargon = self._texts.get(text)
+        if jargon is None:
+            jargon = self._values.sub(self._value_match, text)
+            if len(text) <= MEMO_MAX_LENGTH and len(self._texts) < self.max_entries:
+                self._texts[text] = jargon
+        return jargon
+
+    def _value_match(self, match) -> str:
+        return self.value_jargon[match.group()]
+
+    def reveal(self, text: str) -> str:
+        """Jargon terms back to the words they stand for"""
+        return self.revealer.sub(text)
+
+    def reveal_stream(self) -> TermStream:
+        return self.revealer.stream()
+
+    def translate(self, value: Any) -> Any:
+        """Translate keys and string values at every depth of dicts and lists"""
+        if isinstance(value, str):
+            return self.text(value)
+        if isinstance(value, dict):
+            key, translate = self.key, self.translate
+            return {key(str(k)): translate(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            translate = self.translate
+            return [translate(item) for item in value]
+        return value
+
+    def _json_token(self, match) -> bytes:
+        token = match.group()
+        translated = self._tokens.get(token)
+        if translated is not None:
+            return translated
+        content, colon = match.group(1), match.group(2)
+        if colon is None:
+            translated = b'"' + self._values_bytes.sub(lambda m: self._value_bytes[m.group()], content) + b'"'
+        else:
+            key = json.loads(token[:len(content) + 2]) if b'\\' in content else content.decode()
+            translated = json.dumps(self.key(key)).encode() + colon
+        if len(token) <= MEMO_MAX_LENGTH and len(self._tokens) < self.max_entries:
+            self._tokens[token] = translated
+        return translated
+
+    def translate_json(self, data: bytes) -> bytes:
+        """Translate already serialized JSON in one pass, without decoding it"""
+        return JSON_STRING.sub(self._json_token, data)
+
+    def translate_json_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Translate serialized JSON arriving in arbitrary chunks.
+
+        A string split across chunks, or one that may still turn out to be
+        a key because its colon has not arrived, is held back until the
+        next chunk decides it.
+        """
+        carry = b''
+        for chunk in chunks:
+            buffer = carry + chunk
+            # A value string ending here may be followed by whitespace and then a colon
+            undecided = len(buffer.rstrip())
+            out, position, end = [], 0, len(buffer)
+            for match in JSON_STRING.finditer(buffer):
+                if match.group(2) is None and match.end() >= undecided:
+                    end = match.start()
+                    break
+                out.append(buffer[position:match.start()])
+                out.append(self._json_token(match))
+                position = match.end()
+            else:
+                # An unterminated string waits for the rest of it
+                quote = buffer.find(b'"', position)
+                if quote >= 0:
+                    end = quote
+            out.append(buffer[position:end])
+            carry = buffer[end:]
+            translated = b''.join(out)
+            if translated:
+                yield translated
+        if carry:
+            yield self.translate_json(carry)
+
+
+class JargonGenerations:
+    """The current jargon generation, with the next one built in the background.
+
+    A generation never changes its mappings once published. A mutation
+    swaps current for a successor that was prepared off the event loop and
+    warmed from its predecessor, so the first responses after a mutation
+    are not cold. Whoever reads current holds that generation for as long
+    as it needs it, so a request (or a stream) started before a mutation
+    finishes with the mappings it started with.
+    """
+
+    def __init__(self, translator: Optional[JargonTranslator] = None):
+        self.current = translator or JargonTranslator()
+        self._next: Optional[asyncio.Task] = None
+
+    def prepare(self) -> asyncio.Task:
+        """Start building the successor of the current generation if not already underway"""
+        if self._next is None:
+            self._next = asyncio.create_task(self._build(self.current))
+        return self._next
+
+    async def _build(self, translator: JargonTranslator) -> JargonTranslator:
+        # Snapshot on the loop thread, where the memos are written; build on a worker
+        warm = translator.snapshot()
+        return await asyncio.to_thread(translator.successor, warm)
+
+    async def rotate(self) -> JargonTranslator:
+        """Publish the prepared successor and start preparing the one after it"""
+        pending = self.prepare()
+        following = await pending
+        # Concurrent mutations that waited on the same build publish it once
+        if self._next is pending:
+            self.current, self._next = following, None
+            self.prepare()
+        return self.current
+
+    def cancel(self):
+        if self._next is not None:
+            self._next.cancel()
+            self._next = None
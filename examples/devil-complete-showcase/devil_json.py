@@ -0,0 +1,65 @@
+"""
+🔥 Brolostack Devil - JSON serialization
+Uses orjson or msgspec when installed and falls back to the standard library
+"""
+
+import json
+import os
+from typing import Any, Callable, Tuple
+
+from fastapi.responses import JSONResponse
+
+
+def _stdlib_encode(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def _load_backend(name: str) -> Tuple[str, Callable[[Any], bytes], Callable[[Any], Any], tuple]:
+    """Resolve a backend to (name, encode, decode, errors it raises on unsupported input)"""
+    if name in ('auto', 'orjson'):
+        try:
+            import orjson
+            return 'orjson', orjson.dumps, orjson.loads, (TypeError, ValueError)
+        except ImportError:
+            if name == 'orjson':
+                raise
+    if name in ('auto', 'msgspec'):
+        try:
+            import msgspec
+            encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+            return 'msgspec', encoder.encode, decoder.decode, (TypeError, msgspec.EncodeError, msgspec.DecodeError)
+        except ImportError:
+            if name == 'msgspec':
+                raise
+    if name not in ('auto', 'stdlib'):
+        raise ValueError(f"Unknown JSON backend '{name}', expected auto, orjson, msgspec or stdlib")
+    return 'stdlib', _stdlib_encode, json.loads, ()
+
+
+BACKEND, _encode, _decode, _errors = _load_backend(os.getenv('DEVIL_JSON_BACKEND', 'auto'))
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Compact UTF-8 JSON; anything the fast backend rejects goes through the stdlib"""
+    try:
+        return _encode(obj)
+    except _errors:
+        return _stdlib_encode(obj)
+
+
+def dumps(obj: Any) -> str:
+    return dumps_bytes(obj).decode()
+
+
+def loads(data) -> Any:
+    try:
+        return _decode(data)
+    except _errors:
+        return json.loads(data)
+
+
+class DevilJSONResponse(JSONResponse):
+    """FastAPI response rendered with the configured backend"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,96 @@
+"""
+🔥 Brolostack Devil - API keys
+Issued keys kept in this process as salted hashes, looked up by key id
+"""
+
+import hashlib
+import hmac
+import secrets
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+KEY_PREFIX = 'bro_py_'
+# The prefix plus this many hex characters is the key id, safe to show and to revoke by
+KEY_ID_LENGTH = 12
+
+
+class ApiKey:
+    """Who a checked key belongs to and when it lapses"""
+
+    __slots__ = ('key_id', 'owner', 'created', 'expires')
+
+    def __init__(self, key_id: str, owner: str, created: float, expires: Optional[float]):
+        self.key_id = key_id
+        self.owner = owner
+        self.created = created
+        self.expires = expires
+
+
+def key_id(api_key: Any) -> Optional[str]:
+    if not isinstance(api_key, str) or not api_key.startswith(KEY_PREFIX):
+        return None
+    if len(api_key) < len(KEY_PREFIX) + KEY_ID_LENGTH + 16:
+        return None
+    return api_key[:len(KEY_PREFIX) + KEY_ID_LENGTH]
+
+
+class ApiKeyStore:
+    """API keys issued by this server, held in memory until it restarts.
+
+    A record keeps the owner, expiry and a salted SHA-256 of the key, never
+    the key itself. Records are keyed by key id, so checking a key costs one
+    dict lookup and one hash however many keys were issued.
+    """
+
+    def __init__(self, lifetime: Optional[float] = None):
+        self.lifetime = lifetime
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def issue(self, owner: str, generate: Callable[[], str]) -> Tuple[str, ApiKey]:
+        """Mint a key for owner: the caller shows the plain key once, only its hash stays here"""
+        while True:
+            api_key = generate()
+            kid = key_id(api_key)
+            if kid is None:
+                raise ValueError(f'Generated keys must look like {KEY_PREFIX}<hex>')
+            if kid not in self._records:
+                break
+        salt = secrets.token_bytes(16)
+        created = time.time()
+        expires = created + self.lifetime if self.lifetime else None
+        self._records[kid] = {
+            'salt': salt,
+            'hash': hashlib.sha256(salt + api_key.encode()).digest(),
+            'owner': owner,
+            'created': created,
+            'expires': expires,
+            'revoked': False
+        }
+        return api_key, ApiKey(kid, owner, created, expires)
+
+    def verify(self, api_key: str) -> Optional[ApiKey]:
+        """The key as an ApiKey if this server issued it and it has neither expired nor been revoked"""
+        kid = key_id(api_key)
+        record = self._records.get(kid) if kid else None
+        if record is None or record['revoked']:
+            return None
+        if record['expires'] and record['expires'] <= time.time():
+            return None
+        if not hmac.compare_digest(hashlib.sha256(record['salt'] + api_key.encode()).digest(), record['hash']):
+            return None
+        return ApiKey(kid, record['owner'], record['created'], record['expires'])
+
+    def owner(self, kid: str) -> Optional[str]:
+        record = self._records.get(kid)
+        return record['owner'] if record else None
+
+    def revoke(self, kid: str) -> bool:
+        """Mark a key revoked; False for an id never issued here"""
+        record = self._records.get(kid)
+        if record is None:
+            return False
+        record['revoked'] = True
+        return True
@@ -0,0 +1,237 @@
+"""
+🔥 Brolostack Devil - Credit scoring
+The scalar scoring rules and their vectorized NumPy counterpart for batches
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import devil_json
+
+# user_data fields and the default the scalar rules use when one is absent
+NUMERIC_FIELDS = {'income': 0, 'age': 0, 'debt_ratio': 1.0}
+CATEGORICAL_FIELDS = ('employment', 'payment_history')
+
+
+class BatchTooLarge(ValueError):
+    """The batch has more rows than the caller allows"""
+
+
+# 🔥 Simulate sensitive business logic (will be obfuscated)
+def calculate_user_credit_score(user_data: Dict[str, Any]) -> int:
+    """
+    🔥 SENSITIVE ALGORITHM - COMPLETELY OBFUSCATED IN PRODUCTION
+    This credit scoring algorithm will be turned into meaningless jargon
+    """
+    # This function name and logic will be obfuscated
+    score = 300  # Base score
+
+    if user_data.get('income', 0) > 50000:
+        score += 100
+
+    if user_data.get('age', 0) > 25:
+        score += 50
+
+    if user_data.get('employment') == 'stable':
+        score += 75
+
+    if user_data.get('debt_ratio', 1.0) < 0.3:
+        score += 125
+
+    if user_data.get('payment_history') == 'excellent':
+        score += 150
+
+    return min(score, 850)
+
+
+def _numeric(values: List[Any], default: float, nulls_missing: bool):
+    """Column as float64 plus a mask of rows the scalar rules could compare.
+
+    Anything but a number (or bool) makes the scalar comparison raise, so
+    such rows are marked invalid instead of scored. Converting to float64
+    keeps every comparison result: the thresholds are far from where
+    integers stop being exact, and integers too large for a float become
+    infinities of the same sign.
+    """
+    try:
+        array = np.asarray(values)
+        if array.ndim == 1 and array.dtype.kind in 'biuf':
+            return array.astype(np.float64), np.ones(len(values), dtype=bool)
+    except (OverflowError, ValueError):
+        pass
+    out = np.empty(len(values), dtype=np.float64)
+    valid = np.ones(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        if value is None and nulls_missing:
+            value = default
+        if isinstance(value, (int, float)):
+            try:
+                out[i] = value
+            except OverflowError:
+                out[i] = math.inf if value > 0 else -math.inf
+        else:
+            out[i] = math.nan
+            valid[i] = False
+    return out, valid
+
+
+def _equals(values: List[Any], target: str):
+    # Element by element, as == does: NumPy string arrays would drop trailing NULs
+    return np.fromiter((value == target for value in values), dtype=bool, count=len(values))
+
+
+class ScoredBatch:
+    """Scores and rule outcomes for a batch, encodable a chunk of rows at a time"""
+
+    __slots__ = ('user_ids', 'scores', 'valid', 'income', 'age', 'debt')
+
+    def __init__(self, user_ids: List[Any], scores, valid, income, age, debt):
+        self.user_ids = user_ids
+        self.scores = scores
+        self.valid = valid
+        self.income = income
+        self.age = age
+        self.debt = debt
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @property
+    def invalid(self) -> int:
+        return int(len(self.valid) - np.count_nonzero(self.valid))
+
+    def _columns(self, start: int, end: int) -> Dict[str, Any]:
+        scores = self.scores[start:end]
+        return {
+            'user_id': self.user_ids[start:end],
+            'credit_score': scores.tolist(),
+            'recommendation': np.where(scores > 700, 'approved', 'review_required').tolist(),
+            'factors': {
+                'income_factor': np.where(self.income[start:end], 'positive', 'neutral').tolist(),
+                'age_factor': np.where(self.age[start:end], 'positive', 'neutral').tolist(),
+                'debt_factor': np.where(self.debt[start:end], 'positive', 'negative').tolist()
+            }
+        }
+
+    def encode(self, start: int, end: int, batch_format: str) -> bytes:
+        """Rows [start, end) as NDJSON records or as one columnar JSON object"""
+        columns = self._columns(start, end)
+        valid = self.valid[start:end]
+        if batch_format == 'columnar':
+            invalid = np.flatnonzero(~valid)
+            for i in invalid.tolist():
+                columns['credit_score'][i] = columns['recommendation'][i] = None
+            columns['invalid'] = (invalid + start).tolist()
+            return devil_json.dumps_bytes(columns)
+        factors = columns['factors']
+        rows = [
+            {
+                'user_id': user_id,
+                'credit_score': score,
+                'recommendation': recommendation,
+                'factors': {'income_factor': income, 'age_factor': age, 'debt_factor': debt}
+            } if ok else {'user_id': user_id, 'error': 'invalid_user_data'}
+            for user_id, score, recommendation, income, age, debt, ok in zip(
+                columns['user_id'], columns['credit_score'], columns['recommendation'],
+                factors['income_factor'], factors['age_factor'], factors['debt_factor'], valid.tolist()
+            )
+        ]
+        return b'\n'.join(map(devil_json.dumps_bytes, rows)) + b'\n'
+
+
+def score_columns(columns: Dict[str, List[Any]], nulls_missing: bool = True,
+                  valid: Optional[np.ndarray] = None) -> ScoredBatch:
+    """Vectorized calculate_user_credit_score over equal-length columns.
+
+    Produces exactly the scalar function's score for every row it can
+    score. Rows it cannot (a value the scalar comparison would raise on,
+    or no user_id) are marked invalid. With nulls_missing, a null counts
+    as an absent field and takes the scalar default; otherwise it makes
+    the row invalid, as it would make the scalar function raise.
+    """
+    user_ids = columns.get('user_id')
+    if not isinstance(user_ids, list):
+        raise ValueError("Batch needs a 'user_id' column")
+    rows = len(user_ids)
+    for name, column in columns.items():
+        if not isinstance(column, list) or len(column) != rows:
+            raise ValueError(f"Column '{name}' must be a list of {rows} values")
+
+    ok = np.fromiter((bool(user_id) for user_id in user_ids), dtype=bool, count=rows)
+    if valid is not None:
+        ok &= valid
+    outcomes = {}
+    for field, default in NUMERIC_FIELDS.items():
+        column = columns.get(field)
+        if column is None:
+            values = np.full(rows, default, dtype=np.float64)
+        else:
+            values, field_ok = _numeric(column, default, nulls_missing)
+            ok &= field_ok
+        outcomes[field] = values
+
+    income = outcomes['income'] > 50000
+    age = outcomes['age'] > 25
+    debt = outcomes['debt_ratio'] < 0.3
+    scores = (300 + 100 * income.astype(np.int32) + 50 * age.astype(np.int32)
+              + 125 * debt.astype(np.int32))
+    for field, target, points in (('employment', 'stable', 75), ('payment_history', 'excellent', 150)):
+        column = columns.get(field)
+        if column is not None:
+            scores += points * _equals(column, target).astype(np.int32)
+    scores = np.minimum(scores, 850)
+    return ScoredBatch(user_ids, scores, ok, income, age, debt)
+
+
+def _check_rows(rows: int, max_rows: Optional[int]):
+    if max_rows is not None and rows > max_rows:
+        raise BatchTooLarge(f'Batch exceeds {max_rows} rows')
+
+
+def parse_columnar(body: bytes, max_rows: Optional[int] = None) -> Dict[str, List[Any]]:
+    columns = devil_json.loads(body)
+    if not isinstance(columns, dict):
+        raise ValueError('Columnar batch must be a JSON object of equal-length arrays')
+    user_ids = columns.get('user_id')
+    if isinstance(user_ids, list):
+        _check_rows(len(user_ids), max_rows)
+    return columns
+
+
+def _ndjson_line(number: int, line: bytes) -> Any:
+    try:
+        return devil_json.loads(line)
+    except ValueError:
+        raise ValueError(f'Invalid JSON on NDJSON line {number}')
+
+
+def parse_ndjson(body: bytes, max_rows: Optional[int] = None):
+    """Columns from NDJSON lines shaped like the single request: {user_id, user_data}.
+
+    Absent fields take the scalar defaults here, so a null left in a
+    column is a real null; pass nulls_missing=False when scoring. Returns
+    (columns, valid) where valid flags rows that have a non-empty
+    user_data object, as the single endpoint requires. More than max_rows
+    lines is a BatchTooLarge, raised before any line is parsed.
+    """
+    lines = [line for line in body.splitlines() if line.strip()]
+    _check_rows(len(lines), max_rows)
+    try:
+        # One parse of the whole body as an array is much faster than one per line
+        records = devil_json.loads(b'[' + b','.join(lines) + b']')
+    except ValueError:
+        records = None
+    # A line such as '{...},{...}' parses fine once joined but would shift every later row
+    if records is None or len(records) != len(lines):
+        records = [_ndjson_line(number, line) for number, line in enumerate(lines, 1)]
+    records = [record if isinstance(record, dict) else {} for record in records]
+    user_data = [record.get('user_data') for record in records]
+    valid = np.fromiter((isinstance(data, dict) and bool(data) for data in user_data),
+                        dtype=bool, count=len(user_data))
+    user_data = [data if isinstance(data, dict) else {} for data in user_data]
+    columns = {'user_id': [record.get('user_id') for record in records]}
+    for field, default in (*NUMERIC_FIELDS.items(), *((field, None) for field in CATEGORICAL_FIELDS)):
+        columns[field] = [data.get(field, default) for data in user_data]
+    return columns, valid
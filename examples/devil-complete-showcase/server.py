@@ -3,18 +3,30 @@
 Demonstrates backend source code protection for Python frameworks
 """
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
-import json
 import time
+import base64
 import hashlib
+import hmac
 import secrets
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 import asyncio
+import os
 from datetime import datetime
 
+import devil_json
+from devil_chat import FakeProvider, TranscriptConflict, Transcripts, TranscriptTurn, sse
+from devil_connections import ConnectionManager
+from devil_crypto import DevilCipher
+from devil_idempotency import IdempotencyCache, IdempotencyConflict, request_fingerprint
+from devil_jargon import JargonGenerations, JargonTranslator
+from devil_keys import ApiKey, ApiKeyStore
+from devil_scoring import BatchTooLarge, calculate_user_credit_score, parse_columnar, parse_ndjson, score_columns
+
 # 🔥 Import Brolostack Devil protection (would be imported from brolostack package)
 # For this example, we'll simulate the protection functions
 
@@ -29,8 +41,16 @@ class BrolostackDevilPython:
             'jargon_generation': True
         }
         self.obfuscation_map = {}
-        self.jargon_map = {}
+        # 🔥 Immutable jargon generations; the next one is prepared in the background
+        self.jargon = JargonGenerations()
         self.protected_functions = set()
+        # 🔥 AES-256-GCM: master keys cached per (secret hash, user), payloads of
+        # offload_threshold bytes or more are sealed on the crypto thread pool
+        self.cipher = DevilCipher(
+            max_keys=int(os.getenv('DEVIL_KEY_CACHE_SIZE', 1024)),
+            chunk_size=int(os.getenv('DEVIL_CRYPTO_CHUNK_SIZE', 64 * 1024)),
+            offload_threshold=int(os.getenv('DEVIL_CRYPTO_OFFLOAD_BYTES', 256 * 1024))
+        )
         
     def obfuscate_variable_names(self, code: str) -> str:
         """Obfuscate variable names in Python code"""
@@ -77,67 +97,59 @@ class BrolostackDevilPython:
         
         return '\n'.join(fake_imports + fake_functions) + '\n\n' + code
     
+    @property
+    def translator(self) -> JargonTranslator:
+        """The current jargon generation; hold on to it to stay pinned across awaits"""
+        return self.jargon.current
+    
+    @property
+    def jargon_map(self) -> Dict[str, str]:
+        return self.translator.keys
+    
     def generate_jargon_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Convert real response to jargon"""
-        jargon_data = {}
-        
-        for key, value in data.items():
-            # Convert keys to jargon
-            if key == 'user_id':
-                jargon_key = 'quantumEntityId'
-            elif key == 'credit_score':
-                jargon_key = 'dataMatrixValue'
-            elif key == 'status':
-                jargon_key = 'algorithmState'
-            elif key == 'message':
-                jargon_key = 'vectorMessage'
-            else:
-                jargon_key = f'obfuscated_{secrets.token_hex(4)}'
-            
-            # Convert values to jargon if they're strings
-            if isinstance(value, str):
-                jargon_value = self._string_to_jargon(value)
-            else:
-                jargon_value = value
-                
-            jargon_data[jargon_key] = jargon_value
-            
-        return jargon_data
+        """Convert real response to jargon (keys and strings at every depth)"""
+        return self.translator.translate(data)
+    
+    def generate_jargon_json(self, payload: bytes) -> bytes:
+        """Convert an already serialized JSON response to jargon in one pass"""
+        return self.translator.translate_json(payload)
+    
+    def stream_jargon_json(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Convert a serialized JSON stream to jargon chunk by chunk"""
+        return self.translator.translate_json_stream(chunks)
     
     def _string_to_jargon(self, text: str) -> str:
         """Convert string to jargon"""
-        jargon_dict = {
-            'active': 'quantumProcessorActive',
-            'success': 'algorithmExecutorSuccess',
-            'approved': 'dataMatrixApproved',
-            'error': 'vectorArrayError',
-            'protected': 'entityContainerSecured'
-        }
-        
-        for original, jargon in jargon_dict.items():
-            text = text.replace(original, jargon)
-            
-        return text
+        return self.translator.text(text)
+    
+    async def mutate(self) -> JargonTranslator:
+        """Swap in the next jargon generation: unknown keys get new obfuscated names"""
+        self.obfuscation_map.clear()
+        return await self.jargon.rotate()
     
     async def encrypt_data(self, data: Any, user_secret: str, context: Dict[str, str]) -> Dict[str, Any]:
-        """Encrypt data using Devil security"""
-        # Simulate encryption (in real implementation, this would be much more secure)
-        import base64
-        
-        data_str = json.dumps(data)
-        # Simple XOR encryption for demo (real implementation would use AES-256-GCM)
-        encrypted = base64.b64encode(data_str.encode()).decode()
+        """Encrypt data using Devil security (AES-256-GCM, key bound to the context)"""
+        data_bytes = devil_json.dumps_bytes(data)
+        sealed = await self.cipher.encrypt(data_bytes, user_secret, context)
+        encrypted = base64.b64encode(sealed).decode()
         
         return {
             'encrypted_data': encrypted,
             'token': {
                 'id': f'devil_{int(time.time())}_{secrets.token_hex(8)}',
                 'timestamp': int(time.time()),
-                'algorithm': 'DEVIL_CIPHER_PYTHON'
+                'algorithm': self.cipher.algorithm
             },
-            'security_fingerprint': hashlib.sha256(encrypted.encode()).hexdigest()[:16]
+            'security_fingerprint': hashlib.sha256(sealed).hexdigest()[:16],
+            # The key is bound to this exact context, so decrypting needs it back with the secret
+            'context': dict(context)
         }
     
+    async def decrypt_data(self, encrypted_data: str, user_secret: str, context: Dict[str, str]) -> Any:
+        """Decrypt what encrypt_data produced for the same secret and context"""
+        sealed = base64.b64decode(encrypted_data)
+        return devil_json.loads(await self.cipher.decrypt(sealed, user_secret, context))
+    
     def get_status(self) -> Dict[str, Any]:
         """Get Devil protection status"""
         return {
@@ -146,6 +158,7 @@ class BrolostackDevilPython:
             'jargon_generation': self.config['jargon_generation'],
             'protected_functions': len(self.protected_functions),
             'obfuscation_mappings': len(self.obfuscation_map),
+            'jargon_generation_id': self.translator.generation,
             'uptime': time.time(),
             'language': 'python',
             'framework': 'fastapi'
@@ -167,7 +180,8 @@ devil = BrolostackDevilPython({
 app = FastAPI(
     title="🔥 Brolostack Devil Protected API",
     description="Python FastAPI server with ultimate source code protection",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=devil_json.DevilJSONResponse
 )
 
 # 🔥 CORS middleware
@@ -179,53 +193,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 🔥 WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
-
-manager = ConnectionManager()
+# 🔥 WebSocket fan-out: each client gets a bounded outbound queue (frames) and its own
+# writer; a client that falls behind loses its oldest frames or is disconnected
+manager = ConnectionManager(
+    max_queue=int(os.getenv('DEVIL_WS_QUEUE_SIZE', 256)),
+    slow_consumer_policy=os.getenv('DEVIL_WS_SLOW_CONSUMER', 'drop-oldest'),
+    send_timeout=float(os.getenv('DEVIL_WS_SEND_TIMEOUT', 10))
+)
 
 # 🔥 Simulate sensitive business logic (will be obfuscated)
-def calculate_user_credit_score(user_data: Dict[str, Any]) -> int:
-    """
-    🔥 SENSITIVE ALGORITHM - COMPLETELY OBFUSCATED IN PRODUCTION
-    This credit scoring algorithm will be turned into meaningless jargon
-    """
-    # This function name and logic will be obfuscated
-    score = 300  # Base score
-    
-    if user_data.get('income', 0) > 50000:
-        score += 100
-    
-    if user_data.get('age', 0) > 25:
-        score += 50
-        
-    if user_data.get('employment') == 'stable':
-        score += 75
-        
-    if user_data.get('debt_ratio', 1.0) < 0.3:
-        score += 125
-        
-    if user_data.get('payment_history') == 'excellent':
-        score += 150
-    
-    return min(score, 850)
-
 def generate_secure_api_key(user_id: str) -> str:
     """
     🔥 SECRET API KEY GENERATION - OBFUSCATED
@@ -241,6 +217,49 @@ def generate_secure_api_key(user_id: str) -> str:
     
     return f"bro_py_{api_hash[:32]}"
 
+# 🔥 API keys: only salted hashes are kept. With DEVIL_REQUIRE_API_KEY set, sensitive
+# endpoints need a valid X-API-Key header (api_key query parameter on the WebSocket)
+# issued to the user they act for
+api_keys = ApiKeyStore(lifetime=float(os.getenv('DEVIL_API_KEY_LIFETIME', 30 * 24 * 3600)))
+REQUIRE_API_KEY = os.getenv('DEVIL_REQUIRE_API_KEY', 'false').lower() in ('1', 'true', 'yes')
+ADMIN_TOKEN = os.getenv('DEVIL_ADMIN_TOKEN')
+
+# 🔥 Jargon responses are serialized once and translated as JSON bytes; bodies past
+# DEVIL_JARGON_STREAM_BYTES are translated and sent chunk by chunk instead of as a second copy
+JARGON_STREAM_BYTES = int(os.getenv('DEVIL_JARGON_STREAM_BYTES', 1024 * 1024))
+JARGON_STREAM_CHUNK = 64 * 1024
+
+def jargon_response(data: Dict[str, Any]) -> Response:
+    """data as a JSON response in the current jargon generation"""
+    payload = devil_json.dumps_bytes(data)
+    if len(payload) <= JARGON_STREAM_BYTES:
+        return Response(devil.generate_jargon_json(payload), media_type='application/json')
+    chunks = (payload[start:start + JARGON_STREAM_CHUNK] for start in range(0, len(payload), JARGON_STREAM_CHUNK))
+    # A plain iterator, so Starlette translates it in the threadpool
+    return StreamingResponse(devil.stream_jargon_json(chunks), media_type='application/json')
+
+async def authenticate(api_key: Optional[str]) -> Optional[ApiKey]:
+    """The verified key; None only when no key was given and none is required"""
+    if not api_key:
+        if REQUIRE_API_KEY:
+            raise HTTPException(status_code=401, detail="API key required")
+        return None
+    verified = api_keys.verify(api_key)
+    if verified is None:
+        raise HTTPException(status_code=401, detail="Invalid, expired or revoked API key")
+    return verified
+
+async def api_key_auth(x_api_key: Optional[str] = Header(None)) -> Optional[ApiKey]:
+    return await authenticate(x_api_key)
+
+def authorize(caller: Optional[ApiKey], user_id: Any):
+    """A key only acts for the user it was issued to"""
+    if caller is not None and caller.owner != user_id:
+        raise HTTPException(status_code=403, detail="API key was not issued to this user")
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN and token and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()))
+
 def process_sensitive_payment(payment_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     🔥 PAYMENT PROCESSING LOGIC - ULTRA-SENSITIVE
@@ -290,11 +309,13 @@ async def get_status():
     }
     
     # Apply jargon obfuscation to response
-    return devil.generate_jargon_response(status_data)
+    return jargon_response(status_data)
 
 @app.post("/api/user/credit-score")
-async def calculate_credit_score(request_data: Dict[str, Any]):
+async def calculate_credit_score(request_data: Dict[str, Any],
+                                 caller: Optional[ApiKey] = Depends(api_key_auth)):
     """Calculate credit score - logic completely obfuscated"""
+    authorize(caller, request_data.get('user_id'))
     try:
         user_id = request_data.get('user_id')
         user_data = request_data.get('user_data', {})
@@ -335,6 +356,7 @@ async def calculate_credit_score(request_data: Dict[str, Any]):
             'encrypted_data': encryption_result['encrypted_data'],
             'token': encryption_result['token']['id'],
             'security_fingerprint': encryption_result['security_fingerprint'],
+            'encryption_context': encryption_result['context'],
             'devil_protected': True,
             'language': 'python'
         }
@@ -343,9 +365,149 @@ async def calculate_credit_score(request_data: Dict[str, Any]):
         print(f"🔥 Credit score calculation failed: {e}")
         raise HTTPException(status_code=500, detail="Internal server error - Devil protected")
 
+# 🔥 Batch scoring: rows per encrypted chunk, and the most rows and bytes one request may carry
+BATCH_CHUNK_ROWS = int(os.getenv('DEVIL_BATCH_CHUNK_ROWS', 10_000))
+BATCH_MAX_ROWS = int(os.getenv('DEVIL_BATCH_MAX_ROWS', 2_000_000))
+BATCH_MAX_BYTES = int(os.getenv('DEVIL_BATCH_MAX_BYTES', 512 * 1024 * 1024))
+
+async def read_batch_body(request: Request) -> bytes:
+    """The request body, refused as soon as it is known to exceed BATCH_MAX_BYTES"""
+    too_large = HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_BYTES} bytes")
+    length = request.headers.get('content-length', '')
+    if length.isdigit() and int(length) > BATCH_MAX_BYTES:
+        raise too_large
+    # Without a (truthful) Content-Length, stop reading at the cap
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > BATCH_MAX_BYTES:
+            raise too_large
+    return bytes(body)
+
+def score_batch(body: bytes, batch_format: str):
+    """Parse and score a whole batch (CPU-bound, run off the event loop)
+
+    Rows are counted against BATCH_MAX_ROWS before anything is scored.
+    """
+    if batch_format == 'ndjson':
+        columns, valid = parse_ndjson(body, BATCH_MAX_ROWS)
+        return score_columns(columns, nulls_missing=False, valid=valid)
+    return score_columns(parse_columnar(body, BATCH_MAX_ROWS))
+
+@app.post("/api/user/credit-score/batch")
+async def calculate_credit_score_batch(request: Request, caller: Optional[ApiKey] = Depends(api_key_auth)):
+    """Score many applicants at once - same scores as /api/user/credit-score, streamed encrypted
+    
+    The body is NDJSON (Content-Type application/x-ndjson), one
+    {user_id, user_data} object per line, or a JSON object of columns
+    (user_id, income, age, employment, debt_ratio, payment_history).
+    Credentials come in the X-User-Id and X-User-Secret headers.
+    
+    The response is NDJSON: a header line, then one line per chunk of
+    BATCH_CHUNK_ROWS results with the chunk encrypted under the context
+    {user_id, session_id: batch_id, data_type: 'credit-score-batch',
+    chunk: index}, then a final 'done' line.
+    """
+    user_id = request.headers.get('x-user-id')
+    user_secret = request.headers.get('x-user-secret')
+    if not all([user_id, user_secret]):
+        raise HTTPException(status_code=400, detail="Missing X-User-Id or X-User-Secret header")
+    authorize(caller, user_id)
+    
+    content_type = request.headers.get('content-type', '')
+    batch_format = 'ndjson' if 'ndjson' in content_type or 'jsonl' in content_type else 'columnar'
+    body = await read_batch_body(request)
+    try:
+        batch = await asyncio.to_thread(score_batch, body, batch_format)
+    except BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    batch_id = f'credit_batch_{int(time.time())}_{secrets.token_hex(4)}'
+    rows = len(batch)
+    starts = range(0, rows, BATCH_CHUNK_ROWS)
+    
+    async def encrypted_chunks():
+        yield devil_json.dumps_bytes({
+            'batch_id': batch_id,
+            'format': batch_format,
+            'rows': rows,
+            'invalid': batch.invalid,
+            'chunks': len(starts),
+            'algorithm': devil.cipher.algorithm
+        }) + b'\n'
+        for index, start in enumerate(starts):
+            plaintext = await asyncio.to_thread(batch.encode, start, min(start + BATCH_CHUNK_ROWS, rows), batch_format)
+            sealed = await devil.cipher.encrypt(plaintext, user_secret, {
+                'user_id': user_id,
+                'session_id': batch_id,
+                'data_type': 'credit-score-batch',
+                'chunk': str(index)
+            })
+            yield devil_json.dumps_bytes({
+                'chunk': index,
+                'start': start,
+                'encrypted_data': base64.b64encode(sealed).decode(),
+                'security_fingerprint': hashlib.sha256(sealed).hexdigest()[:16]
+            }) + b'\n'
+        yield devil_json.dumps_bytes({'done': True, 'batch_id': batch_id, 'rows': rows}) + b'\n'
+    
+    return StreamingResponse(encrypted_chunks(), media_type='application/x-ndjson')
+
+# 🔥 Idempotency: a retried payment replays its stored encrypted result instead of running again
+payment_idempotency = IdempotencyCache(
+    max_entries=int(os.getenv('DEVIL_IDEMPOTENCY_MAX_KEYS', 100_000)),
+    ttl=float(os.getenv('DEVIL_IDEMPOTENCY_TTL', 24 * 3600))
+)
+PAYMENT_BATCH_MAX = int(os.getenv('DEVIL_PAYMENT_BATCH_MAX', 1000))
+
+async def protect_payment(payment_data: Dict[str, Any], user_secret: str, user_id: str) -> Dict[str, Any]:
+    """Process one payment and encrypt its result"""
+    # Process payment (obfuscated logic)
+    payment_result = process_sensitive_payment(payment_data)
+    
+    # Encrypt payment result
+    encryption_result = await devil.encrypt_data(
+        payment_result,
+        user_secret,
+        {
+            'user_id': user_id,
+            'session_id': f'payment_{int(time.time())}',
+            'data_type': 'document'
+        }
+    )
+    
+    return {
+        'success': True,
+        'encrypted_result': encryption_result['encrypted_data'],
+        'token': encryption_result['token']['id'],
+        'encryption_context': encryption_result['context'],
+        'devil_protected': True,
+        'message': 'Payment processed with Devil protection'
+    }
+
+async def idempotent_payment(idempotency_key: Optional[str], payment_data: Dict[str, Any],
+                             user_secret: str, user_id: str) -> Tuple[Dict[str, Any], bool]:
+    """Process a payment once per (user, idempotency key); returns (result, replayed)"""
+    if not idempotency_key:
+        return await protect_payment(payment_data, user_secret, user_id), False
+    # The stored result is encrypted for this secret, so it is part of the fingerprint
+    fingerprint = request_fingerprint([payment_data, hashlib.sha256(user_secret.encode()).hexdigest()])
+    return await payment_idempotency.run(
+        (user_id, idempotency_key), fingerprint,
+        lambda: protect_payment(payment_data, user_secret, user_id)
+    )
+
 @app.post("/api/payment/process")
-async def process_payment(request_data: Dict[str, Any]):
-    """Process payment - ultra-sensitive logic obfuscated"""
+async def process_payment(request_data: Dict[str, Any], response: Response,
+                          idempotency_key: Optional[str] = Header(None),
+                          caller: Optional[ApiKey] = Depends(api_key_auth)):
+    """Process payment - ultra-sensitive logic obfuscated
+    
+    With an Idempotency-Key header, retries of the same payment return the
+    first result (marked Idempotent-Replayed) instead of charging again.
+    """
     try:
         payment_data = request_data.get('payment_data', {})
         user_secret = request_data.get('user_secret')
@@ -353,65 +515,123 @@ async def process_payment(request_data: Dict[str, Any]):
         
         if not all([payment_data, user_secret, user_id]):
             raise HTTPException(status_code=400, detail="Missing payment data")
+        authorize(caller, user_id)
         
-        # Process payment (obfuscated logic)
-        payment_result = process_sensitive_payment(payment_data)
-        
-        # Encrypt payment result
-        encryption_result = await devil.encrypt_data(
-            payment_result,
-            user_secret,
-            {
-                'user_id': user_id,
-                'session_id': f'payment_{int(time.time())}',
-                'data_type': 'document'
-            }
-        )
-        
-        return {
-            'success': True,
-            'encrypted_result': encryption_result['encrypted_data'],
-            'token': encryption_result['token']['id'],
-            'devil_protected': True,
-            'message': 'Payment processed with Devil protection'
-        }
+        result, replayed = await idempotent_payment(idempotency_key, payment_data, user_secret, user_id)
+        if replayed:
+            response.headers['Idempotent-Replayed'] = 'true'
+        return result
         
+    except HTTPException:
+        raise
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         print(f"🔥 Payment processing failed: {e}")
         raise HTTPException(status_code=500, detail="Payment processing error - Devil protected")
 
+@app.post("/api/payment/batch")
+async def process_payment_batch(request_data: Dict[str, Any], caller: Optional[ApiKey] = Depends(api_key_auth)):
+    """Process many payments per call - per-item results streamed back as NDJSON
+    
+    The body is {user_id, user_secret, payments: [{payment_data,
+    idempotency_key?}, ...]}. Items are validated and processed in order,
+    each under its own idempotency key, and every item gets one line:
+    {index, idempotency_key, replayed, ...result} or {index, success:
+    false, error}. A final line reports the counts.
+    """
+    user_secret = request_data.get('user_secret')
+    user_id = request_data.get('user_id')
+    payments = request_data.get('payments')
+    
+    if not all([user_secret, user_id]) or not isinstance(payments, list) or not payments:
+        raise HTTPException(status_code=400, detail="Missing payment data")
+    if len(payments) > PAYMENT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {PAYMENT_BATCH_MAX} payments")
+    authorize(caller, user_id)
+    
+    async def results():
+        counts = {'processed': 0, 'replayed': 0, 'failed': 0}
+        for index, item in enumerate(payments):
+            line = {'index': index}
+            try:
+                payment_data = item.get('payment_data') if isinstance(item, dict) else None
+                if not isinstance(payment_data, dict) or not payment_data:
+                    raise ValueError("Missing payment data")
+                key = item.get('idempotency_key')
+                result, replayed = await idempotent_payment(key, payment_data, user_secret, user_id)
+                line.update(result, idempotency_key=key, replayed=replayed)
+                counts['replayed' if replayed else 'processed'] += 1
+            except ValueError as e:
+                line.update(success=False, error=str(e))
+                counts['failed'] += 1
+            except Exception as e:
+                print(f"🔥 Payment processing failed: {e}")
+                line.update(success=False, error="Payment processing error - Devil protected")
+                counts['failed'] += 1
+            yield devil_json.dumps_bytes(line) + b'\n'
+        yield devil_json.dumps_bytes({'done': True, **counts}) + b'\n'
+    
+    return StreamingResponse(results(), media_type='application/x-ndjson')
+
 @app.get("/api/generate-api-key/{user_id}")
-async def generate_api_key(user_id: str):
-    """Generate API key - generation logic obfuscated"""
+async def generate_api_key(user_id: str, x_api_key: Optional[str] = Header(None),
+                           x_admin_token: Optional[str] = Header(None)):
+    """Generate API key - generation logic obfuscated
+    
+    The key is stored only as a salted hash, so this response is the one
+    chance to read it. With DEVIL_REQUIRE_API_KEY set, a new key needs a
+    valid key of the same user or the DEVIL_ADMIN_TOKEN in X-Admin-Token.
+    """
+    if REQUIRE_API_KEY and not is_admin(x_admin_token):
+        authorize(await authenticate(x_api_key), user_id)
     try:
-        # Generate API key (obfuscated logic)
-        api_key = generate_secure_api_key(user_id)
+        # Generate API key (obfuscated logic), then keep only its salted hash
+        api_key, issued = api_keys.issue(user_id, lambda: generate_secure_api_key(user_id))
         
         response_data = {
             'success': True,
             'api_key': api_key,
-            'expires_in': '30 days',
+            'key_id': issued.key_id,
+            'expires_in': f'{int(api_keys.lifetime // 86400)} days' if api_keys.lifetime else 'never',
             'devil_protected': True,
             'language': 'python',
             'warning': 'API key generation logic is completely obfuscated'
         }
         
         # Apply jargon obfuscation
-        return devil.generate_jargon_response(response_data)
+        return jargon_response(response_data)
         
     except Exception as e:
         print(f"🔥 API key generation failed: {e}")
         raise HTTPException(status_code=500, detail="Key generation error - Devil protected")
 
+@app.delete("/api/api-keys/{key_id}")
+async def revoke_api_key(key_id: str, x_api_key: Optional[str] = Header(None),
+                         x_admin_token: Optional[str] = Header(None)):
+    """Revoke an API key by its id; needs a valid key of the same user (or the admin token)"""
+    owner = api_keys.owner(key_id)
+    if not is_admin(x_admin_token):
+        caller = api_keys.verify(x_api_key) if x_api_key else None
+        if caller is None:
+            raise HTTPException(status_code=401, detail="API key required")
+        if owner is not None:
+            authorize(caller, owner)
+    if owner is None or not api_keys.revoke(key_id):
+        raise HTTPException(status_code=404, detail="Unknown API key")
+    return {'success': True, 'key_id': key_id, 'revoked': True}
+
 @app.post("/api/ai/chat")
-async def ai_chat(request_data: Dict[str, Any]):
+async def ai_chat(request_data: Dict[str, Any], caller: Optional[ApiKey] = Depends(api_key_auth)):
     """AI chat with conversation protection"""
+    authorize(caller, request_data.get('user_id', 'anonymous'))
     try:
         conversation = request_data.get('conversation', {})
         user_secret = request_data.get('user_secret')
         ai_provider = request_data.get('ai_provider', 'openai')
         
-        # Convert real conversation to jargon for AI provider
+        # Convert real conversation to jargon for AI provider, all with one generation
+        translator = devil.translator
         jargon_conversation = {
             'messages': []
         }
@@ -419,7 +639,7 @@ async def ai_chat(request_data: Dict[str, Any]):
         for message in conversation.get('messages', []):
             jargon_message = {
                 'role': message['role'],
-                'content': devil._string_to_jargon(message['content'])
+                'content': translator.text(message['content'])
             }
             jargon_conversation['messages'].append(jargon_message)
         
@@ -447,7 +667,9 @@ async def ai_chat(request_data: Dict[str, Any]):
             'ai_response': ai_response,
             'real_conversation_encrypted': encrypted_conversation['encrypted_data'],
             'devil_token': encrypted_conversation['token']['id'],
+            'encryption_context': encrypted_conversation['context'],
             'provider_saw_jargon': True,
+            'jargon_generation': translator.generation,
             'language': 'python'
         }
         
@@ -455,6 +677,83 @@ async def ai_chat(request_data: Dict[str, Any]):
         print(f"🔥 AI chat protection failed: {e}")
         raise HTTPException(status_code=500, detail="AI service error - Devil protected")
 
+# 🔥 Streaming chat: provider tokens are turned back from jargon as they arrive, and the
+# transcript is encrypted one message at a time (only each chain's head is kept here)
+chat_provider = FakeProvider(delay=float(os.getenv('DEVIL_FAKE_PROVIDER_DELAY', 0.02)))
+transcripts = Transcripts(devil.cipher, max_conversations=int(os.getenv('DEVIL_CHAT_MAX_CONVERSATIONS', 10_000)))
+
+async def seal_messages(turn: TranscriptTurn, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [await turn.seal(message) for message in messages]
+
+@app.post("/api/ai/chat/stream")
+async def ai_chat_stream(request_data: Dict[str, Any], caller: Optional[ApiKey] = Depends(api_key_auth)):
+    """AI chat streamed as Server-Sent Events - the reply is shown as the provider writes it
+    
+    The body is that of /api/ai/chat plus an optional conversation_id
+    (one is assigned when absent). The provider sees the conversation in
+    jargon and its reply is translated back piece by piece. Events:
+    'start' {conversation_id, jargon_generation}; 'token' {text}; one
+    'transcript' {turn, role, previous, encrypted_data} per message added
+    to the encrypted transcript, sealed under the context {user_id,
+    session_id: conversation_id, data_type: 'ai-conversation', turn,
+    previous}; then 'done' {conversation_id, turns, digest} or 'error'.
+    Later turns send the whole conversation again but only its new
+    messages are encrypted.
+    """
+    user_id = request_data.get('user_id', 'anonymous')
+    authorize(caller, user_id)
+    conversation = request_data.get('conversation')
+    messages = conversation.get('messages') if isinstance(conversation, dict) else None
+    user_secret = request_data.get('user_secret')
+    if not user_secret or not isinstance(messages, list) or not messages or not all(
+            isinstance(message, dict) and isinstance(message.get('content'), str) for message in messages):
+        raise HTTPException(status_code=400, detail="Missing user_secret or conversation messages")
+    conversation_id = str(request_data.get('conversation_id') or secrets.token_hex(8))
+    try:
+        turn, new_messages = transcripts.begin(user_secret, user_id, conversation_id, messages)
+    except TranscriptConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    # One generation for the whole exchange, even if a mutation happens mid-stream
+    translator = devil.translator
+    jargon_messages = [{'role': message.get('role'), 'content': translator.text(message['content'])}
+                       for message in messages]
+    print(f"🔥 Streaming from AI Provider ({chat_provider.name}) - {len(jargon_messages)} jargon messages")
+    
+    async def events():
+        yield sse('start', {'conversation_id': conversation_id, 'jargon_generation': translator.generation})
+        # New messages are sealed while the provider streams, off the path to the first token
+        sealing = asyncio.create_task(seal_messages(turn, new_messages))
+        reveal = translator.reveal_stream()
+        reply = []
+        try:
+            async for piece in chat_provider.stream(jargon_messages):
+                text = reveal.feed(piece)
+                if text:
+                    reply.append(text)
+                    yield sse('token', {'text': text})
+            text = reveal.flush()
+            if text:
+                reply.append(text)
+                yield sse('token', {'text': text})
+            
+            for record in await sealing:
+                yield sse('transcript', record)
+            yield sse('transcript', await turn.seal({'role': 'assistant', 'content': ''.join(reply)}))
+            transcripts.commit(turn)
+            yield sse('done', {'conversation_id': conversation_id, 'turns': turn.turns, 'digest': turn.digest})
+        except TranscriptConflict as e:
+            yield sse('error', {'message': str(e)})
+        except Exception as e:
+            print(f"🔥 AI chat stream failed: {e}")
+            yield sse('error', {'message': 'AI service error - Devil protected'})
+        finally:
+            # The client may have gone away mid-stream
+            sealing.cancel()
+    
+    return StreamingResponse(events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.get("/api/devil/status")
 async def devil_status():
     """Get Devil protection status"""
@@ -470,8 +769,7 @@ async def force_mutation():
     """Force security pattern mutation"""
     try:
         # Simulate mutation (in real implementation, this would update patterns)
-        devil.obfuscation_map.clear()
-        devil.jargon_map.clear()
+        await devil.mutate()
         
         return {
             'success': True,
@@ -486,13 +784,19 @@ async def force_mutation():
 # 🔥 WebSocket endpoint for real-time protection
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    # Browsers cannot set headers on a WebSocket, so the key comes as ?api_key=
+    api_key = websocket.query_params.get('api_key')
+    caller = api_keys.verify(api_key) if api_key else None
+    if (api_key or REQUIRE_API_KEY) and caller is None:
+        await websocket.close(code=1008)
+        return
     await manager.connect(websocket)
     print("🔥 WebSocket client connected with Devil protection")
     
     try:
         while True:
             data = await websocket.receive_text()
-            message_data = json.loads(data)
+            message_data = devil_json.loads(data)
             
             if message_data.get('type') == 'protect-message':
                 # Protect real-time message
@@ -500,6 +804,19 @@ async def websocket_endpoint(websocket: WebSocket):
                 user_id = message_data.get('user_id')
                 message = message_data.get('message')
                 
+                if not user_secret:
+                    await manager.send_json({
+                        'type': 'error',
+                        'message': 'user_secret is required to protect a message'
+                    }, websocket)
+                    continue
+                if caller is not None and caller.owner != user_id:
+                    await manager.send_json({
+                        'type': 'error',
+                        'message': 'API key was not issued to this user'
+                    }, websocket)
+                    continue
+                
                 # Encrypt message
                 encryption_result = await devil.encrypt_data(
                     {'message': message, 'timestamp': time.time()},
@@ -517,36 +834,37 @@ async def websocket_endpoint(websocket: WebSocket):
                     'encrypted_data': encryption_result['encrypted_data'],
                     'sender_id': user_id,
                     'token': encryption_result['token']['id'],
+                    'encryption_context': encryption_result['context'],
                     'devil_protected': True,
                     'language': 'python'
                 }
                 
-                await manager.broadcast(json.dumps(broadcast_data))
+                await manager.broadcast_json(broadcast_data)
                 
                 # Confirm to sender
-                await websocket.send_text(json.dumps({
+                await manager.send_json({
                     'type': 'message-protected',
                     'success': True,
                     'message': 'Message encrypted and broadcasted'
-                }))
+                }, websocket)
                 
             elif message_data.get('type') == 'force-mutation':
                 # Force security mutation
-                devil.obfuscation_map.clear()
-                devil.jargon_map.clear()
+                await devil.mutate()
                 
-                await manager.broadcast(json.dumps({
+                await manager.broadcast_json({
                     'type': 'security-mutated',
                     'message': 'Security patterns have been mutated',
                     'timestamp': time.time(),
                     'language': 'python'
-                }))
+                })
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         print("🔥 WebSocket client disconnected")
     except Exception as e:
         print(f"🔥 WebSocket error: {e}")
+    finally:
+        manager.disconnect(websocket)
 
 # 🔥 Serve static files (protected)
 app.mount("/", StaticFiles(directory="dist", html=True), name="static")
@@ -565,6 +883,10 @@ Source Code: COMPLETELY OBFUSCATED
 API Responses: ENCRYPTED JARGON
 Real-time: WEBSOCKET PROTECTED
 Language: PYTHON + FASTAPI
+JSON Backend: {devil_json.BACKEND.upper()}
+WebSocket Fan-out: {manager.max_queue} queued frames per client, {manager.slow_consumer_policy.upper()} when full
+Encryption: {devil.cipher.algorithm}, {devil.cipher.keys.max_keys} cached keys
+API Keys: {'REQUIRED' if REQUIRE_API_KEY else 'OPTIONAL'}, salted hashes
 
 ⚠️  WARNING: ALL CODE IS PROTECTED ⚠️
 Developers and cloud providers cannot
@@ -573,13 +895,14 @@ access real data or business logic.
 🔥 THE PYTHON DEVIL IS WATCHING... 🔥
     """)
     
-    # Start mutation cycle
+    # Start mutation cycle; each mutation swaps in a generation prepared in the background
+    devil.jargon.prepare()
+    
     async def mutation_cycle():
         while True:
             await asyncio.sleep(devil.config['mutation_interval'])
-            devil.obfuscation_map.clear()
-            devil.jargon_map.clear()
-            print(f"🔥 Python Devil patterns mutated at {datetime.now()}")
+            translator = await devil.mutate()
+            print(f"🔥 Python Devil patterns mutated to generation {translator.generation} at {datetime.now()}")
     
     # Run mutation cycle in background
     asyncio.create_task(mutation_cycle())
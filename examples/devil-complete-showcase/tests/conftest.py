@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def server(tmp_path_factory):
+    """server.py, imported from a directory with an empty dist (the built frontend it mounts)"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('devil'))
+    os.mkdir('dist')
+    try:
+        import server
+    finally:
+        os.chdir(cwd)
+    return server
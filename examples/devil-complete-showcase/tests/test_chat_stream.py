@@ -0,0 +1,146 @@
+"""
+🔥 /api/ai/chat/stream: SSE framing, streamed de-jargoning and client disconnects
+"""
+
+import asyncio
+import json
+import re
+
+import pytest
+
+from devil_chat import FakeProvider, Transcripts
+
+FRAME = re.compile(rb'event: ([a-z]+)\ndata: ([^\n]*)')
+
+MESSAGES = [
+    {'role': 'user', 'content': 'Check the credit score and payment status for my account'},
+    {'role': 'assistant', 'content': 'Your transaction is approved'},
+    {'role': 'user', 'content': 'Process a payment of 120 for the premium plan'},
+]
+
+
+class TrackingProvider(FakeProvider):
+    """A FakeProvider that notes whether its stream ran to the end and was closed"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.finished = False
+        self.closed = False
+
+    async def stream(self, messages):
+        try:
+            async for piece in super().stream(messages):
+                yield piece
+            self.finished = True
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def chat(server, monkeypatch):
+    """The server with a fresh transcript store"""
+    monkeypatch.setattr(server, 'transcripts', Transcripts(server.devil.cipher))
+    return server
+
+
+async def post_chat(app, body, disconnect_after_token=False):
+    """POST to the chat stream over raw ASGI; returns (status, headers, body chunks).
+
+    With disconnect_after_token the client goes away as soon as the first
+    token frame arrives, as a closed browser tab would.
+    """
+    payload = json.dumps(body).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+        'scheme': 'http', 'path': '/api/ai/chat/stream', 'raw_path': b'/api/ai/chat/stream',
+        'query_string': b'', 'root_path': '', 'client': ('testclient', 50000), 'server': ('testserver', 80),
+        'headers': [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(payload)).encode())]
+    }
+    requested = False
+    gone = asyncio.Event()
+    start, chunks = {}, []
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        await gone.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            start.update(message)
+        elif message.get('body'):
+            chunks.append(message['body'])
+            if disconnect_after_token and b'event: token' in message['body']:
+                gone.set()
+
+    await app(scope, receive, send)
+    return start['status'], dict(start['headers']), chunks
+
+
+def parse(chunks):
+    """[(event, data)] from SSE chunks, checking every frame is whole and well formed"""
+    body = b''.join(chunks)
+    assert body.endswith(b'\n\n')
+    frames = []
+    for frame in body[:-2].split(b'\n\n'):
+        match = FRAME.fullmatch(frame)
+        assert match, frame
+        frames.append((match.group(1).decode(), json.loads(match.group(2))))
+    return frames
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_stream_is_framed_and_matches_the_batch_translation(chat, monkeypatch, seed):
+    provider = FakeProvider(delay=0, max_piece=3, seed=seed)
+    monkeypatch.setattr(chat, 'chat_provider', provider)
+    body = {'user_id': 'ada', 'user_secret': 's3cret', 'conversation_id': f'c{seed}',
+            'conversation': {'messages': MESSAGES}}
+
+    status, headers, chunks = asyncio.run(post_chat(chat.app, body))
+
+    assert status == 200
+    assert headers[b'content-type'].startswith(b'text/event-stream')
+    assert headers[b'cache-control'] == b'no-cache'
+    # Each chunk is one frame, so a client never sees half an event
+    assert all(len(parse([chunk])) == 1 for chunk in chunks)
+    frames = parse(chunks)
+    kinds = [event for event, _ in frames]
+    tokens = kinds.count('token')
+    assert kinds == ['start'] + ['token'] * tokens + ['transcript'] * (len(MESSAGES) + 1) + ['done']
+    assert tokens > 1
+
+    translator = chat.devil.translator
+    assert frames[0][1] == {'conversation_id': f'c{seed}', 'jargon_generation': translator.generation}
+    jargon_messages = [{'role': m['role'], 'content': translator.text(m['content'])} for m in MESSAGES]
+    reply = provider.reply(jargon_messages)
+    streamed = ''.join(data['text'] for event, data in frames if event == 'token')
+    assert streamed == translator.reveal(reply)
+    assert streamed != reply
+
+    records = [data for event, data in frames if event == 'transcript']
+    assert [record['turn'] for record in records] == list(range(len(MESSAGES) + 1))
+    assert frames[-1][1]['turns'] == len(MESSAGES) + 1
+
+
+def test_client_disconnect_cancels_the_provider(chat, monkeypatch):
+    provider = TrackingProvider(delay=0.05, max_piece=2, seed=1)
+    monkeypatch.setattr(chat, 'chat_provider', provider)
+    body = {'user_id': 'ada', 'user_secret': 's3cret', 'conversation_id': 'gone',
+            'conversation': {'messages': MESSAGES}}
+
+    async def scenario():
+        return await asyncio.wait_for(post_chat(chat.app, body, disconnect_after_token=True), 5)
+
+    status, _, chunks = asyncio.run(scenario())
+
+    assert status == 200
+    kinds = [event for event, _ in parse(chunks)]
+    assert kinds[0] == 'start' and 'token' in kinds and 'done' not in kinds
+    assert provider.closed and not provider.finished
+    # Nothing was committed, so the conversation starts over
+    turn, new_messages = chat.transcripts.begin('s3cret', 'ada', 'gone', MESSAGES)
+    assert turn.turns == 0 and new_messages == MESSAGES
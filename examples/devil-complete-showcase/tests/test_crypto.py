@@ -0,0 +1,130 @@
+"""
+🔥 Chunked AES-256-GCM: round trips, and tampered, truncated or reordered ciphertexts
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from devil_crypto import HEADER, TAG_SIZE, DecryptionError, DevilCipher, open_sealed, seal
+
+KEY = bytes(range(32))
+CHUNK = 16
+SEALED_CHUNK = CHUNK + TAG_SIZE
+
+
+def chunks_of(sealed):
+    body = sealed[HEADER.size:]
+    return sealed[:HEADER.size], [body[i:i + SEALED_CHUNK] for i in range(0, len(body), SEALED_CHUNK)]
+
+
+@pytest.mark.parametrize('size', [0, 1, CHUNK - 1, CHUNK, CHUNK + 1, 3 * CHUNK, 3 * CHUNK + 5])
+def test_round_trip(size):
+    plaintext = os.urandom(size)
+    sealed = seal(KEY, plaintext, CHUNK)
+    assert len(sealed) == HEADER.size + max(1, -(-size // CHUNK)) * TAG_SIZE + size
+    assert open_sealed(KEY, sealed) == plaintext
+    # A fresh nonce prefix every time
+    assert seal(KEY, plaintext, CHUNK) != sealed
+
+
+def test_any_flipped_byte_is_rejected():
+    sealed = seal(KEY, os.urandom(2 * CHUNK + 3), CHUNK)
+    for position in range(len(sealed)):
+        tampered = bytearray(sealed)
+        tampered[position] ^= 0x01
+        with pytest.raises(DecryptionError):
+            open_sealed(KEY, bytes(tampered))
+
+
+def test_truncation_is_rejected():
+    sealed = seal(KEY, os.urandom(3 * CHUNK), CHUNK)
+    header, chunks = chunks_of(sealed)
+    # Whole chunks dropped from the end: the new last chunk was not sealed as final
+    for keep in (1, 2):
+        with pytest.raises(DecryptionError):
+            open_sealed(KEY, header + b''.join(chunks[:keep]))
+    for cut in (1, TAG_SIZE, SEALED_CHUNK + 5, len(sealed) - HEADER.size - 1):
+        with pytest.raises(DecryptionError):
+            open_sealed(KEY, sealed[:-cut])
+    with pytest.raises(DecryptionError):
+        open_sealed(KEY, header)
+
+
+def test_reordered_or_repeated_chunks_are_rejected():
+    sealed = seal(KEY, os.urandom(3 * CHUNK), CHUNK)
+    header, (first, second, third) = chunks_of(sealed)
+    for body in ([second, first, third], [first, first, third], [first, second, second, third],
+                 [first, third]):
+        with pytest.raises(DecryptionError):
+            open_sealed(KEY, header + b''.join(body))
+
+
+def test_chunks_cannot_be_spliced_between_ciphertexts():
+    plaintext = os.urandom(2 * CHUNK)
+    header, (first, _) = chunks_of(seal(KEY, plaintext, CHUNK))
+    _, (_, second) = chunks_of(seal(KEY, plaintext, CHUNK))
+    with pytest.raises(DecryptionError):
+        open_sealed(KEY, header + first + second)
+
+
+def test_other_keys_and_garbage_are_rejected():
+    sealed = seal(KEY, b'secret', CHUNK)
+    with pytest.raises(DecryptionError):
+        open_sealed(bytes(32), sealed)
+    with pytest.raises(DecryptionError, match='too short'):
+        open_sealed(KEY, sealed[:HEADER.size])
+    with pytest.raises(DecryptionError, match='Not a Devil'):
+        open_sealed(KEY, b'XXXX' + sealed[4:])
+
+
+@pytest.fixture(scope='module')
+def cipher():
+    cipher = DevilCipher(chunk_size=CHUNK, offload_threshold=64)
+    yield cipher
+    cipher.shutdown()
+
+
+def test_cipher_binds_the_whole_context(cipher):
+    context = {'user_id': 'ada', 'session_id': 's1', 'data_type': 'document'}
+
+    async def scenario():
+        for plaintext in (b'short', os.urandom(1000)):
+            sealed = await cipher.encrypt(plaintext, 'pw', context)
+            # Key order does not matter, every value does
+            assert await cipher.decrypt(sealed, 'pw', dict(reversed(list(context.items())))) == plaintext
+            for other in ({**context, 'session_id': 's2'}, {**context, 'user_id': 'bob'},
+                          {**context, 'extra': ''}):
+                with pytest.raises(DecryptionError):
+                    await cipher.decrypt(sealed, 'pw', other)
+            with pytest.raises(DecryptionError):
+                await cipher.decrypt(sealed, 'other-pw', context)
+        with pytest.raises(ValueError):
+            await cipher.encrypt(b'x', '', context)
+
+    asyncio.run(scenario())
+
+
+def test_master_keys_are_derived_once_per_secret_and_user():
+    cipher = DevilCipher(max_keys=2)
+    keys = cipher.keys
+
+    async def scenario():
+        # Concurrent misses share one scrypt derivation
+        derived = await asyncio.gather(*(keys.key('pw', {'user_id': 'ada', 'turn': str(n)}) for n in range(5)))
+        assert keys.misses == 1 and len(set(derived)) == 5
+        await keys.key('pw', {'user_id': 'ada'})
+        assert (keys.misses, keys.hits) == (1, 1)
+        await keys.key('pw', {'user_id': 'bob'})
+        await keys.key('pw2', {'user_id': 'ada'})
+        assert keys.misses == 3
+        # Bounded: the least recently used entry was evicted
+        await keys.key('pw', {'user_id': 'ada', 'turn': '0'})
+        assert keys.misses == 4
+        assert await keys.key('pw', {'user_id': 'ada', 'turn': '0'}) == derived[0]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        cipher.shutdown()
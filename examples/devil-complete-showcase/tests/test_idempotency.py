@@ -0,0 +1,148 @@
+"""
+🔥 Idempotency keys: replays, conflicts, joined retries and expiry
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from devil_idempotency import IdempotencyCache, IdempotencyConflict, request_fingerprint
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def counting(result='done', delay=0.0):
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        await asyncio.sleep(delay)
+        return f'{result}-{len(calls)}'
+
+    return compute, calls
+
+
+def test_retry_replays_the_stored_result():
+    async def scenario():
+        cache = IdempotencyCache()
+        compute, calls = counting()
+        assert await cache.run('k', 'fp', compute) == ('done-1', False)
+        assert await cache.run('k', 'fp', compute) == ('done-1', True)
+        assert await cache.run('other', 'fp', compute) == ('done-2', False)
+        assert len(calls) == 2 and cache.stats['replayed'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_key_reused_for_another_request_conflicts():
+    async def scenario():
+        cache = IdempotencyCache()
+        compute, calls = counting(delay=0.01)
+        first = asyncio.ensure_future(cache.run('k', 'fp', compute))
+        await asyncio.sleep(0)
+        # While the first request runs, and after it finished
+        with pytest.raises(IdempotencyConflict):
+            await cache.run('k', 'other', compute)
+        assert await first == ('done-1', False)
+        with pytest.raises(IdempotencyConflict):
+            await cache.run('k', 'other', compute)
+        assert len(calls) == 1 and cache.stats['conflicts'] == 2
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_retries_join_the_running_request():
+    async def scenario():
+        cache = IdempotencyCache()
+        compute, calls = counting(delay=0.01)
+        results = await asyncio.gather(*(cache.run('k', 'fp', compute) for _ in range(5)))
+        assert results == [('done-1', False)] + [('done-1', True)] * 4
+        assert len(calls) == 1 and cache.stats['joined'] == 4
+
+    asyncio.run(scenario())
+
+
+def test_retry_giving_up_does_not_cancel_the_request():
+    async def scenario():
+        cache = IdempotencyCache()
+        compute, calls = counting(delay=0.02)
+        first = asyncio.ensure_future(cache.run('k', 'fp', compute))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.run('k', 'fp', compute), 0.001)
+        assert await first == ('done-1', False)
+        assert await cache.run('k', 'fp', compute) == ('done-1', True)
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_not_stored():
+    async def scenario():
+        cache = IdempotencyCache()
+        attempts = []
+
+        async def flaky():
+            attempts.append(None)
+            if len(attempts) == 1:
+                raise RuntimeError('gateway down')
+            return 'paid'
+
+        with pytest.raises(RuntimeError):
+            await cache.run('k', 'fp', flaky)
+        assert await cache.run('k', 'fp', flaky) == ('paid', False)
+        assert len(attempts) == 2
+
+    asyncio.run(scenario())
+
+
+def test_results_expire_and_are_bounded():
+    async def scenario():
+        clock = Clock()
+        cache = IdempotencyCache(max_entries=3, ttl=10, clock=clock)
+        compute, calls = counting()
+        for key in 'abcd':
+            await cache.run(key, 'fp', compute)
+        # The oldest was evicted to stay within max_entries
+        assert len(cache) == 3
+        assert (await cache.run('a', 'fp', compute))[1] is False
+
+        clock.now = 10
+        assert (await cache.run('b', 'fp', compute))[1] is False
+        assert len(cache) <= 3 and cache.stats['evicted'] >= 2
+
+    asyncio.run(scenario())
+
+
+def test_fingerprints_follow_the_request_content():
+    assert request_fingerprint({'a': 1, 'b': [1, 2]}) == request_fingerprint({'a': 1, 'b': [1, 2]})
+    assert request_fingerprint({'a': 1}) != request_fingerprint({'a': 2})
+
+
+def test_payment_endpoint_replays_retries(server, monkeypatch):
+    monkeypatch.setattr(server, 'payment_idempotency', IdempotencyCache())
+    client = TestClient(server.app)
+    body = {'user_id': 'ada', 'user_secret': 's3cret',
+            'payment_data': {'card_number': '4111111111111111', 'amount': 120}}
+    headers = {'idempotency-key': 'order-1'}
+
+    first = client.post('/api/payment/process', json=body, headers=headers)
+    retry = client.post('/api/payment/process', json=body, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert 'idempotent-replayed' not in first.headers
+    assert retry.headers['idempotent-replayed'] == 'true'
+    assert retry.json() == first.json()
+
+    changed = client.post('/api/payment/process', json={**body, 'payment_data': {**body['payment_data'], 'amount': 5}},
+                          headers=headers)
+    assert changed.status_code == 422
+
+    # Without a key every request is processed
+    plain = [client.post('/api/payment/process', json=body).json()['token'] for _ in range(2)]
+    assert plain[0] != plain[1]
@@ -0,0 +1,79 @@
+"""
+🔥 Jargon translation: nested values, serialized JSON and JSON streams split anywhere
+"""
+
+import json
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import devil_json
+from devil_jargon import JargonTranslator
+
+PAYLOAD = {
+    'status': 'active',
+    'message': 'payment approved for \"premium\" plan, data secured',
+    'server_info': {
+        'algorithm': 'quantum-resistant',
+        'encryption': 'AES-256-GCM',
+        'history': [{'status': 'approved', 'amount': 120.5, 'note': 'user data processed\nok'}, None, True],
+        'unicode': 'données sécurisées ✓',
+    },
+    'empty': '',
+    'keys:with:colons': {'"quoted"': 'processor active'},
+}
+
+
+@pytest.fixture(scope='module')
+def translator():
+    return JargonTranslator()
+
+
+def test_serialized_translation_matches_the_object_walk(translator):
+    for encode in (lambda value: json.dumps(value).encode(), lambda value: json.dumps(value, indent=2).encode(),
+                   devil_json.dumps_bytes):
+        assert json.loads(translator.translate_json(encode(PAYLOAD))) == translator.translate(PAYLOAD)
+
+
+def test_stream_matches_whole_translation_at_every_split(translator):
+    payload = json.dumps(PAYLOAD, indent=1).encode()
+    whole = translator.translate_json(payload)
+    for split in range(len(payload) + 1):
+        chunks = [payload[:split], payload[split:]]
+        assert b''.join(translator.translate_json_stream(chunks)) == whole, split
+
+
+def test_stream_matches_whole_translation_for_random_chunks(translator):
+    payload = devil_json.dumps_bytes([PAYLOAD] * 20)
+    whole = translator.translate_json(payload)
+    rng = random.Random(7)
+    for _ in range(200):
+        chunks, position = [], 0
+        while position < len(payload):
+            size = rng.randint(0, 12)
+            chunks.append(payload[position:position + size])
+            position += size
+        assert b''.join(translator.translate_json_stream(chunks)) == whole
+
+
+def test_translation_is_stable_within_a_generation(translator):
+    assert translator.translate(PAYLOAD) == translator.translate(PAYLOAD)
+    assert JargonTranslator().translate(PAYLOAD) != translator.translate(PAYLOAD)
+
+
+@pytest.mark.parametrize('stream_bytes', [1024 * 1024, 0])
+def test_status_is_served_in_jargon(server, monkeypatch, stream_bytes):
+    monkeypatch.setattr(server, 'JARGON_STREAM_BYTES', stream_bytes)
+    served = []
+    respond = server.jargon_response
+    monkeypatch.setattr(server, 'jargon_response', lambda data: served.append(data) or respond(data))
+
+    response = TestClient(server.app).get('/api/status')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/json')
+    # Small bodies are translated whole, large ones streamed; either way the same jargon
+    assert ('content-length' in response.headers) == bool(stream_bytes)
+    assert response.json() == server.devil.generate_jargon_response(served[0])
+    assert 'status' not in response.json()
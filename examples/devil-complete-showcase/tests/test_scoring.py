@@ -0,0 +1,132 @@
+"""
+🔥 Credit scoring: vectorized batches against the scalar rules, and batch limits
+"""
+
+import json
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from devil_scoring import (BatchTooLarge, calculate_user_credit_score, parse_columnar, parse_ndjson,
+                           score_columns)
+
+VALUES = {
+    'income': [0, 50000, 50001, 49999.99, 1e6, -5, True, 10 ** 400, None, '60000', [1]],
+    'age': [0, 25, 26, 25.5, 90, False, None, 'old'],
+    'debt_ratio': [0, 0.29, 0.3, 0.31, 1.0, -1, None, '0.1'],
+    'employment': ['stable', 'Stable', 'stable\x00', 'unemployed', None, 3],
+    'payment_history': ['excellent', 'good', '', None, ['excellent']],
+}
+
+
+def random_records(count, seed):
+    rng = random.Random(seed)
+    records = []
+    for number in range(count):
+        user_data = {field: rng.choice(values) for field, values in VALUES.items() if rng.random() < 0.8}
+        records.append({'user_id': rng.choice([f'u{number}', number + 1, '', None]), 'user_data': user_data})
+    return records
+
+
+def scalar(record):
+    """The single endpoint's score for a record, or None where it would refuse or fail"""
+    if not record['user_id'] or not record['user_data']:
+        return None
+    try:
+        return calculate_user_credit_score(record['user_data'])
+    except TypeError:
+        return None
+
+
+def ndjson(records):
+    return b'\n'.join(json.dumps(record).encode() for record in records) + b'\n'
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_ndjson_batch_scores_match_the_scalar_rules(seed):
+    records = random_records(500, seed)
+    columns, valid = parse_ndjson(ndjson(records))
+    batch = score_columns(columns, nulls_missing=False, valid=valid)
+
+    assert len(batch) == len(records)
+    for record, score, ok in zip(records, batch.scores.tolist(), batch.valid.tolist()):
+        expected = scalar(record)
+        assert ok == (expected is not None), record
+        if ok:
+            assert score == expected, record
+
+
+def test_columnar_batch_scores_match_the_scalar_rules():
+    records = [record for record in random_records(500, 11) if record['user_id']]
+    fields = [*VALUES]
+    columns = {'user_id': [record['user_id'] for record in records]}
+    for field in fields:
+        columns[field] = [record['user_data'].get(field) for record in records]
+    batch = score_columns(parse_columnar(json.dumps(columns).encode()))
+
+    for record, score, ok in zip(records, batch.scores.tolist(), batch.valid.tolist()):
+        # A null column entry counts as an absent field
+        user_data = {field: value for field, value in record['user_data'].items() if value is not None}
+        try:
+            expected = calculate_user_credit_score(user_data)
+        except TypeError:
+            expected = None
+        assert ok == (expected is not None), record
+        if ok:
+            assert score == expected, record
+
+
+def test_ndjson_line_holding_two_records_is_rejected():
+    body = (b'{"user_id": 1, "user_data": {"income": 60000}}\n'
+            b'{"user_id": 2, "user_data": {"age": 30}},{"user_id": 3, "user_data": {"age": 40}}\n'
+            b'{"user_id": 4, "user_data": {"age": 50}}\n')
+    with pytest.raises(ValueError, match='line 2'):
+        parse_ndjson(body)
+
+
+def test_row_limits_are_checked_before_scoring():
+    body = ndjson(random_records(3, 0))
+    assert len(parse_ndjson(body, max_rows=3)[0]['user_id']) == 3
+    with pytest.raises(BatchTooLarge):
+        parse_ndjson(body, max_rows=2)
+    with pytest.raises(BatchTooLarge):
+        parse_columnar(b'{"user_id": [1, 2, 3], "income": [1, 2, 3]}', max_rows=2)
+
+
+@pytest.fixture
+def client(server):
+    return TestClient(server.app)
+
+
+HEADERS = {'x-user-id': 'ada', 'x-user-secret': 's3cret', 'content-type': 'application/x-ndjson'}
+
+
+def test_batch_endpoint_streams_every_row(client):
+    records = random_records(25, 3)
+    response = client.post('/api/user/credit-score/batch', content=ndjson(records), headers=HEADERS)
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]['rows'] == 25
+    assert lines[0]['invalid'] == sum(scalar(record) is None for record in records)
+    assert lines[-1] == {'done': True, 'batch_id': lines[0]['batch_id'], 'rows': 25}
+
+
+def test_batch_endpoint_refuses_oversized_batches(server, client, monkeypatch):
+    body = ndjson(random_records(10, 4))
+    monkeypatch.setattr(server, 'BATCH_MAX_ROWS', 5)
+    too_many = client.post('/api/user/credit-score/batch', content=body, headers=HEADERS)
+    assert too_many.status_code == 413 and 'rows' in too_many.json()['detail']
+
+    monkeypatch.setattr(server, 'BATCH_MAX_BYTES', len(body) - 1)
+    too_big = client.post('/api/user/credit-score/batch', content=body, headers=HEADERS)
+    assert too_big.status_code == 413 and 'bytes' in too_big.json()['detail']
+
+    # Sent without a Content-Length, the body is cut off at the cap
+    chunked = client.post('/api/user/credit-score/batch', content=iter([body[:100], body[100:]]), headers=HEADERS)
+    assert chunked.status_code == 413
+
+    malformed = client.post('/api/user/credit-score/batch', content=b'{"user_id": 1},{"user_id": 2}\n',
+                            headers=HEADERS)
+    assert malformed.status_code == 400
@@ -40,8 +40,17 @@ function MultiAgentDashboard() {
       EnvironmentUtils.log.info('Agent registered', data);
     });
 
-    on('task-assigned', (data: any) => {
-      setTasks(prev => [...prev, data]);
+    // One summary per task for the session; the definitions go to the assigned agents only
+    on('task-assignment', (data: any) => {
+      setTasks(prev => [
+        ...prev,
+        ...data.agentIds.map((agentId: string) => ({
+          taskId: data.taskId,
+          agentId,
+          mode: data.mode,
+          timestamp: data.timestamp
+        }))
+      ]);
       EnvironmentUtils.log.info('Task assigned', data);
     });
 
@@ -0,0 +1,46 @@
+"""
+ARGS Batch Processing
+Collects the emits and state writes of many ARGS messages handled in one pass
+"""
+
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set
+
+_current_batch: ContextVar[Optional['EmitBatch']] = ContextVar('args_batch', default=None)
+
+
+class EmitBatch:
+    """Emits, counter updates and dirty sessions gathered while a batch runs.
+
+    Used as a context manager around the handlers of one args_batch event;
+    the caller then flushes one aggregated delivery per room and writes each
+    touched session and counter to the shared store once.
+    """
+
+    def __init__(self):
+        self.rooms: Dict[str, List[Dict[str, Any]]] = {}
+        self.stats: Dict[str, int] = {}
+        self.dirty_sessions: Set[str] = set()
+        self._token = None
+
+    def __enter__(self) -> 'EmitBatch':
+        self._token = _current_batch.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current_batch.reset(self._token)
+        self._token = None
+
+    def add_emit(self, event: str, data: Any, room: str):
+        self.rooms.setdefault(room, []).append({'event': event, 'data': data})
+
+    def add_stat(self, name: str, amount: int):
+        self.stats[name] = self.stats.get(name, 0) + amount
+
+    def mark_session(self, session_id: str):
+        self.dirty_sessions.add(session_id)
+
+
+def current_batch() -> Optional[EmitBatch]:
+    """The batch being processed by the running handler, if any"""
+    return _current_batch.get()
@@ -0,0 +1,203 @@
+"""
+ARGS Dispatch Strategies
+Agent selection for sequential tasks and server-side in-flight accounting
+"""
+
+import random
+from typing import Dict, List, Optional, Set, Tuple
+
+from args_records import AgentRecord
+
+
+def agent_load(agent: AgentRecord) -> float:
+    """Fraction of an agent's task slots currently in use"""
+    return agent.current_tasks / max(agent.max_concurrent_tasks, 1)
+
+
+class DispatchStrategy:
+    """Picks one agent out of the suitable candidates for a task.
+
+    Candidates arrive in registration order and are never empty.
+    """
+
+    name = 'base'
+
+    def select(self, candidates: List[AgentRecord], task_definition: Dict) -> AgentRecord:
+        raise NotImplementedError
+
+    def forget(self, agent_id: str):
+        """Drop any per-agent state once an agent unregisters"""
+
+
+class FirstAvailableStrategy(DispatchStrategy):
+    """Original behaviour: the earliest registered suitable agent"""
+
+    name = 'first-available'
+
+    def select(self, candidates: List[AgentRecord], task_definition: Dict) -> AgentRecord:
+        return candidates[0]
+
+
+class LeastLoadedStrategy(DispatchStrategy):
+    """The agent with the lowest fraction of busy task slots"""
+
+    name = 'least-loaded'
+
+    def select(self, candidates: List[AgentRecord], task_definition: Dict) -> AgentRecord:
+        return min(candidates, key=agent_load)
+
+
+class PowerOfTwoChoicesStrategy(DispatchStrategy):
+    """The less loaded of two random agents; near least-loaded at O(1) cost"""
+
+    name = 'power-of-two'
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+
+    def select(self, candidates: List[AgentRecord], task_definition: Dict) -> AgentRecord:
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = self.rng.sample(candidates, 2)
+        return first if agent_load(first) <= agent_load(second) else second
+
+
+class WeightedRoundRobinStrategy(DispatchStrategy):
+    """Smooth weighted round robin, weighted by maxConcurrentTasks"""
+
+    name = 'weighted-round-robin'
+
+    def __init__(self):
+        self._current: Dict[str, int] = {}
+
+    def select(self, candidates: List[AgentRecord], task_definition: Dict) -> AgentRecord:
+        total = 0
+        best = None
+        for agent in candidates:
+            weight = max(agent.max_concurrent_tasks, 1)
+            total += weight
+            self._current[agent.id] = self._current.get(agent.id, 0) + weight
+            if best is None or self._current[agent.id] > self._current[best.id]:
+                best = agent
+        self._current[best.id] -= total
+        return best
+
+    def forget(self, agent_id: str):
+        self._current.pop(agent_id, None)
+
+
+class CapabilityAffinityStrategy(DispatchStrategy):
+    """Keep each task type on the agent that last ran it, for warm caches.
+
+    Falls back to the least loaded agent when the affine agent is not a
+    candidate (busy, full or gone).
+    """
+
+    name = 'capability-affinity'
+
+    def __init__(self):
+        self._affinity: Dict[str, str] = {}
+
+    def select(self, candidates: List[AgentRecord], task_definition: Dict) -> AgentRecord:
+        task_type = task_definition.get('type')
+        affine_id = self._affinity.get(task_type)
+        agent = next((candidate for candidate in candidates if candidate.id == affine_id), None)
+        if agent is None:
+            agent = min(candidates, key=agent_load)
+            self._affinity[task_type] = agent.id
+        return agent
+
+    def forget(self, agent_id: str):
+        for task_type in [t for t, a in self._affinity.items() if a == agent_id]:
+            del self._affinity[task_type]
+
+
+DISPATCH_STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (
+        FirstAvailableStrategy,
+        LeastLoadedStrategy,
+        PowerOfTwoChoicesStrategy,
+        WeightedRoundRobinStrategy,
+        CapabilityAffinityStrategy
+    )
+}
+
+
+def create_dispatch_strategy(name: str) -> DispatchStrategy:
+    if name not in DISPATCH_STRATEGIES:
+        raise ValueError(f"Unknown dispatch strategy '{name}', expected one of {sorted(DISPATCH_STRATEGIES)}")
+    return DISPATCH_STRATEGIES[name]()
+
+
+class InFlightTracker:
+    """Server-side accounting of the tasks each agent is working on.
+
+    Maintains current_tasks on the agent records so availability
+    reflects assignments, and releases each assignment exactly once.
+    """
+
+    def __init__(self):
+        self._assignments: Dict[str, Dict[str, Set[str]]] = {}
+        self._agent_tasks: Dict[str, Set[Tuple[str, str]]] = {}
+
+    def assign(self, session_id: str, task_id: str, agent: AgentRecord):
+        assigned = self._assignments.setdefault(session_id, {}).setdefault(task_id, set())
+        if agent.id in assigned:
+            return
+        assigned.add(agent.id)
+        self._agent_tasks.setdefault(agent.id, set()).add((session_id, task_id))
+        agent.current_tasks += 1
+
+    def release(self, session_id: str, task_id: str, agent: AgentRecord) -> bool:
+        """Finish an agent's assignment; False if it was not assigned"""
+        if not self._discard(session_id, task_id, agent.id):
+            return False
+        agent.current_tasks = max(agent.current_tasks - 1, 0)
+        return True
+
+    def count(self, agent_id: str) -> int:
+        """Number of assignments an agent is currently working on"""
+        return len(self._agent_tasks.get(agent_id, ()))
+
+    def forget_agent(self, agent_id: str):
+        """Drop every assignment of an agent that went away"""
+        for session_id, task_id in self._agent_tasks.pop(agent_id, set()):
+            tasks = self._assignments.get(session_id, {})
+            assigned = tasks.get(task_id)
+            if assigned is not None:
+                assigned.discard(agent_id)
+                if not assigned:
+                    del tasks[task_id]
+
+    def drop_session(self, session_id: str) -> List[Tuple[str, str]]:
+        """Drop every assignment of a session; returns the (agent id, task id) pairs dropped.
+
+        Unlike release this does not touch current_tasks: the caller holds the
+        agent records and releases each pair against them.
+        """
+        dropped = []
+        for task_id, agent_ids in self._assignments.pop(session_id, {}).items():
+            for agent_id in agent_ids:
+                agent_tasks = self._agent_tasks.get(agent_id)
+                if agent_tasks is not None:
+                    agent_tasks.discard((session_id, task_id))
+                    if not agent_tasks:
+                        del self._agent_tasks[agent_id]
+                dropped.append((agent_id, task_id))
+        return dropped
+
+    def _discard(self, session_id: str, task_id: str, agent_id: str) -> bool:
+        tasks = self._assignments.get(session_id, {})
+        assigned = tasks.get(task_id)
+        if not assigned or agent_id not in assigned:
+            return False
+        assigned.discard(agent_id)
+        if not assigned:
+            del tasks[task_id]
+        agent_tasks = self._agent_tasks.get(agent_id)
+        if agent_tasks is not None:
+            agent_tasks.discard((session_id, task_id))
+            if not agent_tasks:
+                del self._agent_tasks[agent_id]
+        return True
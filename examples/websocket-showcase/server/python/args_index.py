@@ -0,0 +1,115 @@
+"""
+ARGS Agent Index
+Inverted capability/type indexes used to match tasks to session agents
+"""
+
+from typing import Dict, Iterable, List, Set
+
+from args_records import AgentRecord
+
+
+def is_agent_available(agent: AgentRecord) -> bool:
+    """An agent can take work when it is idle and has spare task capacity"""
+    return agent.status == 'idle' and agent.current_tasks < agent.max_concurrent_tasks
+
+
+class AgentIndex:
+    """Maintained indexes over the agents of a single session.
+
+    Keeps capability -> agent ids, agent type -> agent ids and the set of
+    agents that are idle with spare capacity, so matching a task is a set
+    intersection instead of a scan over every agent in the session.
+    """
+
+    def __init__(self):
+        self._agents: Dict[str, AgentRecord] = {}
+        self._order: Dict[str, int] = {}
+        self._by_capability: Dict[str, Set[str]] = {}
+        self._by_type: Dict[str, Set[str]] = {}
+        self._available: Set[str] = set()
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._agents
+
+    def add(self, agent: AgentRecord):
+        """Index an agent, replacing any previous entry with the same id"""
+        agent_id = agent.id
+        if agent_id in self._agents:
+            self._unindex(agent_id)
+        else:
+            self._sequence += 1
+            self._order[agent_id] = self._sequence
+
+        self._agents[agent_id] = agent
+        for capability in set(agent.capabilities):
+            self._by_capability.setdefault(capability, set()).add(agent_id)
+        self._by_type.setdefault(agent.type, set()).add(agent_id)
+        if is_agent_available(agent):
+            self._available.add(agent_id)
+
+    def remove(self, agent_id: str):
+        """Drop an agent from every index"""
+        if agent_id not in self._agents:
+            return
+        self._unindex(agent_id)
+        del self._agents[agent_id]
+        del self._order[agent_id]
+
+    def refresh(self, agent_id: str):
+        """Re-evaluate availability after an agent's status or load changed"""
+        agent = self._agents.get(agent_id)
+        if agent is None:
+            return
+        if is_agent_available(agent):
+            self._available.add(agent_id)
+        else:
+            self._available.discard(agent_id)
+
+    def match(self, capabilities: Iterable[str], agent_types: Iterable[str]) -> List[AgentRecord]:
+        """Return available agents having every capability and one of the types.
+
+        Results keep registration order, matching the original scan.
+        """
+        candidates = self._available
+        if not candidates:
+            return []
+
+        agent_types = list(agent_types)
+        if agent_types:
+            typed: Set[str] = set()
+            for agent_type in agent_types:
+                typed |= self._by_type.get(agent_type, set())
+            candidates = candidates & typed
+
+        # Intersect the most selective capability first
+        capability_sets = []
+        for capability in set(capabilities):
+            agent_ids = self._by_capability.get(capability)
+            if not agent_ids:
+                return []
+            capability_sets.append(agent_ids)
+        for agent_ids in sorted(capability_sets, key=len):
+            if not candidates:
+                break
+            candidates = candidates & agent_ids
+
+        return [self._agents[agent_id] for agent_id in sorted(candidates, key=self._order.__getitem__)]
+
+    def _unindex(self, agent_id: str):
+        agent = self._agents[agent_id]
+        for capability in set(agent.capabilities):
+            agent_ids = self._by_capability.get(capability)
+            if agent_ids is not None:
+                agent_ids.discard(agent_id)
+                if not agent_ids:
+                    del self._by_capability[capability]
+        agent_ids = self._by_type.get(agent.type)
+        if agent_ids is not None:
+            agent_ids.discard(agent_id)
+            if not agent_ids:
+                del self._by_type[agent.type]
+        self._available.discard(agent_id)
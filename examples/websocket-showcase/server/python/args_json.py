@@ -0,0 +1,147 @@
+"""
+ARGS JSON
+Pluggable JSON codec for Socket.IO packets, REST responses and shared state
+"""
+
+import json
+import secrets
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from starlette.responses import JSONResponse
+
+
+class RawJSON:
+    """Already-encoded JSON, spliced verbatim into whatever contains it.
+
+    Lets a payload that many clients receive be encoded once, e.g. a
+    cached session snapshot emitted to every joining socket.
+    """
+
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+# Stands in for a RawJSON value during encoding; per process so payloads cannot forge it
+_RAW_MARK = f'__args_raw_{secrets.token_hex(8)}_'
+
+
+class JSONCodec:
+    """Encodes and decodes JSON with one backend.
+
+    A codec can stand in for the json module wherever python-socketio or
+    python-engineio expect one: dumps returns str and accepts the stdlib's
+    keyword arguments. Values a fast backend cannot handle (integers past
+    64 bits, non-string keys, NaN) fall back to the stdlib so nothing that
+    encoded before stops encoding.
+    """
+
+    name = 'stdlib'
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        if kwargs.get('indent') or kwargs.get('sort_keys') or kwargs.get('default'):
+            return json.dumps(obj, **kwargs)
+        return self.encode(obj).decode()
+
+    def loads(self, data, **kwargs) -> Any:
+        return json.loads(data, **kwargs)
+
+    def encode(self, obj: Any) -> bytes:
+        """Compact UTF-8 encoding, as sent on the wire"""
+        fragments: List[str] = []
+
+        def default(value: Any) -> str:
+            if isinstance(value, RawJSON):
+                fragments.append(value.text)
+                return f'{_RAW_MARK}{len(fragments) - 1}'
+            raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+        encoded = self._encode(obj, default)
+        for i, text in enumerate(fragments):
+            encoded = encoded.replace(f'"{_RAW_MARK}{i}"'.encode(), text.encode(), 1)
+        return encoded
+
+    def _encode(self, obj: Any, default: Callable[[Any], Any]) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=default).encode()
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__} {self.name}>'
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def _encode(self, obj: Any, default: Callable[[Any], Any]) -> bytes:
+        try:
+            return self._orjson.dumps(obj, default=default)
+        except TypeError:
+            return super()._encode(obj, default)
+
+    def loads(self, data, **kwargs) -> Any:
+        if kwargs:
+            return json.loads(data, **kwargs)
+        try:
+            return self._orjson.loads(data)
+        except ValueError:
+            # The stdlib accepts a few inputs orjson rejects, and raises the usual errors
+            return json.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+        self._msgspec = msgspec
+        self._decoder = msgspec.json.Decoder()
+
+    def _encode(self, obj: Any, default: Callable[[Any], Any]) -> bytes:
+        try:
+            return self._msgspec.json.encode(obj, enc_hook=default)
+        except (TypeError, self._msgspec.EncodeError):
+            return super()._encode(obj, default)
+
+    def loads(self, data, **kwargs) -> Any:
+        if kwargs:
+            return json.loads(data, **kwargs)
+        try:
+            return self._decoder.decode(data)
+        except self._msgspec.DecodeError:
+            return json.loads(data)
+
+
+JSON_CODECS: Dict[str, Type[JSONCodec]] = {
+    codec.name: codec
+    for codec in (OrjsonCodec, MsgspecCodec, JSONCodec)
+}
+
+
+def create_json_codec(name: Optional[str] = None) -> JSONCodec:
+    """Build the named codec, or with 'auto'/None the fastest one installed"""
+    if name and name != 'auto':
+        if name not in JSON_CODECS:
+            raise ValueError(f"Unknown JSON codec '{name}', expected one of {sorted(JSON_CODECS)}")
+        return JSON_CODECS[name]()
+
+    for codec in JSON_CODECS.values():
+        try:
+            return codec()
+        except ImportError:
+            continue
+    return JSONCodec()
+
+
+def json_response_class(codec: JSONCodec) -> Type[JSONResponse]:
+    """A FastAPI response class that renders bodies with the given codec"""
+
+    class CodecJSONResponse(JSONResponse):
+        def render(self, content: Any) -> bytes:
+            return codec.encode(content)
+
+    CodecJSONResponse.__name__ = f'{codec.name.capitalize()}JSONResponse'
+    return CodecJSONResponse
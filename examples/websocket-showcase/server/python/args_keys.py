@@ -0,0 +1,153 @@
+"""
+ARGS API Keys
+Issued keys kept as salted hashes, indexed by key prefix, verified through a bounded cache
+"""
+
+import hashlib
+import hmac
+import secrets
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from args_state import StateStore
+
+KEY_PREFIX = 'bro_py_'
+# Hex characters after the prefix that form the key id, the public part indexing the record
+KEY_ID_LENGTH = 12
+NAMESPACE = 'api_keys'
+
+
+class ApiKey:
+    """A verified key: its public id and who it was issued to"""
+
+    __slots__ = ('key_id', 'owner', 'created')
+
+    def __init__(self, key_id: str, owner: str, created: float):
+        self.key_id = key_id
+        self.owner = owner
+        self.created = created
+
+
+def key_id(api_key: str) -> Optional[str]:
+    """The id a well-formed key is indexed under, None for anything else"""
+    if not isinstance(api_key, str) or not api_key.startswith(KEY_PREFIX):
+        return None
+    if len(api_key) < len(KEY_PREFIX) + KEY_ID_LENGTH + 16:
+        return None
+    return api_key[:len(KEY_PREFIX) + KEY_ID_LENGTH]
+
+
+def hash_key(salt: bytes, api_key: str) -> str:
+    # Keys carry 128 secret random bits besides the public key id, so one salted
+    # SHA-256 resists guessing without a slow KDF
+    return hashlib.sha256(salt + api_key.encode()).hexdigest()
+
+
+def generate_api_key() -> str:
+    # The first KEY_ID_LENGTH hex characters are the public id; 32 more are secret
+    return f'{KEY_PREFIX}{secrets.token_hex((KEY_ID_LENGTH + 32) // 2)}'
+
+
+class ApiKeyStore:
+    """Issues, verifies and revokes API keys; the store only ever sees salted hashes.
+
+    Records live in the state store under NAMESPACE, keyed by key id, so
+    every worker verifies the same keys. Verification caches records by id
+    for positive_ttl seconds in an LRU of max_cached entries; ids with no
+    record are cached separately (max_negative entries, negative_ttl
+    seconds), so a flood of made-up keys neither reaches the store nor
+    evicts real records. Revocation drops the id from this worker's cache
+    at once; other workers stop accepting the key within positive_ttl.
+    """
+
+    def __init__(self, store: StateStore, max_cached: int = 100_000, max_negative: int = 10_000,
+                 positive_ttl: float = 30.0, negative_ttl: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.store = store
+        self.max_cached = max_cached
+        self.max_negative = max_negative
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        # key id -> (expires at, record, salt)
+        self._records: 'OrderedDict[str, Tuple[float, dict, bytes]]' = OrderedDict()
+        self._missing: 'OrderedDict[str, float]' = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'negative_hits': 0, 'rejected': 0}
+
+    async def issue(self, owner: str, generate: Callable[[], str] = generate_api_key) -> Tuple[str, ApiKey]:
+        """Mint a key for owner; the plain key is returned here and never stored"""
+        while True:
+            api_key = generate()
+            kid = key_id(api_key)
+            if kid is None:
+                raise ValueError(f'Generated keys must look like {KEY_PREFIX}<hex>')
+            # Ids are 48 bits; at a million keys a clash is rare but possible, so mint another
+            if await self.store.hget(NAMESPACE, kid) is None:
+                break
+        salt = secrets.token_bytes(16)
+        created = time.time()
+        await self.store.hset(NAMESPACE, kid, {
+            'salt': salt.hex(),
+            'hash': hash_key(salt, api_key),
+            'owner': owner,
+            'created': created,
+            'revoked': None
+        })
+        self._missing.pop(kid, None)
+        return api_key, ApiKey(kid, owner, created)
+
+    async def verify(self, api_key: str) -> Optional[ApiKey]:
+        """The key's owner and id if it was issued and not revoked, else None"""
+        kid = key_id(api_key)
+        if kid is None:
+            self.stats['rejected'] += 1
+            return None
+        now = self.clock()
+        cached = self._records.get(kid)
+        if cached is not None and cached[0] > now:
+            self.stats['hits'] += 1
+            self._records.move_to_end(kid)
+            record, salt = cached[1], cached[2]
+        else:
+            missing = self._missing.get(kid)
+            if missing is not None and missing > now:
+                self.stats['negative_hits'] += 1
+                return None
+            self.stats['misses'] += 1
+            record = await self.store.hget(NAMESPACE, kid)
+            if record is None:
+                self._remember_missing(kid, now)
+                return None
+            salt = bytes.fromhex(record['salt'])
+            self._remember(kid, now, record, salt)
+        if record.get('revoked') or not hmac.compare_digest(hash_key(salt, api_key), record['hash']):
+            self.stats['rejected'] += 1
+            return None
+        return ApiKey(kid, record['owner'], record['created'])
+
+    async def revoke(self, kid: str) -> bool:
+        """Revoke the key with this id; False when there is no such key"""
+        record = await self.store.hget(NAMESPACE, kid)
+        if record is None:
+            return False
+        if not record.get('revoked'):
+            await self.store.hset(NAMESPACE, kid, {**record, 'revoked': time.time()})
+        self.invalidate(kid)
+        return True
+
+    def invalidate(self, kid: str):
+        self._records.pop(kid, None)
+        self._missing.pop(kid, None)
+
+    def _remember(self, kid: str, now: float, record: dict, salt: bytes):
+        self._records[kid] = (now + self.positive_ttl, record, salt)
+        self._records.move_to_end(kid)
+        if len(self._records) > self.max_cached:
+            self._records.popitem(last=False)
+
+    def _remember_missing(self, kid: str, now: float):
+        self._missing[kid] = now + self.negative_ttl
+        self._missing.move_to_end(kid)
+        if len(self._missing) > self.max_negative:
+            self._missing.popitem(last=False)
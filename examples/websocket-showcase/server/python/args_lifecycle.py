@@ -0,0 +1,101 @@
+"""
+ARGS Session Lifecycle
+Recency tracking, idle-session eviction and task history compaction
+"""
+
+import random
+import sys
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+
+class SessionLifecycle:
+    """Bounds how many sessions, and how much history per session, stay resident.
+
+    Sessions are kept in least-recently-active order so TTL expiry and the
+    LRU cap only look at the sessions they evict. Finished tasks are kept in
+    completion order and the oldest beyond the retention limit are handed
+    back for compaction into the session metrics. The final status of
+    compacted tasks is remembered (ids only, bounded) so later tasks can
+    still depend on them.
+    """
+
+    def __init__(self, ttl: float = 3600, max_sessions: int = 10000, retained_tasks: int = 100):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.retained_tasks = retained_tasks
+        self._recency: 'OrderedDict[str, float]' = OrderedDict()
+        self._finished: Dict[str, Deque[str]] = {}
+        self._compacted: Dict[str, 'OrderedDict[str, str]'] = {}
+
+    def touch(self, session_id: str, now: float):
+        """Record activity on a session (now in epoch milliseconds)"""
+        self._recency[session_id] = now
+        self._recency.move_to_end(session_id)
+
+    def task_finished(self, session_id: str, task_id: str) -> List[str]:
+        """Note a finished task; returns older finished tasks to compact"""
+        finished = self._finished.setdefault(session_id, deque())
+        finished.append(task_id)
+        compacted = []
+        while len(finished) > self.retained_tasks:
+            compacted.append(finished.popleft())
+        return compacted
+
+    def remember_compacted(self, session_id: str, task_id: str, status: str):
+        statuses = self._compacted.setdefault(session_id, OrderedDict())
+        statuses[task_id] = status
+        while len(statuses) > self.retained_tasks * 10:
+            statuses.popitem(last=False)
+
+    def compacted_status(self, session_id: str, task_id: str) -> Optional[str]:
+        return self._compacted.get(session_id, {}).get(task_id)
+
+    def expired(self, now: float) -> List[str]:
+        """Sessions idle longer than the TTL, plus the least recent over the cap"""
+        cutoff = now - self.ttl * 1000
+        excess = len(self._recency) - self.max_sessions
+        expired = []
+        for session_id, last_activity in self._recency.items():
+            if last_activity >= cutoff and len(expired) >= excess:
+                break
+            expired.append(session_id)
+        return expired
+
+    def forget(self, session_id: str):
+        self._recency.pop(session_id, None)
+        self._finished.pop(session_id, None)
+        self._compacted.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._recency)
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Approximate resident size of a JSON-like structure or slotted record in bytes"""
+    seen = set()
+    pending = [obj]
+    size = 0
+    while pending:
+        item = pending.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            pending.extend(item)
+        elif hasattr(type(item), '__slots__'):
+            pending.extend(getattr(item, slot, None) for slot in type(item).__slots__)
+    return size
+
+
+def estimate_bytes(records: Dict[str, Any], sample_size: int = 32) -> int:
+    """Estimate the total size of a dict of records from a random sample"""
+    if not records:
+        return 0
+    keys = list(records) if len(records) <= sample_size else random.sample(list(records), sample_size)
+    sampled = sum(deep_sizeof(records[key]) for key in keys)
+    return int(sampled / len(keys) * len(records))
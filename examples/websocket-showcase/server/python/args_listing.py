@@ -0,0 +1,86 @@
+"""
+ARGS Listings
+Cursor pagination, filters and field projection over sorted state store indexes
+"""
+
+import base64
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from args_state import StateStore
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Index entries a single page may inspect for filters, as a multiple of the page size
+SCAN_FACTOR = 10
+
+
+def encode_cursor(position: Tuple[float, str]) -> str:
+    """Opaque cursor naming the last index entry a page covered"""
+    raw = json.dumps([position[0], position[1]], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+    """Position a cursor names; ValueError when it was not issued by encode_cursor"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        score, key = json.loads(raw)
+        return float(score), str(key)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated field names from a query string, None for all fields"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    return names or None
+
+
+def project(item: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return item
+    return {name: item[name] for name in fields if name in item}
+
+
+async def paginate(
+    store: StateStore,
+    index: str,
+    fetch: Callable[[List[str]], Awaitable[List[Optional[Dict[str, Any]]]]],
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    min_score: float = float('-inf'),
+    max_score: float = float('inf'),
+    predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of an index, with the cursor for the next page (None at the end).
+
+    The score range is answered by the index itself. Filters the index
+    cannot answer are applied to the fetched items, and at most
+    limit * SCAN_FACTOR entries are inspected, so a page never costs more
+    than a bounded multiple of its size. A selective filter may therefore
+    return a short page together with a cursor to continue from.
+    """
+    after = decode_cursor(cursor)
+    items: List[Dict[str, Any]] = []
+    budget = limit * SCAN_FACTOR
+    while len(items) < limit and budget > 0:
+        wanted = min(limit - len(items) if predicate is None else limit, budget)
+        entries = await store.zrange(index, after, min_score, max_score, wanted)
+        docs = await fetch([key for key, _ in entries]) if entries else []
+        consumed = 0
+        for (key, score), doc in zip(entries, docs):
+            after = (score, key)
+            consumed += 1
+            if doc is not None and (predicate is None or predicate(doc)):
+                items.append(doc)
+                if len(items) == limit:
+                    break
+        budget -= consumed
+        if len(entries) < wanted and consumed == len(entries):
+            return items, None
+    return items, encode_cursor(after) if after is not None else None
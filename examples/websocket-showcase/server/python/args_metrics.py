@@ -0,0 +1,294 @@
+"""
+ARGS Metrics
+Prometheus-compatible counters, gauges and histograms cheap enough to leave on
+"""
+
+import asyncio
+import inspect
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; handler latencies, event loop lag and the like
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Recipients of one emit
+FANOUT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Seconds a task takes from assignment to completion
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class HistogramSeries:
+    """One label combination of a histogram.
+
+    Bucket counts live in a list sized once at creation; observe() is a
+    bisect and three in-place updates, with nothing allocated per call.
+    Counts are per bucket and only made cumulative when rendered.
+    """
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class CounterSeries:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class GaugeSeries:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Metric:
+    """A named metric family; each label combination is one preallocated series.
+
+    Hot paths should resolve their series once with labels() and keep it, so
+    recording never touches the family's series dict. Counters and gauges
+    may instead be given collect, read at scrape time from state the server
+    already keeps, which costs nothing between scrapes.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._series: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._series[()] = self._new_series()
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}')
+            series = self._series[key] = self._new_series()
+        return series
+
+    def remove(self, *values: str):
+        """Drop a label combination, e.g. the series of an evicted session"""
+        self._series.pop(tuple(str(value) for value in values), None)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for suffix, labels, value in self.samples():
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_series(self):
+        return CounterSeries()
+
+    def inc(self, amount: float = 1):
+        self._series[()].inc(amount)
+
+    def samples(self):
+        if self.collect is not None:
+            yield '', '', self.collect()
+            return
+        for key, series in self._series.items():
+            yield '', _format_labels(self.labelnames, key), series.value
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _new_series(self):
+        return GaugeSeries()
+
+    def set(self, value: float):
+        self._series[()].set(value)
+
+    def samples(self):
+        if self.collect is not None:
+            yield '', '', self.collect()
+            return
+        for key, series in self._series.items():
+            yield '', _format_labels(self.labelnames, key), series.value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                 labelnames: Sequence[str] = ()):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_series(self):
+        return HistogramSeries(self.buckets)
+
+    def observe(self, value: float):
+        self._series[()].observe(value)
+
+    def samples(self):
+        for key, series in self._series.items():
+            for bound, total in series.cumulative():
+                yield '_bucket', _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"'), total
+            yield '_sum', _format_labels(self.labelnames, key), series.sum
+            yield '_count', _format_labels(self.labelnames, key), series.count
+
+
+class MetricsRegistry:
+    """The metric families one worker exposes on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = (),
+                collect: Optional[Callable[[], float]] = None) -> Counter:
+        return self.register(Counter(name, help, labelnames, collect))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (),
+              collect: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, collect))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                  labelnames: Sequence[str] = ()) -> Histogram:
+        return self.register(Histogram(name, help, buckets, labelnames))
+
+    def render(self) -> str:
+        """Text exposition format 0.0.4"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def instrument_handlers(handlers: Dict[str, Callable], histogram: Histogram, errors: Optional[Counter] = None):
+    """Time every registered Socket.IO handler into a per-event histogram series.
+
+    Call once after all handlers are registered. Each wrapper holds its own
+    series, so a call costs two perf_counter reads and one observe.
+    """
+    for event, handler in list(handlers.items()):
+        if not asyncio.iscoroutinefunction(handler):
+            continue
+        handlers[event] = _timed(handler, histogram.labels(event), errors.labels(event) if errors else None)
+
+
+def _timed(handler: Callable, series: HistogramSeries, errors: Optional[CounterSeries]) -> Callable:
+    parameters = inspect.signature(handler).parameters.values()
+    variadic = any(p.kind is inspect.Parameter.VAR_POSITIONAL for p in parameters)
+    max_args = len([p for p in parameters if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)])
+
+    @wraps(handler)
+    async def timed(*args):
+        # python-socketio retries some handlers with fewer arguments on TypeError,
+        # so a call the handler cannot take must fail here, untimed
+        if not variadic and len(args) > max_args:
+            raise TypeError(f'{handler.__name__}() takes {max_args} positional arguments but {len(args)} were given')
+        started = time.perf_counter()
+        try:
+            return await handler(*args)
+        except Exception:
+            if errors is not None:
+                errors.inc()
+            raise
+        finally:
+            series.observe(time.perf_counter() - started)
+    return timed
+
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes a task that sleeps a fixed interval.
+
+    A loop blocked by a slow handler or a large serialization shows up as
+    lag here before it shows up anywhere else.
+    """
+
+    def __init__(self, histogram: Histogram, gauge: Gauge, interval: float = 0.5):
+        self.histogram = histogram
+        self.gauge = gauge
+        self.interval = interval
+        self._runner: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._runner is None and self.interval > 0:
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.histogram.observe(lag)
+            self.gauge.set(lag)
@@ -0,0 +1,102 @@
+"""
+ARGS Progress Coalescer
+Rate-limited delivery of task progress to session rooms
+"""
+
+import asyncio
+import logging
+import math
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("brolostack-ws")
+
+TERMINAL_STATUSES = ('completed', 'error')
+
+EmitProgress = Callable[[str, Dict], Awaitable[None]]
+
+
+class ProgressCoalescer:
+    """Keeps only the latest progress per task and delivers it once per tick.
+
+    Terminal statuses bypass the tick so completion is never delayed. With
+    max_rate set, each session receives at most that many progress events
+    per second; tasks over budget keep their latest state for the next tick.
+    A flush_interval of 0 disables coalescing.
+    """
+
+    def __init__(self, emit: EmitProgress, flush_interval: float = 0.1, max_rate: float = 0):
+        self.emit = emit
+        self.flush_interval = flush_interval
+        self.max_rate = max_rate
+        self._pending: Dict[str, Dict[str, Dict]] = {}
+        self._runner: Optional[asyncio.Task] = None
+        self.received = 0
+        self.delivered = 0
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(tasks) for tasks in self._pending.values())
+
+    async def submit(self, session_id: str, progress: Dict):
+        """Accept a progress update, delivering it now or on the next tick"""
+        self.received += 1
+        task_id = progress.get('taskId')
+        if not self.flush_interval or not task_id:
+            await self._deliver(session_id, progress)
+            return
+
+        if progress.get('status') in TERMINAL_STATUSES:
+            self._discard(session_id, task_id)
+            await self._deliver(session_id, progress)
+            return
+
+        # Overwriting keeps the task's place in line for the next flush
+        self._pending.setdefault(session_id, {})[task_id] = progress
+
+    async def flush(self):
+        """Deliver the latest pending state of each task, within the rate budget"""
+        budget = math.ceil(self.max_rate * self.flush_interval) if self.max_rate else None
+
+        # Take the batch before awaiting so concurrent submits start a fresh one
+        batch = []
+        for session_id in list(self._pending):
+            tasks = self._pending[session_id]
+            for task_id in list(tasks)[:budget]:
+                batch.append((session_id, tasks.pop(task_id)))
+            if not tasks:
+                del self._pending[session_id]
+
+        for session_id, progress in batch:
+            await self._deliver(session_id, progress)
+
+    def drop_session(self, session_id: str):
+        self._pending.pop(session_id, None)
+
+    def start(self):
+        if self.flush_interval and self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Progress flush failed: {e}")
+
+    async def _deliver(self, session_id: str, progress: Dict):
+        self.delivered += 1
+        await self.emit(session_id, progress)
+
+    def _discard(self, session_id: str, task_id: str):
+        tasks = self._pending.get(session_id)
+        if tasks is not None:
+            tasks.pop(task_id, None)
+            if not tasks:
+                del self._pending[session_id]
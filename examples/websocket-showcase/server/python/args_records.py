@@ -0,0 +1,216 @@
+"""
+ARGS Records
+Slotted session, agent and task records with explicit wire serialization
+"""
+
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from args_sketch import QuantileSketch
+
+TASK_FIELDS = ('id', 'type', 'priority', 'requirements', 'payload', 'collaborationMode', 'dependencies', 'sessionId')
+AGENT_FIELDS = ('id', 'type', 'capabilities', 'status', 'metadata')
+SERVER_AGENT_FIELDS = ('socket_id', 'registered_at', 'environment')
+
+
+def _intern(value: Any) -> Any:
+    """Share one copy of short categorical strings across all records"""
+    return sys.intern(value) if isinstance(value, str) and len(value) <= 64 else value
+
+
+class Metrics:
+    """Per-session task counters and execution time percentiles"""
+
+    __slots__ = (
+        'total_tasks', 'completed_tasks', 'error_count', 'compacted_tasks', 'timed_tasks', 'avg_execution_time',
+        'execution'
+    )
+
+    def __init__(self):
+        self.total_tasks = 0
+        self.completed_tasks = 0
+        self.error_count = 0
+        self.compacted_tasks = 0
+        # Completed tasks that reported an execution time; the mean is over these alone
+        self.timed_tasks = 0
+        self.avg_execution_time = 0.0
+        self.execution = QuantileSketch()
+
+    def record_execution_time(self, execution_time: float):
+        """Fold one completed task's execution time into the running mean and the sketch"""
+        self.timed_tasks += 1
+        self.avg_execution_time += (execution_time - self.avg_execution_time) / self.timed_tasks
+        self.execution.add(execution_time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'totalTasks': self.total_tasks,
+            'completedTasks': self.completed_tasks,
+            'errorCount': self.error_count,
+            'compactedTasks': self.compacted_tasks,
+            'timedTasks': self.timed_tasks,
+            'avgExecutionTime': self.avg_execution_time,
+            **execution_percentiles(self.execution)
+        }
+
+
+def execution_percentiles(sketch: QuantileSketch) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 execution time fields of a metrics dict"""
+    return {f'{name}ExecutionTime': value for name, value in sketch.percentiles().items()}
+
+
+class AgentRecord:
+    """A registered agent; ARGSAgentInfo plus server-side fields"""
+
+    __slots__ = (
+        'id', 'type', 'capabilities', 'status', 'max_concurrent_tasks', 'current_tasks',
+        'metadata', 'socket_id', 'registered_at', 'environment', 'extra'
+    )
+
+    def __init__(self, agent_id: str, agent_type: Optional[str] = None, capabilities: Tuple[str, ...] = (),
+                 status: Optional[str] = None, max_concurrent_tasks: int = 1, current_tasks: int = 0,
+                 metadata: Optional[Dict[str, Any]] = None, socket_id: Optional[str] = None,
+                 registered_at: Optional[float] = None, environment: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.id = agent_id
+        self.type = _intern(agent_type)
+        self.capabilities = tuple(_intern(capability) for capability in capabilities)
+        self.status = _intern(status)
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self.current_tasks = current_tasks
+        self.metadata = metadata or None
+        self.socket_id = socket_id
+        self.registered_at = registered_at
+        self.environment = environment
+        self.extra = extra or None
+
+    @classmethod
+    def from_info(cls, agent_info: Dict[str, Any], socket_id: Optional[str] = None,
+                  registered_at: Optional[float] = None, environment: Optional[str] = None) -> 'AgentRecord':
+        metadata = dict(agent_info.get('metadata') or {})
+        return cls(
+            agent_info['id'],
+            agent_info.get('type'),
+            agent_info.get('capabilities') or (),
+            agent_info.get('status'),
+            max_concurrent_tasks=metadata.pop('maxConcurrentTasks', 1),
+            current_tasks=metadata.pop('currentTasks', 0),
+            metadata=metadata,
+            socket_id=socket_id,
+            registered_at=registered_at,
+            environment=environment,
+            extra={k: v for k, v in agent_info.items() if k not in AGENT_FIELDS and k not in SERVER_AGENT_FIELDS}
+        )
+
+    def to_dict(self, include_socket: bool = True) -> Dict[str, Any]:
+        """Wire view of the agent, shaped like the registered ARGSAgentInfo"""
+        agent = {
+            'id': self.id,
+            'type': self.type,
+            'capabilities': list(self.capabilities),
+            'status': self.status,
+            'metadata': {
+                **(self.metadata or {}),
+                'maxConcurrentTasks': self.max_concurrent_tasks,
+                'currentTasks': self.current_tasks
+            }
+        }
+        if self.extra:
+            agent.update(self.extra)
+        if include_socket:
+            agent['socket_id'] = self.socket_id
+        agent['registered_at'] = self.registered_at
+        agent['environment'] = self.environment
+        return agent
+
+
+class TaskRecord:
+    """A task started in a session; ARGSTaskDefinition plus execution state"""
+
+    __slots__ = (
+        'id', 'type', 'priority', 'requirements', 'payload', 'collaboration_mode', 'dependencies',
+        'session_id', 'extra', 'status', 'start_time', 'environment', 'last_progress', 'last_update'
+    )
+
+    def __init__(self, task_definition: Dict[str, Any], status: str, start_time: float,
+                 environment: Optional[str] = None):
+        self.id = task_definition['id']
+        self.type = _intern(task_definition.get('type'))
+        self.priority = _intern(task_definition.get('priority'))
+        self.requirements = task_definition.get('requirements')
+        self.payload = task_definition.get('payload')
+        self.collaboration_mode = _intern(task_definition.get('collaborationMode'))
+        self.dependencies = tuple(task_definition['dependencies']) if task_definition.get('dependencies') else None
+        self.session_id = _intern(task_definition.get('sessionId'))
+        self.extra = {k: v for k, v in task_definition.items() if k not in TASK_FIELDS} or None
+        self.status = _intern(status)
+        self.start_time = start_time
+        self.environment = environment
+        self.last_progress = None
+        self.last_update = None
+
+    def definition(self) -> Dict[str, Any]:
+        """The task definition as the client sent it"""
+        definition = {'id': self.id}
+        for key, value in (
+            ('type', self.type),
+            ('priority', self.priority),
+            ('requirements', self.requirements),
+            ('payload', self.payload),
+            ('collaborationMode', self.collaboration_mode),
+            ('dependencies', list(self.dependencies) if self.dependencies is not None else None),
+            ('sessionId', self.session_id)
+        ):
+            if value is not None:
+                definition[key] = value
+        if self.extra:
+            definition.update(self.extra)
+        return definition
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Wire view: the definition plus execution state"""
+        task = self.definition()
+        task['startTime'] = self.start_time
+        task['status'] = self.status
+        task['environment'] = self.environment
+        if self.last_progress is not None:
+            task['lastProgress'] = self.last_progress
+            task['lastUpdate'] = self.last_update
+        return task
+
+
+class Session:
+    """An ARGS collaboration session"""
+
+    __slots__ = (
+        'session_id', 'created_at', 'last_activity', 'status', 'agents', 'tasks',
+        'active_streams', 'collaboration_requests', 'metrics'
+    )
+
+    def __init__(self, session_id: str, created_at: float):
+        self.session_id = session_id
+        self.created_at = created_at
+        self.last_activity = created_at
+        self.status = 'active'
+        self.agents: Dict[str, AgentRecord] = {}
+        self.tasks: Dict[str, TaskRecord] = {}
+        self.active_streams: Dict[str, Any] = {}
+        self.collaboration_requests: Dict[str, Dict[str, Any]] = {}
+        self.metrics = Metrics()
+
+    def to_state(self) -> Dict[str, Any]:
+        """Full session-state view sent to joining clients"""
+        return {
+            'sessionId': self.session_id,
+            'createdAt': self.created_at,
+            'lastActivity': self.last_activity,
+            'status': self.status,
+            'agents': [agent.to_dict() for agent in self.agents.values()],
+            'tasks': [task.to_dict() for task in self.tasks.values()],
+            'activeStreams': self.active_streams,
+            'collaborationRequests': self.collaboration_requests,
+            'metrics': self.metrics.to_dict()
+        }
+
+    def agent_list(self) -> List[Dict[str, Any]]:
+        return [agent.to_dict() for agent in self.agents.values()]
@@ -0,0 +1,78 @@
+"""
+ARGS Agent Registry
+Reverse indexes between sockets, agents and sessions
+"""
+
+from typing import Dict, Optional, Set
+
+
+class AgentRegistry:
+    """Tracks which socket owns each agent and which sessions it joined.
+
+    Keeps sid -> {agent_ids}, agent_id -> sid and agent_id -> {session_ids}
+    so disconnect cleanup and targeted delivery never scan the whole fleet.
+    """
+
+    def __init__(self):
+        self._socket_agents: Dict[str, Set[str]] = {}
+        self._agent_socket: Dict[str, str] = {}
+        self._agent_sessions: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._agent_socket)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._agent_socket
+
+    def register(self, agent_id: str, sid: str):
+        """Bind an agent to the socket that registered it"""
+        previous_sid = self._agent_socket.get(agent_id)
+        if previous_sid is not None and previous_sid != sid:
+            self._discard_socket_agent(previous_sid, agent_id)
+        self._agent_socket[agent_id] = sid
+        self._socket_agents.setdefault(sid, set()).add(agent_id)
+        self._agent_sessions.setdefault(agent_id, set())
+
+    def join(self, agent_id: str, session_id: str):
+        """Record that an agent is a member of a session"""
+        self._agent_sessions.setdefault(agent_id, set()).add(session_id)
+
+    def leave(self, agent_id: str, session_id: str):
+        """Record that an agent left a session"""
+        session_ids = self._agent_sessions.get(agent_id)
+        if session_ids is not None:
+            session_ids.discard(session_id)
+
+    def unregister(self, agent_id: str) -> Set[str]:
+        """Forget an agent, returning the sessions it belonged to"""
+        sid = self._agent_socket.pop(agent_id, None)
+        if sid is not None:
+            self._discard_socket_agent(sid, agent_id)
+        return self._agent_sessions.pop(agent_id, set())
+
+    def release_socket(self, sid: str) -> Dict[str, Set[str]]:
+        """Forget every agent owned by a socket.
+
+        Returns agent_id -> session ids for the agents that were removed.
+        """
+        released = {}
+        for agent_id in self._socket_agents.pop(sid, set()):
+            del self._agent_socket[agent_id]
+            released[agent_id] = self._agent_sessions.pop(agent_id, set())
+        return released
+
+    def socket_for(self, agent_id: str) -> Optional[str]:
+        return self._agent_socket.get(agent_id)
+
+    def agents_for(self, sid: str) -> Set[str]:
+        return self._socket_agents.get(sid, set())
+
+    def sessions_for(self, agent_id: str) -> Set[str]:
+        return self._agent_sessions.get(agent_id, set())
+
+    def _discard_socket_agent(self, sid: str, agent_id: str):
+        agent_ids = self._socket_agents.get(sid)
+        if agent_ids is not None:
+            agent_ids.discard(agent_id)
+            if not agent_ids:
+                del self._socket_agents[sid]
@@ -0,0 +1,127 @@
+"""
+ARGS Task Scheduler
+Bounded per-session priority queue with task dependency tracking
+"""
+
+import heapq
+from typing import Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+PRIORITY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+
+def requirements_key(task_definition: Dict) -> Hashable:
+    """What agent matching looks at: required capabilities and agent types"""
+    requirements = task_definition.get('requirements') or {}
+    return (frozenset(requirements.get('capabilities') or ()), frozenset(requirements.get('agentTypes') or ()))
+
+
+class QueueFullError(Exception):
+    """Raised when a session's task queue has no room left"""
+
+
+class TaskQueue:
+    """Pending tasks of one session.
+
+    Tasks whose dependencies are all complete wait in heaps ordered by
+    priority then arrival, one heap per key (by default the task's
+    requirements, which is all agent matching looks at); the others are
+    parked until their dependencies resolve. The total number of pending
+    tasks is bounded by max_size.
+    """
+
+    def __init__(self, max_size: int = 1000, key: Callable[[Dict], Hashable] = requirements_key):
+        self.max_size = max_size
+        self.key = key
+        self._ready: Dict[Hashable, List[Tuple[int, int, str]]] = {}
+        self._ready_count = 0
+        self._tasks: Dict[str, Dict] = {}
+        self._waiting_on: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._tasks
+
+    @property
+    def ready_count(self) -> int:
+        return self._ready_count
+
+    def push(self, task_definition: Dict, unmet_dependencies: Iterable[str] = ()):
+        """Queue a task, parking it until unmet_dependencies complete"""
+        task_id = task_definition['id']
+        if task_id in self._tasks:
+            return
+        if len(self._tasks) >= self.max_size:
+            raise QueueFullError(f'Task queue is full ({self.max_size} pending tasks)')
+
+        self._tasks[task_id] = task_definition
+        unmet = set(unmet_dependencies)
+        if unmet:
+            self._waiting_on[task_id] = unmet
+            for dependency in unmet:
+                self._dependents.setdefault(dependency, set()).add(task_id)
+        else:
+            self._make_ready(task_id)
+
+    def resolve(self, dependency_id: str):
+        """Mark a dependency as complete, releasing tasks that were waiting on it"""
+        for task_id in self._dependents.pop(dependency_id, set()):
+            unmet = self._waiting_on.get(task_id)
+            if unmet is None:
+                continue
+            unmet.discard(dependency_id)
+            if not unmet:
+                del self._waiting_on[task_id]
+                self._make_ready(task_id)
+
+    def fail(self, dependency_id: str) -> List[Dict]:
+        """Drop every task that (transitively) depends on a failed task"""
+        dropped = []
+        pending = [dependency_id]
+        while pending:
+            for task_id in self._dependents.pop(pending.pop(), set()):
+                if task_id in self._waiting_on:
+                    for dependency in self._waiting_on.pop(task_id):
+                        self._dependents.get(dependency, set()).discard(task_id)
+                    dropped.append(self._tasks.pop(task_id))
+                    pending.append(task_id)
+        return dropped
+
+    def dispatch(self, try_assign: Callable[[Dict], bool]) -> List[Dict]:
+        """Offer ready tasks to try_assign in priority order.
+
+        Assigning only uses up capacity, so once a task is refused the
+        tasks behind it with the same key would be too: each key is offered
+        tasks until its first refusal, and a dispatch with no capacity free
+        costs one attempt per key rather than one per queued task. Tasks
+        that could not be assigned stay queued in their original order.
+        Returns the tasks that were assigned.
+        """
+        assigned = []
+        heads = [(ready[0], key) for key, ready in self._ready.items()]
+        heapq.heapify(heads)
+        while heads:
+            entry, key = heapq.heappop(heads)
+            task = self._tasks[entry[2]]
+            if not try_assign(task):
+                continue
+            ready = self._ready[key]
+            heapq.heappop(ready)
+            self._ready_count -= 1
+            del self._tasks[entry[2]]
+            assigned.append(task)
+            if ready:
+                heapq.heappush(heads, (ready[0], key))
+            else:
+                del self._ready[key]
+        return assigned
+
+    def _make_ready(self, task_id: str):
+        self._sequence += 1
+        task = self._tasks[task_id]
+        priority = PRIORITY_RANK.get(task.get('priority'), PRIORITY_RANK['medium'])
+        heapq.heappush(self._ready.setdefault(self.key(task), []), (priority, self._sequence, task_id))
+        self._ready_count += 1
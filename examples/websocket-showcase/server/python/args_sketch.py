@@ -0,0 +1,187 @@
+"""
+ARGS Quantile Sketches
+Mergeable streaming percentiles for task execution times
+"""
+
+import math
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_ACCURACY = 0.01
+# Buckets a sketch may hold before the lowest ones are folded together; at 1%
+# accuracy 2048 buckets span over 17 orders of magnitude
+MAX_BUCKETS = 2048
+PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch (DDSketch style) with bounded relative error.
+
+    A value v lands in bucket ceil(log_gamma(v)), so every quantile is
+    reported within `accuracy` of the true value whatever the distribution.
+    Sketches with the same accuracy merge exactly by adding bucket counts,
+    which is what lets every worker keep its own and a reader combine them.
+    """
+
+    __slots__ = ('accuracy', 'gamma', 'log_gamma', 'buckets', 'zero_count', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, accuracy: float = DEFAULT_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1):
+        if value <= 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+            if len(self.buckets) > MAX_BUCKETS:
+                self._collapse()
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'QuantileSketch'):
+        if other.accuracy != self.accuracy:
+            raise ValueError('Only sketches with the same accuracy can be merged')
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > MAX_BUCKETS:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), None for an empty sketch"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint of the bucket in relative terms, clamped to what was seen
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self) -> Dict[str, Optional[float]]:
+        return {name: self.quantile(q) for name, q in PERCENTILES}
+
+    def _collapse(self):
+        # Fold the lowest buckets into one, giving up accuracy only at the fast end
+        ordered = sorted(self.buckets)
+        excess = ordered[:len(ordered) - MAX_BUCKETS + 1]
+        folded = sum(self.buckets.pop(index) for index in excess)
+        target = ordered[len(excess)]
+        self.buckets[target] += folded
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-compatible form for the shared state store"""
+        return {
+            'accuracy': self.accuracy,
+            'buckets': {str(index): count for index, count in self.buckets.items()},
+            'zeroCount': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls(data.get('accuracy', DEFAULT_ACCURACY))
+        sketch.buckets = {int(index): count for index, count in data.get('buckets', {}).items()}
+        sketch.zero_count = data.get('zeroCount', 0)
+        sketch.count = data.get('count', 0)
+        sketch.sum = data.get('sum', 0.0)
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+    @classmethod
+    def merged(cls, sketches: Iterable['QuantileSketch'], accuracy: float = DEFAULT_ACCURACY) -> 'QuantileSketch':
+        result = cls(accuracy)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+
+class SketchSet:
+    """Execution-time sketches for one worker: overall, per agent type and per task type.
+
+    Agent and task types come from clients, so each dimension keeps at most
+    max_keys sketches and records any further types under 'other'.
+    """
+
+    DIMENSIONS = ('agentTypes', 'taskTypes')
+
+    def __init__(self, accuracy: float = DEFAULT_ACCURACY, max_keys: int = 256):
+        self.accuracy = accuracy
+        self.max_keys = max_keys
+        self.overall = QuantileSketch(accuracy)
+        self.by: Dict[str, Dict[str, QuantileSketch]] = {dimension: {} for dimension in self.DIMENSIONS}
+        self.dirty = False
+
+    def add(self, value: float, agent_type: Optional[str], task_type: Optional[str]):
+        self.overall.add(value)
+        for dimension, key in (('agentTypes', agent_type), ('taskTypes', task_type)):
+            self._sketch(dimension, key or 'unknown').add(value)
+        self.dirty = True
+
+    def _sketch(self, dimension: str, key: str) -> QuantileSketch:
+        sketches = self.by[dimension]
+        sketch = sketches.get(key)
+        if sketch is None:
+            if len(sketches) >= self.max_keys:
+                key = 'other'
+                sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = QuantileSketch(self.accuracy)
+        return sketch
+
+    def merge(self, other: 'SketchSet'):
+        self.overall.merge(other.overall)
+        for dimension in self.DIMENSIONS:
+            for key, sketch in other.by[dimension].items():
+                self._sketch(dimension, key).merge(sketch)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'overall': self.overall.to_dict(),
+            **{dimension: {key: sketch.to_dict() for key, sketch in sketches.items()}
+               for dimension, sketches in self.by.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SketchSet':
+        sketch_set = cls(data.get('overall', {}).get('accuracy', DEFAULT_ACCURACY))
+        sketch_set.overall = QuantileSketch.from_dict(data.get('overall', {}))
+        for dimension in cls.DIMENSIONS:
+            sketch_set.by[dimension] = {
+                key: QuantileSketch.from_dict(sketch) for key, sketch in data.get(dimension, {}).items()
+            }
+        return sketch_set
+
+    def report(self) -> Dict[str, Any]:
+        """Percentiles and counts for every sketch, as served by the REST API"""
+        def summary(sketch: QuantileSketch) -> Dict[str, Any]:
+            return {'count': sketch.count, **sketch.percentiles()}
+        return {
+            'overall': summary(self.overall),
+            **{dimension: {key: summary(sketch) for key, sketch in sorted(sketches.items())}
+               for dimension, sketches in self.by.items()}
+        }
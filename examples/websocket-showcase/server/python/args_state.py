@@ -0,0 +1,315 @@
+"""
+ARGS Shared State Store
+Pluggable backend for state that every server worker must agree on
+"""
+
+import json
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class StateStore:
+    """Hash and counter storage shared by all workers of the ARGS server.
+
+    Values are JSON-compatible dicts grouped into namespaces ('agents',
+    'sessions', ...). Counters are integers that any worker may increment.
+    Sorted indexes order member keys by a score, ties broken by key, so
+    listings can be paged with a (score, key) cursor.
+    """
+
+    async def hset(self, namespace: str, key: str, value: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def hget(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def hdel(self, namespace: str, key: str):
+        raise NotImplementedError
+
+    async def hgetall(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def hmget(self, namespace: str, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        raise NotImplementedError
+
+    async def hlen(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    async def transact(self, writes: List[Tuple[str, str, Optional[Dict[str, Any]]]],
+                       expect: Optional[Tuple[str, Dict[str, Optional[Dict[str, Any]]]]] = None) -> bool:
+        """Apply (namespace, key, value) writes all at once, a None value deleting the key.
+
+        With expect (namespace, {key: value or None}), the writes are made
+        only if those keys still hold exactly those values; otherwise
+        nothing is written and False is returned.
+        """
+        raise NotImplementedError
+
+    async def zadd(self, index: str, key: str, score: float):
+        raise NotImplementedError
+
+    async def zrem(self, index: str, key: str):
+        raise NotImplementedError
+
+    async def zrange(self, index: str, after: Optional[Tuple[float, str]] = None,
+                     min_score: float = float('-inf'), max_score: float = float('inf'),
+                     limit: int = 100) -> List[Tuple[str, float]]:
+        """Up to limit (key, score) pairs in order, strictly after the cursor when given"""
+        raise NotImplementedError
+
+    async def incr(self, counter: str, amount: int = 1) -> int:
+        raise NotImplementedError
+
+    async def refcount(self, namespace: str, key: str, amount: int) -> int:
+        """Adjust a reference count, dropping the key once it reaches zero"""
+        raise NotImplementedError
+
+    async def refcounts(self, namespace: str) -> Dict[str, int]:
+        raise NotImplementedError
+
+    async def counters(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemoryStateStore(StateStore):
+    """Process-local store, used for single worker deployments"""
+
+    def __init__(self):
+        self._hashes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._counters: Dict[str, int] = {}
+        self._refcounts: Dict[str, Dict[str, int]] = {}
+        self._indexes: Dict[str, Tuple[List[Tuple[float, str]], Dict[str, float]]] = {}
+
+    async def hset(self, namespace: str, key: str, value: Dict[str, Any]):
+        self._hashes.setdefault(namespace, {})[key] = value
+
+    async def hget(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        return self._hashes.get(namespace, {}).get(key)
+
+    async def hdel(self, namespace: str, key: str):
+        self._hashes.get(namespace, {}).pop(key, None)
+
+    async def hgetall(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        return dict(self._hashes.get(namespace, {}))
+
+    async def hmget(self, namespace: str, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        values = self._hashes.get(namespace, {})
+        return [values.get(key) for key in keys]
+
+    async def hlen(self, namespace: str) -> int:
+        return len(self._hashes.get(namespace, {}))
+
+    async def transact(self, writes: List[Tuple[str, str, Optional[Dict[str, Any]]]],
+                       expect: Optional[Tuple[str, Dict[str, Optional[Dict[str, Any]]]]] = None) -> bool:
+        # No await between the check and the writes, so nothing can interleave
+        if expect is not None:
+            values = self._hashes.get(expect[0], {})
+            if any(values.get(key) != value for key, value in expect[1].items()):
+                return False
+        for namespace, key, value in writes:
+            if value is None:
+                self._hashes.get(namespace, {}).pop(key, None)
+            else:
+                self._hashes.setdefault(namespace, {})[key] = value
+        return True
+
+    async def zadd(self, index: str, key: str, score: float):
+        entries, scores = self._indexes.setdefault(index, ([], {}))
+        previous = scores.get(key)
+        if previous == score:
+            return
+        if previous is not None:
+            del entries[bisect_left(entries, (previous, key))]
+        insort(entries, (score, key))
+        scores[key] = score
+
+    async def zrem(self, index: str, key: str):
+        entries, scores = self._indexes.get(index, ([], {}))
+        previous = scores.pop(key, None)
+        if previous is not None:
+            del entries[bisect_left(entries, (previous, key))]
+
+    async def zrange(self, index: str, after: Optional[Tuple[float, str]] = None,
+                     min_score: float = float('-inf'), max_score: float = float('inf'),
+                     limit: int = 100) -> List[Tuple[str, float]]:
+        entries, _ = self._indexes.get(index, ([], {}))
+        start = bisect_left(entries, (min_score, ''))
+        if after is not None:
+            start = max(start, bisect_right(entries, after))
+        page = []
+        for score, key in entries[start:start + limit]:
+            if score > max_score:
+                break
+            page.append((key, score))
+        return page
+
+    async def incr(self, counter: str, amount: int = 1) -> int:
+        self._counters[counter] = self._counters.get(counter, 0) + amount
+        return self._counters[counter]
+
+    async def refcount(self, namespace: str, key: str, amount: int) -> int:
+        counts = self._refcounts.setdefault(namespace, {})
+        count = counts.get(key, 0) + amount
+        if count > 0:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+        return count
+
+    async def refcounts(self, namespace: str) -> Dict[str, int]:
+        return dict(self._refcounts.get(namespace, {}))
+
+    async def counters(self) -> Dict[str, int]:
+        return dict(self._counters)
+
+
+class RedisStateStore(StateStore):
+    """Store backed by any client speaking the redis.asyncio API.
+
+    Works with a real Redis server or with fakeredis.aioredis for local
+    testing. Each namespace is one Redis hash, each sorted index one sorted
+    set, and all counters live in a single hash, so nearly every operation
+    is a single round trip.
+    """
+
+    def __init__(self, client, prefix: str = 'args', codec=None):
+        self.client = client
+        self.prefix = prefix
+        self.json = codec or json
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = 'args', codec=None) -> 'RedisStateStore':
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError('The redis package is required for a Redis state store: pip install redis')
+        return cls(redis.from_url(url, decode_responses=True), prefix, codec)
+
+    def _key(self, namespace: str) -> str:
+        return f'{self.prefix}:{namespace}'
+
+    async def hset(self, namespace: str, key: str, value: Dict[str, Any]):
+        await self.client.hset(self._key(namespace), key, self.json.dumps(value))
+
+    async def hget(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.hget(self._key(namespace), key)
+        return self.json.loads(raw) if raw is not None else None
+
+    async def hdel(self, namespace: str, key: str):
+        await self.client.hdel(self._key(namespace), key)
+
+    async def hgetall(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        raw = await self.client.hgetall(self._key(namespace))
+        return {_text(key): self.json.loads(value) for key, value in raw.items()}
+
+    async def hmget(self, namespace: str, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if not keys:
+            return []
+        raw = await self.client.hmget(self._key(namespace), keys)
+        return [self.json.loads(value) if value is not None else None for value in raw]
+
+    async def hlen(self, namespace: str) -> int:
+        return await self.client.hlen(self._key(namespace))
+
+    async def transact(self, writes: List[Tuple[str, str, Optional[Dict[str, Any]]]],
+                       expect: Optional[Tuple[str, Dict[str, Optional[Dict[str, Any]]]]] = None) -> bool:
+        # MULTI/EXEC, with the expected keys' hash WATCHed so a concurrent write aborts it
+        from redis.exceptions import WatchError
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    if expect is not None:
+                        namespace, expected = expect
+                        await pipe.watch(self._key(namespace))
+                        raw = await pipe.hmget(self._key(namespace), list(expected))
+                        current = [self.json.loads(value) if value is not None else None for value in raw]
+                        if current != list(expected.values()):
+                            await pipe.reset()
+                            return False
+                        pipe.multi()
+                    for namespace, key, value in writes:
+                        if value is None:
+                            pipe.hdel(self._key(namespace), key)
+                        else:
+                            pipe.hset(self._key(namespace), key, self.json.dumps(value))
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    # Something else in the watched hash changed; check the expected keys again
+                    continue
+
+    async def zadd(self, index: str, key: str, score: float):
+        await self.client.zadd(self._key(index), {key: score})
+
+    async def zrem(self, index: str, key: str):
+        await self.client.zrem(self._key(index), key)
+
+    async def zrange(self, index: str, after: Optional[Tuple[float, str]] = None,
+                     min_score: float = float('-inf'), max_score: float = float('inf'),
+                     limit: int = 100) -> List[Tuple[str, float]]:
+        # Redis orders equal scores by member bytes, the same order as the in-memory
+        # index; members tied with the cursor's score are skipped client side
+        lower = max(min_score, after[0]) if after is not None else min_score
+        page: List[Tuple[str, float]] = []
+        offset = 0
+        while len(page) < limit:
+            batch = await self.client.zrangebyscore(
+                self._key(index), lower, max_score, start=offset, num=limit, withscores=True
+            )
+            offset += len(batch)
+            for member, score in batch:
+                key = _text(member)
+                if after is None or (score, key) > after:
+                    page.append((key, score))
+            if len(batch) < limit:
+                break
+        return page[:limit]
+
+    async def incr(self, counter: str, amount: int = 1) -> int:
+        return await self.client.hincrby(self._key('counters'), counter, amount)
+
+    async def refcount(self, namespace: str, key: str, amount: int) -> int:
+        # Adjusted and dropped in one WATCHed transaction: with HINCRBY then HDEL, a
+        # count another worker raised in between would be deleted
+        from redis.exceptions import WatchError
+        name = self._key(namespace)
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(name)
+                    count = int(await pipe.hget(name, key) or 0) + amount
+                    pipe.multi()
+                    if count > 0:
+                        pipe.hset(name, key, count)
+                    else:
+                        pipe.hdel(name, key)
+                    await pipe.execute()
+                    return count
+                except WatchError:
+                    continue
+
+    async def refcounts(self, namespace: str) -> Dict[str, int]:
+        raw = await self.client.hgetall(self._key(namespace))
+        return {_text(key): int(value) for key, value in raw.items()}
+
+    async def counters(self) -> Dict[str, int]:
+        raw = await self.client.hgetall(self._key('counters'))
+        return {_text(key): int(value) for key, value in raw.items()}
+
+    async def close(self):
+        close = getattr(self.client, 'aclose', None) or self.client.close
+        await close()
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def create_state_store(redis_url: Optional[str], prefix: str = 'args', codec=None) -> StateStore:
+    """Pick the Redis store when a URL is configured, otherwise keep state in memory"""
+    if redis_url:
+        return RedisStateStore.from_url(redis_url, prefix, codec)
+    return InMemoryStateStore()
@@ -0,0 +1,343 @@
+"""
+ARGS Store Sync
+Versioned client store documents with content hashes, JSON-patch deltas and bulk transactions
+"""
+
+import copy
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+from args_state import StateStore
+
+HEADS = 'sync_heads'
+HASH_MODULUS = 2 ** 256
+_CANONICAL = json.JSONEncoder(sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+class PatchError(ValueError):
+    """A patch that is malformed, points nowhere, or whose test operation failed"""
+
+
+class SyncConflict(Exception):
+    """A store moved on from the version (or content) the client based its change on"""
+
+    def __init__(self, message: str, heads: Optional[Dict[str, Optional[Dict[str, Any]]]] = None):
+        super().__init__(message)
+        self.heads = heads or {}
+
+
+def entry_hash(key: str, value: Any) -> int:
+    """Hash of one top-level entry, over canonical JSON so every worker agrees"""
+    return int.from_bytes(hashlib.sha256(_CANONICAL.encode([key, value]).encode()).digest(), 'big')
+
+
+def document_hash(total: int) -> str:
+    # The document hash is the sum of its entry hashes, so a change re-hashes only what it touched
+    return f'{total % HASH_MODULUS:064x}'
+
+
+def _pointer(path: Any) -> List[str]:
+    if not isinstance(path, str) or (path and not path.startswith('/')):
+        raise PatchError(f'Invalid JSON pointer: {path!r}')
+    if not path:
+        return []
+    return [token.replace('~1', '/').replace('~0', '~') for token in path[1:].split('/')]
+
+
+def _escape(key: str) -> str:
+    return key.replace('~', '~0').replace('/', '~1')
+
+
+def _index(items: list, token: str, adding: bool = False) -> int:
+    if adding and token == '-':
+        return len(items)
+    if not token.isdigit() or (len(token) > 1 and token[0] == '0'):
+        raise PatchError(f'Invalid array index: {token!r}')
+    index = int(token)
+    if index > len(items) or (index == len(items) and not adding):
+        raise PatchError(f'Array index out of range: {index}')
+    return index
+
+
+def _child(container: Any, token: str) -> Any:
+    if isinstance(container, dict):
+        if token not in container:
+            raise PatchError(f'Path not found: {token!r}')
+        return container[token]
+    if isinstance(container, list):
+        return container[_index(container, token)]
+    raise PatchError(f'Cannot descend into a {type(container).__name__}')
+
+
+def _get(document: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        document = _child(document, token)
+    return document
+
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent, token = _get(document, tokens[:-1]), tokens[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, token, adding=True), value)
+    else:
+        raise PatchError(f'Cannot add to a {type(parent).__name__}')
+    return document
+
+
+def _remove(document: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise PatchError('Cannot remove the whole document')
+    parent, token = _get(document, tokens[:-1]), tokens[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise PatchError(f'Path not found: {token!r}')
+        return parent.pop(token)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, token))
+    raise PatchError(f'Cannot remove from a {type(parent).__name__}')
+
+
+def apply_patch(document: Any, ops: List[Dict[str, Any]]) -> Any:
+    """Apply RFC 6902 operations in order, modifying document in place where possible"""
+    if not isinstance(ops, list):
+        raise PatchError('A patch is a list of operations')
+    for op in ops:
+        if not isinstance(op, dict):
+            raise PatchError('Each patch operation must be an object')
+        kind, path = op.get('op'), _pointer(op.get('path'))
+        if kind in ('add', 'replace', 'test') and 'value' not in op:
+            raise PatchError(f"'{kind}' needs a value")
+        if kind == 'add':
+            document = _add(document, path, copy.deepcopy(op['value']))
+        elif kind == 'remove':
+            _remove(document, path)
+        elif kind == 'replace':
+            _get(document, path)
+            if path:
+                _remove(document, path)
+            document = _add(document, path, copy.deepcopy(op['value']))
+        elif kind == 'move':
+            source = _pointer(op.get('from'))
+            if path[:len(source)] == source and path != source:
+                raise PatchError('Cannot move a value into itself')
+            document = _add(document, path, _remove(document, source))
+        elif kind == 'copy':
+            document = _add(document, path, copy.deepcopy(_get(document, _pointer(op.get('from')))))
+        elif kind == 'test':
+            if _get(document, path) != op['value']:
+                raise PatchError(f"Test failed at {op.get('path')!r}")
+        else:
+            raise PatchError(f'Unknown patch operation: {kind!r}')
+    return document
+
+
+def diff(old: Any, new: Any, path: str = '') -> List[Dict[str, Any]]:
+    """Operations turning old into new: objects and equal-length arrays are compared
+    member by member, anything else that differs is replaced whole"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{'op': 'remove', 'path': f'{path}/{_escape(key)}'} for key in old if key not in new]
+        for key, value in new.items():
+            if key not in old:
+                ops.append({'op': 'add', 'path': f'{path}/{_escape(key)}', 'value': value})
+            else:
+                ops.extend(diff(old[key], value, f'{path}/{_escape(key)}'))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (before, after) in enumerate(zip(old, new)):
+            ops.extend(diff(before, after, f'{path}/{index}'))
+        return ops
+    if type(old) is type(new) and old == new:
+        return []
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+
+def _touched(ops: List[Dict[str, Any]]) -> Optional[Set[str]]:
+    """Top-level keys a patch reads or writes, None if it addresses the whole document"""
+    keys = set()
+    for op in ops if isinstance(ops, list) else ():
+        if not isinstance(op, dict):
+            continue
+        for field in ('path', 'from'):
+            if field in op:
+                tokens = _pointer(op[field])
+                if not tokens:
+                    return None
+                keys.add(tokens[0])
+    return keys
+
+
+class _Plan:
+    __slots__ = ('name', 'doc', 'head', 'result', 'writes')
+
+    def __init__(self, name: str, doc: str, head: Optional[Dict[str, Any]], result: Dict[str, Any],
+                 writes: List[Tuple[str, str, Optional[Dict[str, Any]]]]):
+        self.name = name
+        self.doc = doc
+        self.head = head
+        self.result = result
+        self.writes = writes
+
+
+class StoreSync:
+    """Brolostack client stores kept as versioned documents in the shared state store.
+
+    A store's document must be a JSON object. Its head (version, hash,
+    entry count) is one record in HEADS; each top-level key is its own
+    entry, with its hash kept beside it. A change is either the whole
+    document, compared entry by entry against the stored hashes, or a
+    JSON patch against a base_version, which reads only the entries it
+    touches. Either way only changed entries are written, and the version
+    moves on only when something changed. The last `history` versions'
+    operations are kept, so a client that is a few versions behind can
+    fetch a delta instead of the document.
+
+    commit applies changes to any number of stores in one state store
+    transaction, guarded by the heads it planned against: all stores
+    change or none do. Changes without a base_version are replanned when
+    another writer got in first; with one, that is a SyncConflict.
+
+    Entries are the unit of change, so stores that keep records under
+    their own keys sync per record; one large array under a single key is
+    re-hashed and rewritten whole when any element changes. Besides its
+    canonical hash, each entry keeps a fingerprint of its encoding with
+    the fast `encode`, letting a whole-document sync skip the canonical
+    hash for entries sent exactly as before.
+    """
+
+    def __init__(self, store: StateStore, history: int = 64, retries: int = 5,
+                 encode: Callable[[Any], bytes] = lambda value: _CANONICAL.encode(value).encode(),
+                 clock: Callable[[], float] = time.time):
+        self.store = store
+        self.history = history
+        self.retries = retries
+        self.encode = encode
+        self.clock = clock
+
+    def _fingerprint(self, value: Any) -> str:
+        # Equal fingerprints mean equal values; unequal ones prove nothing (key order may differ)
+        return hashlib.blake2b(self.encode(value), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _doc(owner: str, name: str) -> str:
+        # Both parts escaped, so owner 'a' with store 'b/c' is not owner 'a/b' with store 'c'
+        return f"{quote(owner, safe='')}/{quote(name, safe='')}"
+
+    async def head(self, owner: str, name: str) -> Optional[Dict[str, Any]]:
+        return await self.store.hget(HEADS, self._doc(owner, name))
+
+    async def document(self, owner: str, name: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """The head and the whole document, read at the same version"""
+        doc = self._doc(owner, name)
+        head = await self.store.hget(HEADS, doc)
+        while True:
+            entries = await self.store.hgetall(f'sync_entries:{doc}')
+            after = await self.store.hget(HEADS, doc)
+            if after == head:
+                return head, {key: entry['value'] for key, entry in entries.items()}
+            head = after
+
+    async def changes_since(self, owner: str, name: str, since: int,
+                            head: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Operations from version since up to head, None when they are no longer all kept"""
+        version = head['version']
+        if since == version:
+            return []
+        if since > version or since < version - self.history:
+            return None
+        logs = await self.store.hmget(f'sync_log:{self._doc(owner, name)}',
+                                      [str(v) for v in range(since + 1, version + 1)])
+        if any(log is None for log in logs):
+            return None
+        return [op for log in logs for op in log['ops']]
+
+    async def commit(self, owner: str, changes: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Apply {store name: change} atomically; returns each store's resulting head"""
+        for _ in range(self.retries):
+            plans = [await self._plan(owner, name, change) for name, change in changes.items()]
+            results = {plan.name: plan.result for plan in plans}
+            writes = [write for plan in plans for write in plan.writes]
+            if not writes:
+                return results
+            if await self.store.transact(writes, (HEADS, {plan.doc: plan.head for plan in plans})):
+                return results
+        raise SyncConflict('Stores kept changing during the sync, try again')
+
+    async def _plan(self, owner: str, name: str, change: Dict[str, Any]) -> _Plan:
+        doc = self._doc(owner, name)
+        entries_ns, hashes_ns, log_ns = f'sync_entries:{doc}', f'sync_hashes:{doc}', f'sync_log:{doc}'
+        head = await self.store.hget(HEADS, doc)
+        version = head['version'] if head else 0
+        base = change.get('base_version')
+        if base is not None and base != version:
+            raise SyncConflict(f"Store '{name}' is at version {version}, not {base}", {name: head})
+
+        if 'patch' in change:
+            ops = change['patch']
+            touched = _touched(ops)
+            if touched is None:
+                old = (await self.document(owner, name))[1] if head else {}
+            else:
+                keys = sorted(touched)
+                stored = await self.store.hmget(entries_ns, keys) if head else [None] * len(keys)
+                old = {key: entry['value'] for key, entry in zip(keys, stored) if entry is not None}
+            new = apply_patch(copy.deepcopy(old), ops)
+            if not isinstance(new, dict):
+                raise PatchError('A store document must stay a JSON object')
+            old_hashes = {key: entry_hash(key, value) for key, value in old.items()}
+            changed = {key: value for key, value in new.items() if old_hashes.get(key) != entry_hash(key, value)}
+            removed = [key for key in old if key not in new]
+            old_hashes = {key: old_hashes[key] for key in (*changed, *removed) if key in old_hashes}
+            log_ops = ops
+        else:
+            new = change.get('data')
+            if not isinstance(new, dict):
+                raise PatchError('Store data must be a JSON object')
+            stored_hashes = await self.store.hgetall(hashes_ns) if head else {}
+            changed = {}
+            for key, value in new.items():
+                entry = stored_hashes.get(key)
+                if entry is not None and (entry['fp'] == self._fingerprint(value)
+                                          or int(entry['hash'], 16) == entry_hash(key, value)):
+                    continue
+                changed[key] = value
+            removed = [key for key in stored_hashes if key not in new]
+            old_hashes = {key: int(stored_hashes[key]['hash'], 16)
+                          for key in (*changed, *removed) if key in stored_hashes}
+            # Old values only for what changed, to record the delta for clients catching up
+            keys = [key for key in changed if key in stored_hashes] + removed
+            stored = await self.store.hmget(entries_ns, keys)
+            old = {key: entry['value'] for key, entry in zip(keys, stored) if entry is not None}
+            log_ops = diff(old, {key: changed[key] for key in changed})
+
+        new_hashes = {key: entry_hash(key, value) for key, value in changed.items()}
+        total = int(head['hash'], 16) if head else 0
+        total += sum(new_hashes.values()) - sum(old_hashes.values())
+        digest = document_hash(total)
+        expected = change.get('hash')
+        if expected is not None and expected != digest:
+            raise SyncConflict(f"Store '{name}' would not match the expected hash", {name: head})
+        if head is not None and not changed and not removed:
+            return _Plan(name, doc, head, {**head, 'changed': False}, [])
+
+        version += 1
+        count = (head['entries'] if head else 0) + sum(key not in old_hashes for key in changed) - len(removed)
+        result = {'version': version, 'hash': digest, 'entries': count, 'updated': self.clock()}
+        writes: List[Tuple[str, str, Optional[Dict[str, Any]]]] = [(HEADS, doc, result)]
+        for key, value in changed.items():
+            writes.append((entries_ns, key, {'value': value}))
+            writes.append((hashes_ns, key, {'hash': f'{new_hashes[key]:064x}', 'fp': self._fingerprint(value)}))
+        for key in removed:
+            writes.append((entries_ns, key, None))
+            writes.append((hashes_ns, key, None))
+        writes.append((log_ns, str(version), {'ops': log_ops}))
+        if version > self.history:
+            writes.append((log_ns, str(version - self.history), None))
+        return _Plan(name, doc, head, {**result, 'changed': True}, writes)
@@ -0,0 +1,67 @@
+"""
+ARGS Session Sync
+Per-session event sequence numbers, a bounded replay buffer and a cached snapshot
+"""
+
+import secrets
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from args_json import RawJSON
+
+
+class SessionLog:
+    """Sequence-numbered history of the events delivered to one session room.
+
+    Every room event gets the next sequence number and is kept in a ring
+    buffer, so a rejoining client that reports the last sequence it saw can
+    be sent only what it missed. When the gap has already been evicted, or
+    the client's sequence belongs to another epoch (a recreated session or a
+    restarted server), it gets the snapshot instead; the snapshot is encoded
+    once and reused until the session changes.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.epoch = secrets.token_hex(4)
+        self.seq = 0
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self._snapshot: Optional[RawJSON] = None
+        self.snapshots_built = 0
+
+    def record(self, event: str, data: Any) -> int:
+        """Assign the next sequence number to a room event and remember it"""
+        self.seq += 1
+        self._events.append({'seq': self.seq, 'event': event, 'data': data})
+        self._snapshot = None
+        return self.seq
+
+    def invalidate(self):
+        """Session state changed without a room event"""
+        self._snapshot = None
+
+    def since(self, last_seq: int, epoch: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Events after last_seq, or None when they cannot be replayed"""
+        if epoch is not None and epoch != self.epoch:
+            return None
+        if last_seq < 0 or last_seq > self.seq:
+            return None
+        if last_seq == self.seq:
+            return []
+        oldest = self._events[0]['seq'] if self._events else self.seq + 1
+        if last_seq + 1 < oldest:
+            return None
+        return list(islice(self._events, last_seq + 1 - oldest, None))
+
+    def snapshot(self, build: Callable[[], Dict[str, Any]], encode: Callable[[Any], bytes]) -> RawJSON:
+        """The session state at the current sequence, encoded once"""
+        if self._snapshot is None:
+            state = build()
+            state['seq'] = self.seq
+            state['epoch'] = self.epoch
+            self._snapshot = RawJSON(encode(state).decode())
+            self.snapshots_built += 1
+        return self._snapshot
+
+    def __len__(self) -> int:
+        return len(self._events)
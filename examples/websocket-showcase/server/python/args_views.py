@@ -0,0 +1,87 @@
+"""
+ARGS REST Views
+Versioned, pre-encoded REST payloads with ETag revalidation
+"""
+
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def version_etag(*parts: Any) -> str:
+    """Weak ETag derived from a view's inputs, identical on every worker"""
+    return 'W/"%08x"' % zlib.crc32(repr(parts).encode())
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names this version"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison: W/"x" and "x" name the same version
+    wanted = etag[2:] if etag.startswith('W/') else etag
+    for tag in header.split(','):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith('W/') else tag) == wanted:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 when the client already holds this version, otherwise None"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+    return None
+
+
+def view_response(etag: str, body: bytes) -> Response:
+    return Response(body, media_type='application/json', headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+
+class CachedView:
+    """A REST payload that is rebuilt and re-encoded only when its version changes"""
+
+    def __init__(self, encode: Callable[[Any], bytes]):
+        self.encode = encode
+        self.builds = 0
+        self._version: Optional[Any] = None
+        self._etag = ''
+        self._body = b''
+
+    async def get(self, version: Any, build: Callable[[], Awaitable[Any]]) -> Tuple[str, bytes]:
+        if self.builds == 0 or version != self._version:
+            body = self.encode(await build())
+            self._version, self._etag, self._body = version, version_etag(version), body
+            self.builds += 1
+        return self._etag, self._body
+
+
+class ViewCache:
+    """CachedViews for the most recently requested variants (pages, filters) of one view"""
+
+    def __init__(self, encode: Callable[[Any], bytes], max_views: int = 128):
+        self.encode = encode
+        self.max_views = max_views
+        self._views: 'OrderedDict[Hashable, CachedView]' = OrderedDict()
+
+    def view(self, variant: Hashable) -> CachedView:
+        view = self._views.get(variant)
+        if view is None:
+            view = self._views[variant] = CachedView(self.encode)
+            if len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+        else:
+            self._views.move_to_end(variant)
+        return view
+
+    async def get(self, variant: Hashable, version: Any, build: Callable[[], Awaitable[Any]]) -> Tuple[str, bytes]:
+        return await self.view(variant).get((version, variant), build)
+
+    @property
+    def builds(self) -> int:
+        return sum(view.builds for view in self._views.values())
@@ -0,0 +1,105 @@
+"""
+Agent Matching Benchmark
+Compares the original per-agent scan with the AgentIndex set intersection
+
+Usage: python benchmarks/bench_agent_matching.py [agent_count]
+"""
+
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_index import AgentIndex  # noqa: E402
+from args_records import AgentRecord  # noqa: E402
+
+CAPABILITIES = [f'capability-{i}' for i in range(40)]
+AGENT_TYPES = ['data-processor', 'ml-inference', 'visualizer', 'coordinator', 'reviewer']
+
+
+def scan_suitable_agents(session_agents: Dict[str, Dict], task_definition: Dict) -> List[Dict]:
+    """The original linear scan from fastapi_server.find_suitable_agents"""
+    requirements = task_definition.get('requirements', {})
+    required_capabilities = requirements.get('capabilities', [])
+    required_agent_types = requirements.get('agentTypes', [])
+
+    suitable_agents = []
+    for agent_id, agent in session_agents.items():
+        if required_agent_types and agent.get('type') not in required_agent_types:
+            continue
+        agent_capabilities = agent.get('capabilities', [])
+        if not all(cap in agent_capabilities for cap in required_capabilities):
+            continue
+        if agent.get('status') == 'idle':
+            current_tasks = agent.get('metadata', {}).get('currentTasks', 0)
+            max_tasks = agent.get('metadata', {}).get('maxConcurrentTasks', 1)
+            if current_tasks < max_tasks:
+                suitable_agents.append(agent)
+    return suitable_agents
+
+
+def build_agents(count: int, rng: random.Random) -> Dict[str, Dict]:
+    agents = {}
+    for i in range(count):
+        agent_id = f'agent-{i}'
+        max_tasks = rng.randint(1, 4)
+        agents[agent_id] = {
+            'id': agent_id,
+            'type': rng.choice(AGENT_TYPES),
+            'capabilities': rng.sample(CAPABILITIES, rng.randint(3, 12)),
+            'status': 'idle' if rng.random() < 0.7 else 'busy',
+            'metadata': {'maxConcurrentTasks': max_tasks, 'currentTasks': rng.randint(0, max_tasks)}
+        }
+    return agents
+
+
+def build_tasks(count: int, rng: random.Random) -> List[Dict]:
+    return [{
+        'id': f'task-{i}',
+        'requirements': {
+            'capabilities': rng.sample(CAPABILITIES, rng.randint(1, 3)),
+            'agentTypes': rng.sample(AGENT_TYPES, rng.randint(0, 2))
+        }
+    } for i in range(count)]
+
+
+def main():
+    agent_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = random.Random(42)
+    agents = build_agents(agent_count, rng)
+    tasks = build_tasks(200, rng)
+
+    records = {agent_id: AgentRecord.from_info(agent) for agent_id, agent in agents.items()}
+    index = AgentIndex()
+    started = time.perf_counter()
+    for agent in records.values():
+        index.add(agent)
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scanned = [scan_suitable_agents(agents, task) for task in tasks]
+    scan_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    indexed = [
+        index.match(task['requirements']['capabilities'], task['requirements']['agentTypes'])
+        for task in tasks
+    ]
+    index_time = time.perf_counter() - started
+
+    indexed = [[agent.id for agent in matched] for matched in indexed]
+    scanned = [[agent['id'] for agent in matched] for matched in scanned]
+    assert scanned == indexed, 'index results differ from scan results'
+
+    print(f'agents: {agent_count}, tasks: {len(tasks)}')
+    print(f'index build:    {build_time * 1000:9.2f} ms')
+    print(f'linear scan:    {scan_time / len(tasks) * 1e6:9.1f} us/task')
+    print(f'indexed match:  {index_time / len(tasks) * 1e6:9.1f} us/task')
+    print(f'speedup:        {scan_time / index_time:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+API Key Benchmark
+Latency of ApiKeyStore.verify with a million issued keys
+
+Keys are issued into the state store, then verified one at a time and the
+p50/p99 latency reported for each path a connection can take:
+
+- warm hit: the record is in this worker's cache
+- cold: the record is fetched from the store (cache just invalidated)
+- wrong secret: a real key id with the wrong secret after it
+- unknown id: ids never issued, answered by the negative cache after the
+  first lookup
+- revoked: a key that was issued and then revoked
+
+For scale, a store without the key-id index has to compare the presented
+key against every stored hash; that scan is timed over a sample of records.
+
+Usage: python benchmarks/bench_api_keys.py [keys] [samples] [redis_url]
+"""
+
+import asyncio
+import os
+import random
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_keys import NAMESPACE, ApiKeyStore, hash_key, key_id  # noqa: E402
+from args_state import InMemoryStateStore, RedisStateStore  # noqa: E402
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return (latencies[len(latencies) // 2] * 1e6,
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6)
+
+
+async def measure(verify, api_keys, expect_valid: bool, before=None):
+    latencies = []
+    for api_key in api_keys:
+        if before:
+            before(api_key)
+        started = time.perf_counter()
+        verified = await verify(api_key)
+        latencies.append(time.perf_counter() - started)
+        if (verified is not None) != expect_valid:
+            raise AssertionError(f'{api_key} verified as {verified!r}')
+    return percentiles(latencies)
+
+
+async def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    redis_url = sys.argv[3] if len(sys.argv) > 3 else None
+    store = RedisStateStore.from_url(redis_url, prefix=f'bench_{secrets.token_hex(4)}') \
+        if redis_url else InMemoryStateStore()
+    api_keys = ApiKeyStore(store, max_cached=samples * 2, max_negative=samples * 2)
+    rng = random.Random(7)
+
+    started = time.perf_counter()
+    issued = [(await api_keys.issue(f'owner-{i % 1000}'))[0] for i in range(keys)]
+    print(f'{keys:,} keys issued into {type(store).__name__} in {time.perf_counter() - started:.1f} s')
+
+    sample = rng.sample(issued, min(samples, keys))
+    revoked = sample[:len(sample) // 10]
+    for api_key in revoked:
+        await api_keys.revoke(key_id(api_key))
+    valid = sample[len(revoked):]
+    unknown = [f'bro_py_{secrets.token_hex(16)}' for _ in range(len(valid))]
+    wrong = [api_key[:-8] + ('0' * 8 if api_key[-8:] != '0' * 8 else '1' * 8) for api_key in valid]
+
+    results = [
+        ('cold (store lookup)', await measure(api_keys.verify, valid, True,
+                                              before=lambda api_key: api_keys.invalidate(key_id(api_key)))),
+        ('warm hit', await measure(api_keys.verify, valid, True)),
+        ('wrong secret', await measure(api_keys.verify, wrong, False)),
+        ('unknown id, first', await measure(api_keys.verify, unknown, False)),
+        ('unknown id, negative', await measure(api_keys.verify, unknown, False)),
+        ('revoked', await measure(api_keys.verify, revoked, False)),
+    ]
+    print(f'{"":<24}{"p50 us":>10}{"p99 us":>10}')
+    for name, (p50, p99) in results:
+        print(f'{name:<24}{p50:>10.1f}{p99:>10.1f}')
+    print(f'stats: {api_keys.stats}')
+
+    if not redis_url:
+        # Without an index by key id, verification compares against every record
+        records = list((await store.hgetall(NAMESPACE)).values())[:100_000]
+        started = time.perf_counter()
+        matches = [record for record in records
+                   if hash_key(bytes.fromhex(record['salt']), unknown[0]) == record['hash']]
+        assert not matches
+        per_record = (time.perf_counter() - started) / len(records)
+        print(f'{"unindexed scan":<24}{per_record * keys * 1e6:>10.0f} us per key at {keys:,} keys '
+              f'(extrapolated from {len(records):,} records)')
+    await store.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
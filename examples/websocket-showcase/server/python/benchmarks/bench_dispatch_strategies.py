@@ -0,0 +1,156 @@
+"""
+Dispatch Strategy Simulation
+Discrete-event simulation of the ARGS scheduler under a skewed task mix
+
+Agents differ in speed and capacity, task types follow a Zipf distribution
+with heavy-tailed service times, and an agent that ran the same task type
+last finishes it faster (warm caches). Every strategy sees the same arrival
+stream and goes through the real AgentIndex, TaskQueue and InFlightTracker.
+
+Usage: python benchmarks/bench_dispatch_strategies.py [task_count]
+"""
+
+import heapq
+import os
+import random
+import sys
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_dispatch import DISPATCH_STRATEGIES, InFlightTracker, create_dispatch_strategy  # noqa: E402
+from args_index import AgentIndex  # noqa: E402
+from args_records import AgentRecord  # noqa: E402
+from args_scheduler import TaskQueue  # noqa: E402
+
+AGENT_COUNT = 48
+CAPABILITIES = ['nlp', 'vision', 'tabular', 'search', 'codegen', 'audio']
+TASK_TYPES = 24
+WARM_SPEEDUP = 0.6
+TARGET_UTILISATION = 0.85
+SESSION = 'sim'
+
+
+def build_agents(rng: random.Random) -> List[Dict]:
+    agents = []
+    for i in range(AGENT_COUNT):
+        agents.append({
+            'id': f'agent-{i}',
+            'type': 'worker',
+            'capabilities': rng.sample(CAPABILITIES, rng.randint(2, 5)),
+            'status': 'idle',
+            'speed': rng.choice([0.5, 1.0, 1.0, 1.5, 2.0]),
+            'metadata': {'maxConcurrentTasks': rng.choice([1, 2, 4]), 'currentTasks': 0}
+        })
+    return agents
+
+
+def build_task_types(rng: random.Random, agents: List[Dict]) -> List[Dict]:
+    task_types = []
+    while len(task_types) < TASK_TYPES:
+        capabilities = rng.sample(CAPABILITIES, rng.randint(1, 2))
+        if any(set(capabilities) <= set(agent['capabilities']) for agent in agents):
+            task_types.append({'type': f'type-{len(task_types)}', 'capabilities': capabilities})
+    return task_types
+
+
+def build_arrivals(rng: random.Random, agents: List[Dict], task_types: List[Dict], count: int) -> List[Dict]:
+    weights = [1 / (rank + 1) for rank in range(len(task_types))]
+    capacity = sum(agent['speed'] * agent['metadata']['maxConcurrentTasks'] for agent in agents)
+    mean_work = 1.0
+    arrival_rate = TARGET_UTILISATION * capacity / mean_work
+
+    now = 0.0
+    arrivals = []
+    for i in range(count):
+        now += rng.expovariate(arrival_rate)
+        task_type = rng.choices(task_types, weights)[0]
+        arrivals.append({
+            'id': f'task-{i}',
+            'type': task_type['type'],
+            'priority': 'medium',
+            'requirements': {'capabilities': task_type['capabilities'], 'agentTypes': []},
+            'collaborationMode': 'sequential',
+            'arrival': now,
+            'work': rng.lognormvariate(-0.5, 1.0)
+        })
+    return arrivals
+
+
+def simulate(strategy_name: str, agents: List[Dict], arrivals: List[Dict]) -> Dict:
+    speeds = {agent['id']: agent['speed'] for agent in agents}
+    agents = [AgentRecord.from_info(agent) for agent in agents]
+    strategy = create_dispatch_strategy(strategy_name)
+    index = AgentIndex()
+    for agent in agents:
+        index.add(agent)
+    queue = TaskQueue(max_size=len(arrivals))
+    tracker = InFlightTracker()
+    last_type: Dict[str, str] = {}
+
+    events = [(task['arrival'], 0, i, task) for i, task in enumerate(arrivals)]
+    heapq.heapify(events)
+    sequence = len(arrivals)
+    latencies = []
+    now = 0.0
+
+    while events:
+        now, kind, _, payload = heapq.heappop(events)
+        if kind == 0:
+            queue.push(payload)
+        else:
+            task, agent = payload
+            tracker.release(SESSION, task['id'], agent)
+            index.refresh(agent.id)
+            latencies.append(now - task['arrival'])
+
+        def try_assign(task: Dict) -> bool:
+            nonlocal sequence
+            requirements = task['requirements']
+            candidates = index.match(requirements['capabilities'], requirements['agentTypes'])
+            if not candidates:
+                return False
+            agent = strategy.select(candidates, task)
+            tracker.assign(SESSION, task['id'], agent)
+            index.refresh(agent.id)
+            service = task['work'] / speeds[agent.id]
+            if last_type.get(agent.id) == task['type']:
+                service *= WARM_SPEEDUP
+            last_type[agent.id] = task['type']
+            sequence += 1
+            heapq.heappush(events, (now + service, 1, sequence, (task, agent)))
+            return True
+
+        queue.dispatch(try_assign)
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(int(p * len(latencies)), len(latencies) - 1)]
+
+    return {
+        'throughput': len(latencies) / now,
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'max': latencies[-1]
+    }
+
+
+def main():
+    task_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rng = random.Random(7)
+    agents = build_agents(rng)
+    task_types = build_task_types(rng, agents)
+    arrivals = build_arrivals(rng, agents, task_types, task_count)
+
+    print(f'agents: {AGENT_COUNT}, tasks: {task_count}, offered load: {TARGET_UTILISATION:.0%}')
+    print(f'{"strategy":<22}{"tasks/s":>10}{"p50":>9}{"p95":>9}{"p99":>9}{"max":>9}')
+    for name in DISPATCH_STRATEGIES:
+        result = simulate(name, agents, arrivals)
+        print(f'{name:<22}{result["throughput"]:>10.1f}{result["p50"]:>9.2f}'
+              f'{result["p95"]:>9.2f}{result["p99"]:>9.2f}{result["max"]:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+JSON Codec Benchmark
+Encode/decode cost of the ARGS wire payloads under each installed codec
+
+Payloads: a session-state snapshot for a busy session, a single
+task-progress event and a Devil encrypted-message envelope. Each codec
+is timed through the same dumps/loads calls python-socketio makes, and
+its output is checked to decode back to the original payload.
+
+Usage: python benchmarks/bench_json_codecs.py [iterations]
+"""
+
+import base64
+import hashlib
+import json
+import os
+import random
+import secrets
+import sys
+import time
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_json import JSON_CODECS, JSONCodec  # noqa: E402
+from args_records import AgentRecord, Session, TaskRecord  # noqa: E402
+
+
+def session_state(rng: random.Random, agents: int = 50, tasks: int = 100) -> Dict:
+    session = Session('bench-session', time.time() * 1000)
+    for i in range(agents):
+        agent = AgentRecord.from_info({
+            'id': f'agent-{i}',
+            'type': rng.choice(['data-processor', 'ml-inference', 'visualizer']),
+            'capabilities': rng.sample(['nlp', 'vision', 'tabular', 'search', 'codegen'], 3),
+            'status': 'idle',
+            'metadata': {'name': f'Agent {i}', 'version': '1.0.0', 'maxConcurrentTasks': 4, 'currentTasks': 1}
+        }, socket_id=secrets.token_urlsafe(15), registered_at=time.time() * 1000, environment='production')
+        session.agents[agent.id] = agent
+    for i in range(tasks):
+        task = TaskRecord({
+            'id': f'task-{i}',
+            'type': 'data-analysis',
+            'priority': rng.choice(['low', 'medium', 'high']),
+            'requirements': {'capabilities': ['nlp'], 'agentTypes': []},
+            'payload': {'rows': [rng.random() for _ in range(8)]},
+            'collaborationMode': 'sequential',
+            'sessionId': 'bench-session'
+        }, 'started', time.time() * 1000, 'production')
+        task.last_progress = task_progress(rng, i)['progress']
+        task.last_update = time.time() * 1000
+        session.tasks[task.id] = task
+    return session.to_state()
+
+
+def task_progress(rng: random.Random, i: int = 0) -> Dict:
+    return {
+        'sessionId': 'bench-session',
+        'progress': {
+            'agentId': f'agent-{i % 50}',
+            'taskId': f'task-{i}',
+            'step': 'analysis',
+            'status': 'processing',
+            'progress': rng.randint(0, 100),
+            'message': 'Executing analysis...',
+            'timestamp': time.time() * 1000,
+            'metadata': {'executionTime': 1200, 'memoryUsage': 70, 'cpuUsage': 60, 'errorCount': 0},
+            'environment': 'production',
+            'serverTimestamp': time.time() * 1000
+        },
+        'timestamp': time.time() * 1000
+    }
+
+
+def encrypted_envelope() -> Dict:
+    encrypted = base64.b64encode(secrets.token_bytes(3072)).decode()
+    return {
+        'type': 'encrypted-message',
+        'encrypted_data': encrypted,
+        'sender_id': 'user-42',
+        'token': f'devil_{int(time.time())}_{secrets.token_hex(8)}',
+        'security_fingerprint': hashlib.sha256(encrypted.encode()).hexdigest()[:16],
+        'devil_protected': True,
+        'language': 'python'
+    }
+
+
+def timed(fn: Callable[[], object], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    rng = random.Random(5)
+    payloads = {
+        'session-state': session_state(rng),
+        'task-progress': task_progress(rng),
+        'encrypted-envelope': encrypted_envelope()
+    }
+
+    codecs = {}
+    for name, codec in JSON_CODECS.items():
+        try:
+            codecs[name] = codec()
+        except ImportError:
+            print(f'{name}: not installed, skipped')
+
+    baseline: Dict[str, float] = {}
+    print(f'{"payload":<20}{"codec":<10}{"bytes":>8}{"dumps us":>11}{"loads us":>11}{"vs stdlib":>11}')
+    for payload_name, payload in payloads.items():
+        # Stdlib first so every other codec is reported relative to it
+        for name in sorted(codecs, key=lambda n: n != JSONCodec.name):
+            codec = codecs[name]
+            encoded = codec.dumps(payload, separators=(',', ':'))
+            assert json.loads(encoded) == payload, f'{name} changed the {payload_name} payload'
+            dumps_time = timed(lambda: codec.dumps(payload, separators=(',', ':')), iterations)
+            loads_time = timed(lambda: codec.loads(encoded), iterations)
+            total = dumps_time + loads_time
+            baseline.setdefault(payload_name, total)
+            print(f'{payload_name:<20}{name:<10}{len(encoded.encode()):>8}{dumps_time * 1e6:>11.1f}'
+                  f'{loads_time * 1e6:>11.1f}{baseline[payload_name] / total:>10.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Listing Benchmark
+Cost of one /api/ws/agents response, full directory vs one cursor page
+
+The full directory is what the endpoint returned before pagination: every
+stored agent view, decoded and encoded into one body. A page reads one
+range of the sorted index and multi-gets only the agents on it, so its
+cost should stay flat as the directory grows.
+
+Usage: python benchmarks/bench_listing.py [page_size]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_json import create_json_codec  # noqa: E402
+from args_listing import paginate  # noqa: E402
+from args_state import InMemoryStateStore  # noqa: E402
+
+
+async def populate(store: InMemoryStateStore, agents: int, rng: random.Random):
+    for i in range(agents):
+        agent = {
+            'id': f'agent-{i}',
+            'type': rng.choice(['data-processor', 'ml-inference', 'visualizer']),
+            'capabilities': rng.sample(['nlp', 'vision', 'tabular', 'search', 'codegen'], 3),
+            'status': 'idle',
+            'metadata': {'name': f'Agent {i}', 'maxConcurrentTasks': 4, 'currentTasks': 0},
+            'online': True
+        }
+        await store.hset('agents', agent['id'], agent)
+        await store.zadd('agent_index', agent['id'], 1_700_000_000_000 + i)
+
+
+async def timed(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return (time.perf_counter() - started) / iterations
+
+
+async def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    codec = create_json_codec()
+    rng = random.Random(13)
+
+    print(f'{"agents":>9}{"full ms":>10}{"full KB":>10}{"page ms":>10}{"page KB":>10}')
+    for agents in (1_000, 10_000, 100_000):
+        store = InMemoryStateStore()
+        await populate(store, agents, rng)
+
+        async def full():
+            return codec.encode({'agents': list((await store.hgetall('agents')).values())})
+
+        async def page():
+            items, cursor = await paginate(store, 'agent_index', lambda ids: store.hmget('agents', ids), page_size)
+            return codec.encode({'agents': items, 'nextCursor': cursor})
+
+        iterations = max(3, 100_000 // agents)
+        full_time = await timed(full, iterations)
+        page_time = await timed(page, iterations * 10)
+        print(f'{agents:>9}{full_time * 1e3:>10.2f}{len(await full()) / 1024:>10.0f}'
+              f'{page_time * 1e3:>10.3f}{len(await page()) / 1024:>10.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
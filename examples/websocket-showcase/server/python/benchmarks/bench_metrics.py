@@ -0,0 +1,73 @@
+"""
+Metrics Benchmark
+Per-call cost of recording ARGS metrics on the hot path
+
+Compares a bare handler call with the same call through the timing wrapper
+instrument_handlers installs, and times a single histogram observe. Also
+reports how long a /metrics scrape takes with every series populated.
+
+Usage: python benchmarks/bench_metrics.py [iterations]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_metrics import (  # noqa: E402
+    DURATION_BUCKETS, FANOUT_BUCKETS, MetricsRegistry, instrument_handlers
+)
+
+
+async def handler(sid, data):
+    return None
+
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(3)
+    registry = MetricsRegistry()
+    latency = registry.histogram('args_event_handler_seconds', 'handler latency', labelnames=('event',))
+    errors = registry.counter('args_event_handler_errors_total', 'handler errors', labelnames=('event',))
+    fanout = registry.histogram('args_emit_fanout', 'fan-out', FANOUT_BUCKETS)
+    durations = registry.histogram('args_task_duration_seconds', 'durations', DURATION_BUCKETS, labelnames=('session',))
+
+    handlers = {'agent_progress': handler}
+    instrument_handlers(handlers, latency, errors)
+    timed = handlers['agent_progress']
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await handler('sid', None)
+    bare = (time.perf_counter() - started) / iterations
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await timed('sid', None)
+    wrapped = (time.perf_counter() - started) / iterations
+
+    values = [rng.randint(1, 300) for _ in range(1024)]
+    started = time.perf_counter()
+    for i in range(iterations):
+        fanout.observe(values[i & 1023])
+    observe = (time.perf_counter() - started) / iterations
+
+    for session in range(1000):
+        series = durations.labels(f'session-{session}')
+        for _ in range(20):
+            series.observe(rng.expovariate(0.2))
+    started = time.perf_counter()
+    body = registry.render()
+    scrape = time.perf_counter() - started
+
+    print(f'handler call, bare:          {bare * 1e9:8.0f} ns')
+    print(f'handler call, instrumented:  {wrapped * 1e9:8.0f} ns  (+{(wrapped - bare) * 1e9:.0f} ns)')
+    print(f'histogram observe:           {observe * 1e9:8.0f} ns')
+    print(f'scrape, 1000 session series: {scrape * 1e3:8.1f} ms  ({len(body) / 1024:.0f} KB)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""
+Quantile Sketch Benchmark
+Accuracy, merge cost and size of the execution time sketches
+
+Execution times are drawn from a heavy-tailed (log-normal) distribution
+and split across simulated workers. Each worker sketches its share, the
+sketches go through the store's JSON form and are merged, and the merged
+p50/p95/p99 are compared with the exact percentiles of all values.
+
+Usage: python benchmarks/bench_quantile_sketch.py [values] [workers]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_sketch import PERCENTILES, QuantileSketch  # noqa: E402
+
+
+def exact(sorted_values, q: float) -> float:
+    return sorted_values[int(q * (len(sorted_values) - 1))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rng = random.Random(16)
+    values = [rng.lognormvariate(5.5, 1.2) for _ in range(count)]
+
+    sketches = [QuantileSketch() for _ in range(workers)]
+    started = time.perf_counter()
+    for i, value in enumerate(values):
+        sketches[i % workers].add(value)
+    add_time = (time.perf_counter() - started) / count
+
+    encoded = [json.dumps(sketch.to_dict()) for sketch in sketches]
+    started = time.perf_counter()
+    merged = QuantileSketch.merged(QuantileSketch.from_dict(json.loads(data)) for data in encoded)
+    merge_time = time.perf_counter() - started
+
+    ordered = sorted(values)
+    print(f'{count:,} values over {workers} workers, {len(merged.buckets)} buckets, '
+          f'{sum(map(len, encoded)) // workers:,} bytes per worker sketch')
+    print(f'add: {add_time * 1e9:.0f} ns/value, decode + merge: {merge_time * 1e3:.2f} ms')
+    print(f'{"":<6}{"exact ms":>12}{"sketch ms":>12}{"rel err":>10}')
+    for name, q in PERCENTILES:
+        truth, estimate = exact(ordered, q), merged.quantile(q)
+        print(f'{name:<6}{truth:>12.2f}{estimate:>12.2f}{abs(estimate - truth) / truth:>10.2%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Record Memory Benchmark
+Compares the resident size of session tasks held as dicts and as TaskRecords
+
+Each task arrives as its own JSON message, as it would over Socket.IO, so
+every decoded definition carries fresh copies of its keys and categorical
+values. Sizes are measured with tracemalloc after the decoded messages are
+released, keeping only what the session retains.
+
+Usage: python benchmarks/bench_record_memory.py [task_count]
+"""
+
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_records import TaskRecord  # noqa: E402
+
+TASK_TYPES = ['data-analysis', 'summarize', 'classify', 'translate', 'embed']
+PRIORITIES = ['low', 'medium', 'high', 'critical']
+CAPABILITIES = ['nlp', 'vision', 'tabular', 'search', 'codegen']
+STATUSES = ['processing', 'completed', 'error']
+
+
+def build_messages(count: int, rng: random.Random) -> List[str]:
+    """Encoded start_task and agent_progress messages for each task"""
+    messages = []
+    for i in range(count):
+        task = {
+            'id': f'task-{i}',
+            'type': rng.choice(TASK_TYPES),
+            'priority': rng.choice(PRIORITIES),
+            'requirements': {'capabilities': rng.sample(CAPABILITIES, 2), 'agentTypes': []},
+            'payload': {'input': f'record-{i}'},
+            'collaborationMode': 'sequential',
+            'sessionId': 'bench-session'
+        }
+        progress = {
+            'agentId': f'agent-{i % 50}',
+            'taskId': task['id'],
+            'sessionId': 'bench-session',
+            'status': rng.choice(STATUSES),
+            'progress': rng.randint(0, 100)
+        }
+        messages.append((json.dumps(task), json.dumps(progress)))
+    return messages
+
+
+def as_dict(task_definition: Dict, progress: Dict) -> Dict:
+    """The dict representation fastapi_server kept before TaskRecord"""
+    task = {
+        **task_definition,
+        'startTime': time.time() * 1000,
+        'status': 'queued',
+        'environment': 'development'
+    }
+    task.update({'lastProgress': progress, 'lastUpdate': time.time() * 1000})
+    task['status'] = progress['status']
+    return task
+
+
+def as_record(task_definition: Dict, progress: Dict) -> TaskRecord:
+    task = TaskRecord(task_definition, 'queued', time.time() * 1000, 'development')
+    task.last_progress = progress
+    task.last_update = time.time() * 1000
+    task.status = progress['status']
+    return task
+
+
+def measure(messages: List, build: Callable[[Dict, Dict], object]) -> Dict:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    tasks = {}
+    for task_message, progress_message in messages:
+        task_definition = json.loads(task_message)
+        tasks[task_definition['id']] = build(task_definition, json.loads(progress_message))
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'tasks': tasks, 'bytes': current, 'seconds': elapsed}
+
+
+def main():
+    task_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    messages = build_messages(task_count, random.Random(11))
+
+    dicts = measure(messages, as_dict)
+    records = measure(messages, as_record)
+
+    # The wire view must not change
+    for task_id in random.Random(3).sample(list(dicts['tasks']), 100):
+        expected = dict(dicts['tasks'][task_id], startTime=0, lastUpdate=0)
+        actual = dict(records['tasks'][task_id].to_dict(), startTime=0, lastUpdate=0)
+        assert actual == expected, f'{task_id} serializes differently'
+
+    print(f'tasks: {task_count}')
+    print(f'{"representation":<16}{"MiB":>9}{"bytes/task":>12}{"build ms":>10}')
+    for name, result in (('dict', dicts), ('TaskRecord', records)):
+        print(f'{name:<16}{result["bytes"] / 2**20:>9.1f}{result["bytes"] / task_count:>12.0f}'
+              f'{result["seconds"] * 1000:>10.1f}')
+    print(f'saved:          {1 - records["bytes"] / dicts["bytes"]:>9.1%}')
+
+
+if __name__ == '__main__':
+    main()
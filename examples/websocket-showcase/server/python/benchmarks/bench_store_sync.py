@@ -0,0 +1,110 @@
+"""
+Store Sync Benchmark
+Cost of one FastAPIAdapter sync as the store grows, against rewriting the whole store
+
+The store is normalized client state: one top-level key per record, the
+shape in which StoreSync writes and hashes per record. For each size:
+
+- whole rewrite: what a sync amounted to without versioning, encoding
+  the entire document into one record on every sync
+- full data, 1 changed: the adapter's syncStore body (every record sent),
+  compared against the stored hashes, one record written
+- patch, 1 changed: a one-operation JSON patch against base_version
+- restore, whole: the document read back in full
+- restore, since: a client one version behind reads the patch instead
+- revalidate: what a conditional GET costs before answering 304
+
+Usage: python benchmarks/bench_store_sync.py [sizes,...] [iterations] [redis_url]
+"""
+
+import asyncio
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_json import create_json_codec  # noqa: E402
+from args_state import InMemoryStateStore, RedisStateStore  # noqa: E402
+from args_stores import StoreSync  # noqa: E402
+
+
+def record(i: int, revision: int = 0):
+    return {'id': i, 'title': f'Task {i} revision {revision}', 'done': bool(i % 3),
+            'tags': ['work', 'urgent'] if i % 5 == 0 else ['home'], 'priority': i % 4}
+
+
+async def timed(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return (time.perf_counter() - started) / iterations
+
+
+async def measure(store, size: int, iterations: int):
+    codec = create_json_codec()
+    sync = StoreSync(store, encode=codec.encode)
+    owner = f'bench-{secrets.token_hex(4)}'
+    document = {f'task:{i}': record(i) for i in range(size)}
+    await sync.commit(owner, {'todos': {'data': document}})
+    revision = 0
+
+    async def whole_rewrite():
+        await store.hset('bench_whole', owner, {'data': codec.encode(document).decode()})
+
+    async def full_one_changed():
+        nonlocal revision
+        revision += 1
+        document['task:0'] = record(0, revision)
+        await sync.commit(owner, {'todos': {'data': document}})
+
+    async def patch_one_changed():
+        nonlocal revision
+        revision += 1
+        head = await sync.head(owner, 'todos')
+        await sync.commit(owner, {'todos': {
+            'patch': [{'op': 'replace', 'path': '/task:1/title', 'value': f'Task 1 revision {revision}'}],
+            'base_version': head['version']
+        }})
+
+    async def restore_whole():
+        codec.encode((await sync.document(owner, 'todos'))[1])
+
+    async def restore_since():
+        head = await sync.head(owner, 'todos')
+        codec.encode(await sync.changes_since(owner, 'todos', head['version'] - 1, head))
+
+    async def revalidate():
+        await sync.head(owner, 'todos')
+
+    return [
+        ('whole rewrite', await timed(whole_rewrite, iterations)),
+        ('full data, 1 changed', await timed(full_one_changed, iterations)),
+        ('patch, 1 changed', await timed(patch_one_changed, iterations)),
+        ('restore, whole', await timed(restore_whole, iterations)),
+        ('restore, since', await timed(restore_since, iterations)),
+        ('revalidate (304)', await timed(revalidate, iterations)),
+    ]
+
+
+async def main():
+    sizes = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else [1_000, 10_000, 100_000]
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    redis_url = sys.argv[3] if len(sys.argv) > 3 else None
+    store = RedisStateStore.from_url(redis_url, prefix=f'bench_{secrets.token_hex(4)}') \
+        if redis_url else InMemoryStateStore()
+
+    rows = {}
+    for size in sizes:
+        for name, seconds in await measure(store, size, iterations):
+            rows.setdefault(name, []).append(seconds)
+    print(f'{type(store).__name__}, ms per sync')
+    print(f'{"records":<24}' + ''.join(f'{size:>12,}' for size in sizes))
+    for name, timings in rows.items():
+        print(f'{name:<24}' + ''.join(f'{seconds * 1e3:>12.3f}' for seconds in timings))
+    await store.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""
+Task Fan-out Benchmark
+Bytes on the wire and emit latency of a parallel task assignment
+
+A session of N agents, each connected on its own socket, plus a few
+observer sockets. The room fan-out sends one task-assigned event per agent
+to the whole room, each carrying the task definition. The targeted
+delivery sends each agent its own task-assigned and the room one
+task-assignment summary. Both run through a real python-socketio
+AsyncServer; only the Engine.IO transport is replaced by a byte counter.
+
+Usage: python benchmarks/bench_task_fanout.py [agents ...]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List
+
+import socketio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from args_json import RawJSON, create_json_codec  # noqa: E402
+
+OBSERVERS = 5
+SESSION = 'bench-session'
+
+
+class CountingTransport:
+    """Stands in for the Engine.IO transport, counting the packets it would send"""
+
+    def __init__(self):
+        self.packets = 0
+        self.bytes = 0
+
+    async def send_packet(self, eio_sid, pkt):
+        self.packets += 1
+        self.bytes += len(pkt.encode())
+
+
+def task_definition(agents: int) -> Dict:
+    return {
+        'id': 'task-1',
+        'type': 'data-analysis',
+        'priority': 'high',
+        'requirements': {'capabilities': ['nlp', 'tabular'], 'agentTypes': ['data-processor']},
+        'payload': {'rows': [[i, i * 0.5, f'row-{i}'] for i in range(40)], 'instructions': 'x' * 512},
+        'collaborationMode': 'parallel',
+        'sessionId': SESSION,
+        'agents': agents
+    }
+
+
+async def room_fanout(sio: socketio.AsyncServer, task: Dict, agent_sids: Dict[str, str]):
+    for agent_id in agent_sids:
+        await sio.emit('task-assigned', {
+            'taskId': task['id'],
+            'agentId': agent_id,
+            'mode': 'parallel',
+            'taskDefinition': task,
+            'timestamp': time.time() * 1000
+        }, room=SESSION)
+
+
+async def targeted(sio: socketio.AsyncServer, task: Dict, agent_sids: Dict[str, str], codec):
+    definition = RawJSON(codec.dumps(task))
+    for agent_id, sid in agent_sids.items():
+        await sio.emit('task-assigned', {
+            'sessionId': SESSION,
+            'taskId': task['id'],
+            'agentId': agent_id,
+            'mode': 'parallel',
+            'taskDefinition': definition,
+            'timestamp': time.time() * 1000
+        }, room=sid)
+    await sio.emit('task-assignment', {
+        'sessionId': SESSION,
+        'taskId': task['id'],
+        'mode': 'parallel',
+        'agentIds': list(agent_sids),
+        'timestamp': time.time() * 1000
+    }, room=SESSION)
+
+
+async def run(agents: int, codec) -> List[tuple]:
+    sio = socketio.AsyncServer(async_mode='asgi', json=codec)
+    transport = CountingTransport()
+    sio.eio.send_packet = transport.send_packet
+
+    agent_sids = {}
+    for i in range(agents + OBSERVERS):
+        sid = await sio.manager.connect(f'eio-{i}', '/')
+        await sio.enter_room(sid, SESSION)
+        if i < agents:
+            agent_sids[f'agent-{i}'] = sid
+
+    task = task_definition(agents)
+    results = []
+    for name, deliver in (('room fan-out', lambda: room_fanout(sio, task, agent_sids)),
+                          ('targeted', lambda: targeted(sio, task, agent_sids, codec))):
+        transport.packets = transport.bytes = 0
+        started = time.perf_counter()
+        await deliver()
+        elapsed = time.perf_counter() - started
+        results.append((name, transport.packets, transport.bytes, elapsed))
+    return results
+
+
+async def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 50, 200]
+    codec = create_json_codec()
+    print(f'codec: {codec.name}, observers: {OBSERVERS}')
+    print(f'{"agents":>7}  {"delivery":<14}{"packets":>9}{"bytes":>14}{"emit ms":>10}')
+    for agents in sizes:
+        for name, packets, sent, elapsed in await run(agents, codec):
+            print(f'{agents:>7}  {name:<14}{packets:>9}{sent:>14,}{elapsed * 1e3:>10.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -3,17 +3,39 @@ Brolostack WebSocket FastAPI Server Example
 Demonstrates multi-agent WebSocket integration with FastAPI
 """
 
+import hmac
 import os
+import socket
 import socketio
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import asyncio
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple
 from datetime import datetime
 import logging
 
+from args_batch import EmitBatch, current_batch
+from args_dispatch import InFlightTracker, create_dispatch_strategy
+from args_index import AgentIndex, is_agent_available
+from args_json import RawJSON, create_json_codec, json_response_class
+from args_keys import ApiKeyStore
+from args_lifecycle import SessionLifecycle, estimate_bytes
+from args_listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, parse_fields, project
+from args_metrics import (
+    CONTENT_TYPE, DURATION_BUCKETS, FANOUT_BUCKETS, EventLoopLagMonitor, MetricsRegistry, instrument_handlers
+)
+from args_progress import ProgressCoalescer
+from args_records import AgentRecord, Session, TaskRecord, execution_percentiles
+from args_registry import AgentRegistry
+from args_scheduler import QueueFullError, TaskQueue
+from args_sketch import QuantileSketch, SketchSet
+from args_state import create_state_store
+from args_stores import PatchError, StoreSync, SyncConflict
+from args_sync import SessionLog
+from args_views import ViewCache, not_modified, version_etag, view_response
+
 # Configure logging based on environment
 environment = os.getenv('ENVIRONMENT', 'development')
 logging.basicConfig(
@@ -22,12 +44,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger("brolostack-ws")
 
+# JSON codec for Socket.IO packets, REST responses and shared state:
+# orjson or msgspec when installed, otherwise the standard library
+json_codec = create_json_codec(os.getenv('ARGS_JSON_CODEC', 'auto'))
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Brolostack WebSocket Server",
     description="Multi-agent WebSocket server with ARGS protocol",
     version="1.0.0",
-    debug=environment == "development"
+    debug=environment == "development",
+    default_response_class=json_response_class(json_codec)
 )
 
 # Environment-aware CORS configuration
@@ -45,8 +72,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Shared state backend: with REDIS_URL set, every worker and host shares
+# session/agent state and room emits fan out through Redis pub/sub
+redis_url = os.getenv('REDIS_URL')
+worker_id = f"{socket.gethostname()}:{os.getpid()}"
+state_store = create_state_store(redis_url, codec=json_codec)
+
+# API keys: salted hashes in the shared state store, verified through a per-worker
+# cache; a revoked key stops working on other workers within the cache TTL (seconds)
+api_keys = ApiKeyStore(
+    state_store,
+    max_cached=int(os.getenv('ARGS_API_KEY_CACHE_SIZE', 100_000)),
+    positive_ttl=float(os.getenv('ARGS_API_KEY_CACHE_TTL', 30))
+)
+admin_token = os.getenv('ARGS_ADMIN_TOKEN')
+
+# Brolostack store sync (FastAPIAdapter): versioned documents in the shared store,
+# with the last ARGS_SYNC_HISTORY versions' patches kept for delta restores
+store_sync = StoreSync(state_store, history=int(os.getenv('ARGS_SYNC_HISTORY', 64)), encode=json_codec.encode)
+
 # Initialize Socket.IO with environment-aware settings
 sio = socketio.AsyncServer(
+    client_manager=socketio.AsyncRedisManager(redis_url) if redis_url else None,
+    json=json_codec,
     cors_allowed_origins=cors_origins,
     async_mode='asgi',
     ping_timeout=30,
@@ -60,10 +108,48 @@ sio = socketio.AsyncServer(
 socket_app = socketio.ASGIApp(sio, app)
 
 # Session and agent management
-active_sessions: Dict[str, Dict] = {}
-registered_agents: Dict[str, Dict] = {}
-task_queue: Dict[str, List[Dict]] = {}
+active_sessions: Dict[str, Session] = {}
+registered_agents: Dict[str, AgentRecord] = {}
+task_queue: Dict[str, TaskQueue] = {}
 collaboration_requests: Dict[str, Dict] = {}
+session_indexes: Dict[str, AgentIndex] = {}
+session_logs: Dict[str, SessionLog] = {}
+agent_registry = AgentRegistry()
+
+# Agent selection for sequential tasks and server-side load accounting
+dispatch_strategy = create_dispatch_strategy(os.getenv('ARGS_DISPATCH_STRATEGY', 'least-loaded'))
+in_flight = InFlightTracker()
+
+# Progress fan-out: latest state per task every flush interval (seconds, 0 disables),
+# optionally capped at a number of progress events per second per session
+progress_coalescer = ProgressCoalescer(
+    lambda session_id, progress: emit_task_progress(session_id, progress),
+    flush_interval=float(os.getenv('ARGS_PROGRESS_FLUSH_INTERVAL', 0.1)),
+    max_rate=float(os.getenv('ARGS_PROGRESS_MAX_RATE', 0))
+)
+
+# Pending tasks each session may hold before start_task applies backpressure
+max_queued_tasks = int(os.getenv('ARGS_MAX_QUEUED_TASKS', 1000))
+
+# Session bounds: idle TTL (seconds), LRU cap on session count and how much
+# finished task / collaboration history each session keeps resident
+session_lifecycle = SessionLifecycle(
+    ttl=float(os.getenv('ARGS_SESSION_TTL', 3600)),
+    max_sessions=int(os.getenv('ARGS_MAX_SESSIONS', 10000)),
+    retained_tasks=int(os.getenv('ARGS_RETAINED_TASKS', 100))
+)
+retained_collaborations = int(os.getenv('ARGS_RETAINED_COLLABORATIONS', 100))
+reaper_interval = float(os.getenv('ARGS_REAPER_INTERVAL', 30))
+
+# Upper bound on messages per args_batch event
+max_batch_size = int(os.getenv('ARGS_MAX_BATCH_SIZE', 1000))
+
+# Room events each session keeps for clients resuming with join_session lastSeq
+event_buffer_size = int(os.getenv('ARGS_EVENT_BUFFER', 256))
+# Seqs come from this worker's SessionLog, so lastSeq resume only holds for a single
+# worker: behind the Redis manager a room also receives the other workers' events,
+# and rejoining clients get the session-state snapshot instead
+sequence_events = redis_url is None
 
 # Performance metrics
 server_stats = {
@@ -71,14 +157,326 @@ server_stats = {
     'connections': 0,
     'messages_processed': 0,
     'tasks_completed': 0,
-    'errors': 0
+    'errors': 0,
+    'sessions_evicted': 0,
+    # Aggregates maintained on the mutation paths so REST views never walk sessions
+    'active_sessions': 0,
+    'registered_agents': 0,
+    'task_queue_size': 0,
+    'collaboration_requests': 0,
+    'agents_version': 0,
+    'sketches_version': 0
 }
 
+# Pre-encoded /api/ws/agents pages, rebuilt only when agents_version moves
+agents_views = ViewCache(json_codec.encode)
+
+def local_rooms() -> Dict[Any, Any]:
+    return sio.manager.rooms.get('/', {})
+
+def active_room_count() -> int:
+    # Every socket also sits in its own room and in the namespace-wide None room
+    rooms = local_rooms()
+    return max(len(rooms) - len(rooms.get(None, ())) - 1, 0) if rooms else 0
+
+# Execution time percentiles per agent type and task type; each worker publishes
+# its sketches every interval and readers merge them into global percentiles
+execution_sketches = SketchSet()
+sketch_publish_interval = float(os.getenv('ARGS_SKETCH_PUBLISH_INTERVAL', 5))
+
+async def publish_sketches():
+    if not execution_sketches.dirty:
+        return
+    execution_sketches.dirty = False
+    await state_store.hset('execution_sketches', worker_id, execution_sketches.to_dict())
+    await record_stat('sketches_version')
+
+async def global_execution_report() -> Dict:
+    merged = SketchSet()
+    for data in (await state_store.hgetall('execution_sketches')).values():
+        merged.merge(SketchSet.from_dict(data))
+    return merged.report()
+
+# Prometheus metrics for this worker, served on /metrics. Gauges are read at
+# scrape time from state the server already keeps; histograms record into
+# preallocated buckets, so everything stays on in production
+metrics_registry = MetricsRegistry()
+event_latency = metrics_registry.histogram(
+    'args_event_handler_seconds', 'Socket.IO event handler latency', labelnames=('event',))
+event_errors = metrics_registry.counter(
+    'args_event_handler_errors_total', 'Socket.IO event handlers that raised', labelnames=('event',))
+emit_fanout = metrics_registry.histogram(
+    'args_emit_fanout', 'Sockets on this worker each room emit was addressed to', FANOUT_BUCKETS)
+task_duration = metrics_registry.histogram(
+    'args_task_duration_seconds', 'Time from assignment to completion of each task, per active session',
+    DURATION_BUCKETS, labelnames=('session',))
+loop_lag_monitor = EventLoopLagMonitor(
+    metrics_registry.histogram('args_event_loop_lag_seconds', 'How late the event loop ran a scheduled wakeup'),
+    metrics_registry.gauge('args_event_loop_lag_last_seconds', 'Most recent event loop lag sample'),
+    interval=float(os.getenv('ARGS_LOOP_LAG_INTERVAL', 0.5))
+)
+for stat, description in (('messages_processed', 'ARGS messages handled'),
+                          ('tasks_completed', 'Tasks completed'),
+                          ('errors', 'Errors reported to clients'),
+                          ('sessions_evicted', 'Sessions evicted for idleness or the session cap')):
+    metrics_registry.counter(f'args_{stat}_total', f'{description} by this worker',
+                             collect=lambda stat=stat: server_stats[stat])
+metrics_registry.gauge('args_connected_sockets', 'Sockets connected to this worker',
+                       collect=lambda: len(local_rooms().get(None, ())))
+metrics_registry.gauge('args_active_rooms', 'Session rooms with members on this worker', collect=active_room_count)
+metrics_registry.gauge('args_active_sessions', 'Sessions held by this worker', collect=lambda: len(active_sessions))
+metrics_registry.gauge('args_registered_agents', 'Agents registered on this worker',
+                       collect=lambda: len(registered_agents))
+metrics_registry.gauge('args_task_queue_depth', 'Tasks waiting for an agent on this worker',
+                       collect=lambda: sum(len(queue) for queue in task_queue.values()))
+metrics_registry.gauge('args_tasks_in_flight', 'Assignments agents on this worker are working on',
+                       collect=lambda: sum(agent.current_tasks for agent in registered_agents.values()))
+metrics_registry.gauge('args_pending_progress', 'Progress updates waiting for the next coalesced flush',
+                       collect=lambda: progress_coalescer.pending_count)
+metrics_registry.gauge('args_buffered_events', 'Room events kept for resuming clients',
+                       collect=lambda: sum(len(log) for log in session_logs.values()))
+
+async def record_stat(name: str, amount: int = 1):
+    """Update a counter for this worker and in the shared store"""
+    if not amount:
+        return
+    server_stats[name] += amount
+    batch = current_batch()
+    if batch is not None:
+        batch.add_stat(name, amount)
+    else:
+        await state_store.incr(name, amount)
+
+def session_summary(session: Session) -> Dict:
+    """Compact view of a session as reported by the REST API"""
+    return {
+        'sessionId': session.session_id,
+        'status': session.status,
+        'agentCount': len(session.agents),
+        'taskCount': len(session.tasks),
+        'activeStreams': len(session.active_streams),
+        'collaborationRequests': len(session.collaboration_requests),
+        'queuedTasks': len(task_queue.get(session.session_id, ())),
+        'createdAt': session.created_at,
+        'lastActivity': session.last_activity,
+        'metrics': session.metrics.to_dict(),
+        # Merged with the other workers' sketches into the session's percentiles
+        'executionSketch': session.metrics.execution.to_dict()
+    }
+
+async def publish_session(session_id: str):
+    """Publish this worker's view of a session to the shared store"""
+    batch = current_batch()
+    if batch is not None:
+        batch.mark_session(session_id)
+        return
+    session = active_sessions[session_id]
+    await state_store.hset('sessions', f'{session_id}@{worker_id}', session_summary(session))
+    await state_store.zadd('session_index', session_id, session.last_activity)
+
+async def emit_event(event: str, data: Dict, room: str):
+    """Emit to a room, or collect the emit while an args_batch is being processed"""
+    # Session room events are sequenced so rejoining clients can catch up
+    log = session_logs.get(room)
+    if log is not None and isinstance(data, dict):
+        if sequence_events:
+            data['seq'] = log.record(event, data)
+        else:
+            log.invalidate()
+    emit_fanout.observe(len(local_rooms().get(room, ())))
+    
+    batch = current_batch()
+    if batch is not None:
+        batch.add_emit(event, data, room)
+    else:
+        await sio.emit(event, data, room=room)
+
+async def create_session(session_id: str):
+    """Create a session on this worker, evicting others if over the bounds"""
+    active_sessions[session_id] = Session(session_id, datetime.now().timestamp() * 1000)
+    session_indexes[session_id] = AgentIndex()
+    session_logs[session_id] = SessionLog(event_buffer_size)
+    touch_session(session_id)
+    # Counted once however many workers hold the session
+    if await state_store.refcount('session_refs', session_id, 1) == 1:
+        await record_stat('active_sessions')
+    await reap_sessions()
+
+def agent_facets(agent: AgentRecord) -> Set[Tuple[str, str]]:
+    """The (kind, value) pairs /api/ws/agents can filter an agent by"""
+    facets = {('capability', capability) for capability in agent.capabilities}
+    if agent.type:
+        facets.add(('type', agent.type))
+    return facets
+
+def agent_view(agent: AgentRecord) -> Dict:
+    """The agent as /api/ws/agents lists it; available says whether it can take another task now"""
+    return {**agent.to_dict(include_socket=False), 'online': True, 'available': is_agent_available(agent)}
+
+async def publish_agent(agent: AgentRecord, previous: Optional[AgentRecord] = None):
+    """Publish an agent's public view, socket route and listing indexes to the shared store"""
+    await state_store.hset('agents', agent.id, agent_view(agent))
+    await state_store.hset('agent_sockets', agent.id, {'socket_id': agent.socket_id, 'worker': worker_id})
+    
+    facets = agent_facets(agent)
+    stale = agent_facets(previous) - facets if previous is not None else set()
+    added = facets - agent_facets(previous) if previous is not None else facets
+    await state_store.zadd('agent_index', agent.id, agent.registered_at)
+    for kind, value in facets:
+        await state_store.zadd(f'agent_index:{kind}:{value}', agent.id, agent.registered_at)
+    for kind, value in added:
+        await state_store.refcount(f'agent_facets:{kind}', value, 1)
+    for kind, value in stale:
+        await state_store.zrem(f'agent_index:{kind}:{value}', agent.id)
+        await state_store.refcount(f'agent_facets:{kind}', value, -1)
+    
+    if previous is None:
+        await record_stat('registered_agents')
+    await record_stat('agents_version')
+
+async def publish_agent_load(agent: AgentRecord):
+    """Republish an agent's public view after its in-flight task count changed"""
+    await state_store.hset('agents', agent.id, agent_view(agent))
+    await record_stat('agents_version')
+
+async def unpublish_agent(agent: AgentRecord):
+    await state_store.hdel('agents', agent.id)
+    await state_store.hdel('agent_sockets', agent.id)
+    await state_store.zrem('agent_index', agent.id)
+    for kind, value in agent_facets(agent):
+        await state_store.zrem(f'agent_index:{kind}:{value}', agent.id)
+        await state_store.refcount(f'agent_facets:{kind}', value, -1)
+    await record_stat('registered_agents', -1)
+    await record_stat('agents_version')
+
+def touch_session(session_id: str, changed: bool = True):
+    """Mark a session as active now; changed drops its cached snapshot"""
+    now = datetime.now().timestamp() * 1000
+    active_sessions[session_id].last_activity = now
+    session_lifecycle.touch(session_id, now)
+    if changed:
+        session_logs[session_id].invalidate()
+
+def record_task_execution(session_id: str, task_type: Optional[str], agent_id: Optional[str], execution_time: float):
+    """Fold a completed task's execution time (ms) into the session, type and Prometheus views"""
+    active_sessions[session_id].metrics.record_execution_time(execution_time)
+    task_duration.labels(session_id).observe(execution_time / 1000)
+    agent = registered_agents.get(agent_id)
+    execution_sketches.add(execution_time, agent.type if agent is not None else None, task_type)
+
+async def fail_task(session_id: str, task_id: str, error: str):
+    """Fail a task that will never run and tell the session why"""
+    task = active_sessions[session_id].tasks.get(task_id) if session_id in active_sessions else None
+    if task is not None:
+        task.status = 'error'
+        finish_task(session_id, task_id)
+    await emit_event('task-error', {
+        'taskId': task_id,
+        'error': error,
+        'timestamp': datetime.now().timestamp() * 1000
+    }, room=session_id)
+
+def finish_task(session_id: str, task_id: str):
+    """Record a finished task, compacting the oldest finished ones into metrics"""
+    session = active_sessions[session_id]
+    for finished_id in session_lifecycle.task_finished(session_id, task_id):
+        task = session.tasks.pop(finished_id, None)
+        if task is not None:
+            session.metrics.compacted_tasks += 1
+            session_lifecycle.remember_compacted(session_id, finished_id, task.status)
+
+async def evict_session(session_id: str, reason: str):
+    """Drop a session and everything this worker holds for it"""
+    session = active_sessions.pop(session_id, None)
+    if session is None:
+        return
+    
+    for agent_id in session.agents:
+        agent_registry.leave(agent_id, session_id)
+    session_indexes.pop(session_id, None)
+    session_logs.pop(session_id, None)
+    queue = task_queue.pop(session_id, None)
+    # Agents working on the session's tasks get that capacity back in their other sessions
+    released = set()
+    for agent_id, task_id in in_flight.drop_session(session_id):
+        agent = registered_agents.get(agent_id)
+        if agent is not None:
+            agent.current_tasks = max(agent.current_tasks - 1, 0)
+            released.add(agent_id)
+    progress_coalescer.drop_session(session_id)
+    session_lifecycle.forget(session_id)
+    task_duration.remove(session_id)
+    await state_store.hdel('sessions', f'{session_id}@{worker_id}')
+    await record_stat('sessions_evicted')
+    await record_stat('task_queue_size', -len(queue or ()))
+    await record_stat('collaboration_requests', -len(session.collaboration_requests))
+    if await state_store.refcount('session_refs', session_id, -1) == 0:
+        await state_store.zrem('session_index', session_id)
+        await record_stat('active_sessions', -1)
+    
+    for agent_id in released:
+        refresh_agent(agent_id)
+        await publish_agent_load(registered_agents[agent_id])
+        for other_session in list(agent_registry.sessions_for(agent_id)):
+            if other_session in active_sessions:
+                await dispatch_queued_tasks(other_session)
+                await publish_session(other_session)
+    
+    # Eviction is this worker's decision, so only its own clients are told and
+    # removed; the session may still be active on other workers
+    await sio.emit('session-expired', {
+        'sessionId': session_id,
+        'reason': reason,
+        'timestamp': datetime.now().timestamp() * 1000
+    }, room=session_id, ignore_queue=True)
+    for sid in list(local_rooms().get(session_id, ())):
+        await sio.leave_room(sid, session_id)
+    logger.info(f"Session {session_id} evicted ({reason})")
+
+async def reap_sessions():
+    """Evict sessions past their idle TTL and the least recent beyond the cap"""
+    cutoff = datetime.now().timestamp() * 1000 - session_lifecycle.ttl * 1000
+    for session_id in session_lifecycle.expired(datetime.now().timestamp() * 1000):
+        session = active_sessions.get(session_id)
+        idle = session is not None and session.last_activity < cutoff
+        await evict_session(session_id, 'idle-timeout' if idle else 'session-limit')
+
+def merge_session_summaries(summaries: List[Dict]) -> Dict[str, Dict]:
+    """Combine the per-worker views of each session into one summary"""
+    merged: Dict[str, Dict] = {}
+    sketches: Dict[str, List[QuantileSketch]] = {}
+    for summary in summaries:
+        session_id = summary['sessionId']
+        if 'executionSketch' in summary:
+            sketches.setdefault(session_id, []).append(QuantileSketch.from_dict(summary['executionSketch']))
+        current = merged.get(session_id)
+        if current is None:
+            merged[session_id] = {**summary, 'metrics': dict(summary.get('metrics', {}))}
+            merged[session_id].pop('executionSketch', None)
+            continue
+        for key in ('agentCount', 'taskCount', 'activeStreams', 'collaborationRequests', 'queuedTasks'):
+            current[key] += summary[key]
+        current['createdAt'] = min(current['createdAt'], summary['createdAt'])
+        current['lastActivity'] = max(current['lastActivity'], summary['lastActivity'])
+        metrics, other = current['metrics'], summary.get('metrics', {})
+        timed = metrics.get('timedTasks', 0) + other.get('timedTasks', 0)
+        if timed:
+            metrics['avgExecutionTime'] = (
+                metrics.get('avgExecutionTime', 0) * metrics.get('timedTasks', 0) +
+                other.get('avgExecutionTime', 0) * other.get('timedTasks', 0)
+            ) / timed
+        for key in ('totalTasks', 'completedTasks', 'errorCount', 'compactedTasks', 'timedTasks'):
+            metrics[key] = metrics.get(key, 0) + other.get(key, 0)
+    for session_id, parts in sketches.items():
+        if len(parts) > 1:
+            merged[session_id]['metrics'].update(execution_percentiles(QuantileSketch.merged(parts)))
+    return merged
+
 @sio.event
 async def connect(sid, environ, auth):
     """Handle client connection with environment-aware authentication"""
     logger.info(f"Client connected: {sid}")
-    server_stats['connections'] += 1
+    await record_stat('connections')
     
     # Environment-aware authentication
     if environment in ["production", "staging"]:
@@ -88,6 +486,14 @@ async def connect(sid, environ, auth):
             await sio.emit('auth-error', {'message': 'API key required in production'}, room=sid)
             await sio.disconnect(sid)
             return False
+        if api_key:
+            verified = await api_keys.verify(api_key)
+            if verified is None:
+                logger.warning(f"Invalid or revoked API key on connection attempt: {sid}")
+                await sio.emit('auth-error', {'message': 'Invalid or revoked API key'}, room=sid)
+                await sio.disconnect(sid)
+                return False
+            logger.info(f"Client {sid} authenticated as {verified.owner} ({verified.key_id})")
     
     # Send welcome message with server info
     await sio.emit('args-welcome', {
@@ -111,21 +517,25 @@ async def connect(sid, environ, auth):
 async def disconnect(sid):
     """Handle client disconnection"""
     logger.info(f"Client disconnected: {sid}")
-    server_stats['connections'] = max(0, server_stats['connections'] - 1)
+    await record_stat('connections', -1)
     
-    # Cleanup agent registrations
-    agents_to_remove = [agent_id for agent_id, agent in registered_agents.items() 
-                       if agent.get('socket_id') == sid]
-    
-    for agent_id in agents_to_remove:
-        del registered_agents[agent_id]
+    # Cleanup agent registrations owned by this socket
+    for agent_id, session_ids in agent_registry.release_socket(sid).items():
+        agent = registered_agents.pop(agent_id, None)
+        in_flight.forget_agent(agent_id)
+        dispatch_strategy.forget(agent_id)
+        if agent is not None:
+            await unpublish_agent(agent)
         logger.info(f"Agent {agent_id} unregistered due to disconnection")
         
         # Notify other clients in sessions
-        for session_id, session in active_sessions.items():
-            if agent_id in session.get('agents', {}):
-                del session['agents'][agent_id]
-                await sio.emit('agent-unregistered', {
+        for session_id in session_ids:
+            session = active_sessions.get(session_id)
+            if session and agent_id in session.agents:
+                del session.agents[agent_id]
+                session_indexes[session_id].remove(agent_id)
+                await publish_session(session_id)
+                await emit_event('agent-unregistered', {
                     'sessionId': session_id,
                     'agentId': agent_id,
                     'reason': 'disconnection',
@@ -134,7 +544,14 @@ async def disconnect(sid):
 
 @sio.event
 async def join_session(sid, data):
-    """Handle session join"""
+    """Handle session join.
+    
+    A client that passes the lastSeq (and epoch) of the last event it saw
+    receives only the events it missed, as one args-batch delivery, and
+    falls back to the full session-state when they are no longer buffered.
+    With several workers events are not sequenced and every join gets the
+    session-state.
+    """
     session_id = data.get('sessionId')
     if not session_id:
         await sio.emit('error', {'message': 'Session ID required'}, room=sid)
@@ -144,61 +561,70 @@ async def join_session(sid, data):
     
     # Initialize session if it doesn't exist
     if session_id not in active_sessions:
-        active_sessions[session_id] = {
-            'sessionId': session_id,
-            'createdAt': datetime.now().timestamp() * 1000,
-            'lastActivity': datetime.now().timestamp() * 1000,
-            'status': 'active',
-            'agents': {},
-            'tasks': {},
-            'activeStreams': {},
-            'collaborationRequests': {},
-            'metrics': {
-                'totalTasks': 0,
-                'completedTasks': 0,
-                'errorCount': 0,
-                'avgExecutionTime': 0
-            }
-        }
+        await create_session(session_id)
     
-    # Update last activity
-    active_sessions[session_id]['lastActivity'] = datetime.now().timestamp() * 1000
+    # Update last activity; a join alone leaves the cached snapshot valid
+    touch_session(session_id, changed=False)
+    await publish_session(session_id)
     
-    # Send current session state
-    await sio.emit('session-state', {
-        **active_sessions[session_id],
-        'agents': list(active_sessions[session_id]['agents'].values()),
-        'tasks': list(active_sessions[session_id]['tasks'].values())
-    }, room=sid)
+    log = session_logs[session_id]
+    last_seq = data.get('lastSeq')
+    missed = log.since(last_seq, data.get('epoch')) if sequence_events and isinstance(last_seq, int) else None
+    if missed is not None:
+        if missed:
+            await sio.emit('args-batch', {
+                'sessionId': session_id,
+                'events': missed,
+                'timestamp': datetime.now().timestamp() * 1000
+            }, room=sid)
+        mode = 'delta'
+    else:
+        # Send current session state, encoded once for every joining client
+        snapshot = log.snapshot(active_sessions[session_id].to_state, json_codec.encode)
+        await sio.emit('session-state', snapshot, room=sid)
+        mode = 'snapshot'
     
-    logger.info(f"Client {sid} joined session {session_id}")
+    logger.info(f"Client {sid} joined session {session_id} ({mode} at seq {log.seq})")
+    return {'sessionId': session_id, 'mode': mode, 'seq': log.seq, 'epoch': log.epoch}
 
 @sio.event
 async def register_agent(sid, agent_info):
     """Handle agent registration with ARGS protocol"""
     agent_id = agent_info.get('id')
     if not agent_id:
-        await sio.emit('error', {'message': 'Agent ID required'}, room=sid)
+        await emit_event('error', {'message': 'Agent ID required'}, room=sid)
         return
     
     # Add socket ID and registration timestamp
-    agent_info['socket_id'] = sid
-    agent_info['registered_at'] = datetime.now().timestamp() * 1000
-    agent_info['environment'] = environment
+    agent = AgentRecord.from_info(agent_info, sid, datetime.now().timestamp() * 1000, environment)
+    
+    # The server's own accounting wins over the load a re-registering agent reports
+    previous = registered_agents.get(agent_id)
+    if previous is not None:
+        agent.current_tasks = in_flight.count(agent_id)
     
-    registered_agents[agent_id] = agent_info
+    registered_agents[agent_id] = agent
+    agent_registry.register(agent_id, sid)
+    agent_info = agent.to_dict()
+    await publish_agent(agent, previous)
     
     # Add agent to all sessions the client is part of
-    for room in sio.manager.get_rooms(sid):
+    for room in sio.rooms(sid):
         if room != sid and room in active_sessions:  # Skip client's own room
-            active_sessions[room]['agents'][agent_id] = agent_info
-            active_sessions[room]['lastActivity'] = datetime.now().timestamp() * 1000
+            active_sessions[room].agents[agent_id] = agent
+            session_indexes[room].add(agent)
+            agent_registry.join(agent_id, room)
+            touch_session(room)
             
-            await sio.emit('agent-registered', {
+            await emit_event('agent-registered', {
                 'sessionId': room,
                 'agent': agent_info,
                 'timestamp': datetime.now().timestamp() * 1000
             }, room=room)
+            
+            # The new agent may be able to take queued work
+            await dispatch_queued_tasks(room)
+            await publish_session(room)
     
     logger.info(f"Agent {agent_id} registered from client {sid}")
 
@@ -209,61 +635,144 @@ async def start_task(sid, task_definition):
     session_id = task_definition.get('sessionId', 'default')
     
     if not task_id:
-        await sio.emit('error', {'message': 'Task ID required'}, room=sid)
+        await emit_event('error', {'message': 'Task ID required'}, room=sid)
         return
     
-    server_stats['messages_processed'] += 1
+    await record_stat('messages_processed')
+    
+    # Tasks only run once their dependencies have completed; checked before the
+    # task is added, so a task naming itself counts as an unknown dependency
+    unmet_dependencies, failed_dependencies = check_dependencies(task_definition, session_id)
     
     # Add task to session
-    if session_id in active_sessions:
-        active_sessions[session_id]['tasks'][task_id] = {
-            **task_definition,
-            'startTime': datetime.now().timestamp() * 1000,
-            'status': 'started',
-            'environment': environment
-        }
-        active_sessions[session_id]['metrics']['totalTasks'] += 1
-        active_sessions[session_id]['lastActivity'] = datetime.now().timestamp() * 1000
+    session = active_sessions.get(session_id)
+    if session is not None:
+        session.tasks[task_id] = TaskRecord(task_definition, 'queued', datetime.now().timestamp() * 1000, environment)
+        session.metrics.total_tasks += 1
+        touch_session(session_id)
     
     # Find suitable agents using ARGS protocol logic
-    suitable_agents = find_suitable_agents(task_definition, session_id)
+    suitable_agents = [] if unmet_dependencies or failed_dependencies else find_suitable_agents(task_definition, session_id)
     
-    if not suitable_agents:
-        await sio.emit('task-error', {
+    if failed_dependencies:
+        # Those dependencies will never complete, so parked the task would hold a queue slot forever
+        await fail_task(session_id, task_id, f"Dependency {', '.join(failed_dependencies)} failed or is unknown")
+    elif suitable_agents:
+        await assign_task(session_id, task_definition, reserve_agents(session_id, task_definition, suitable_agents))
+    elif session is not None:
+        # Absorb the task until an agent frees up or its dependencies complete
+        queue = task_queue.setdefault(session_id, TaskQueue(max_queued_tasks))
+        queued_before = len(queue)
+        try:
+            queue.push(task_definition, unmet_dependencies)
+        except QueueFullError as e:
+            # Finished like any other task, so retention bounds rejected records during a burst
+            session.tasks[task_id].status = 'rejected'
+            finish_task(session_id, task_id)
+            await emit_event('task-error', {
+                'taskId': task_id,
+                'error': str(e),
+                'queueSize': len(queue),
+                'timestamp': datetime.now().timestamp() * 1000
+            }, room=session_id)
+            await record_stat('errors')
+        else:
+            await record_stat('task_queue_size', len(queue) - queued_before)
+            await emit_event('task-queued', {
+                'taskId': task_id,
+                'sessionId': session_id,
+                'priority': task_definition.get('priority', 'medium'),
+                'waitingOn': sorted(unmet_dependencies),
+                'queueSize': len(queue),
+                'timestamp': datetime.now().timestamp() * 1000
+            }, room=session_id)
+            logger.info(f"Task {task_id} queued in session {session_id} ({len(queue)} pending)")
+    else:
+        await emit_event('task-error', {
             'taskId': task_id,
             'error': 'No suitable agents found for task',
             'requirements': task_definition.get('requirements', {}),
-            'availableAgents': len(active_sessions.get(session_id, {}).get('agents', {})),
+            'availableAgents': 0,
             'timestamp': datetime.now().timestamp() * 1000
         }, room=session_id)
-        server_stats['errors'] += 1
-        return
+        await record_stat('errors')
+    
+    if session is not None:
+        await publish_session(session_id)
+
+def reserve_agents(session_id: str, task_definition: Dict, suitable_agents: List[AgentRecord]) -> List[AgentRecord]:
+    """Choose the agents that will run a task and count it against their capacity"""
+    if task_definition.get('collaborationMode', 'sequential') == 'parallel':
+        agents = suitable_agents
+    else:
+        agents = [dispatch_strategy.select(suitable_agents, task_definition)]
+    
+    for agent in agents:
+        in_flight.assign(session_id, task_definition['id'], agent)
+        refresh_agent(agent.id)
+    return agents
+
+def refresh_agent(agent_id: str):
+    """Re-evaluate an agent's availability in every session it belongs to"""
+    for session_id in agent_registry.sessions_for(agent_id):
+        if session_id in session_indexes:
+            session_indexes[session_id].refresh(agent_id)
+
+async def assign_task(session_id: str, task_definition: Dict, agents: List[AgentRecord]):
+    """Send a task to each assigned agent and tell the session who took it"""
+    task_id = task_definition['id']
+    session = active_sessions.get(session_id)
+    task = session.tasks.get(task_id) if session is not None else None
+    if task is not None:
+        task.start_time = datetime.now().timestamp() * 1000
+        task.status = 'started'
     
-    # Assign task to agents based on collaboration mode
     collaboration_mode = task_definition.get('collaborationMode', 'sequential')
+    mode = 'parallel' if collaboration_mode == 'parallel' else 'sequential'
     
-    if collaboration_mode == 'parallel':
-        # Assign to all suitable agents
-        for agent in suitable_agents:
-            await sio.emit('task-assigned', {
-                'taskId': task_id,
-                'agentId': agent['id'],
-                'mode': 'parallel',
-                'taskDefinition': task_definition,
-                'timestamp': datetime.now().timestamp() * 1000
-            }, room=session_id)
-    else:
-        # Assign to first available agent (sequential)
-        agent = suitable_agents[0]
-        await sio.emit('task-assigned', {
+    # Only the assignees need the definition: it goes to their own sockets,
+    # encoded once, and the room gets a single summary instead of a copy per agent
+    definition = RawJSON(json_codec.dumps(task_definition))
+    for agent in agents:
+        # reserve_agents counted the task against the agent; show that in /api/ws/agents
+        await publish_agent_load(agent)
+        await emit_event('task-assigned', {
+            'sessionId': session_id,
             'taskId': task_id,
-            'agentId': agent['id'],
-            'mode': 'sequential',
-            'taskDefinition': task_definition,
+            'agentId': agent.id,
+            'mode': mode,
+            'taskDefinition': definition,
             'timestamp': datetime.now().timestamp() * 1000
-        }, room=session_id)
+        }, room=agent.socket_id)
+    
+    await emit_event('task-assignment', {
+        'sessionId': session_id,
+        'taskId': task_id,
+        'mode': mode,
+        'agentIds': [agent.id for agent in agents],
+        'timestamp': datetime.now().timestamp() * 1000
+    }, room=session_id)
     
-    logger.info(f"Task {task_id} started with {len(suitable_agents)} agents in {collaboration_mode} mode")
+    logger.info(f"Task {task_id} started with {len(agents)} agents in {collaboration_mode} mode")
+
+async def dispatch_queued_tasks(session_id: str):
+    """Assign queued tasks, highest priority first, to agents that can take them"""
+    queue = task_queue.get(session_id)
+    if not queue or not queue.ready_count:
+        return
+    
+    assignments = []
+    
+    def try_assign(task_definition: Dict) -> bool:
+        suitable_agents = find_suitable_agents(task_definition, session_id)
+        if suitable_agents:
+            assignments.append((task_definition, reserve_agents(session_id, task_definition, suitable_agents)))
+        return bool(suitable_agents)
+    
+    queue.dispatch(try_assign)
+    await record_stat('task_queue_size', -len(assignments))
+    for task_definition, agents in assignments:
+        await assign_task(session_id, task_definition, agents)
 
 @sio.event
 async def agent_progress(sid, progress_data):
@@ -271,31 +780,73 @@ async def agent_progress(sid, progress_data):
     session_id = progress_data.get('sessionId', 'default')
     task_id = progress_data.get('taskId')
     
-    server_stats['messages_processed'] += 1
+    await record_stat('messages_processed')
+    
+    status = progress_data.get('status')
+    execution_time = None
     
     # Update session state
     if session_id in active_sessions and task_id:
-        if task_id in active_sessions[session_id]['tasks']:
-            active_sessions[session_id]['tasks'][task_id].update({
-                'lastProgress': progress_data,
-                'lastUpdate': datetime.now().timestamp() * 1000
-            })
+        task = active_sessions[session_id].tasks.get(task_id)
+        if task is not None:
+            finished_before = task.status in ('completed', 'error', 'rejected')
+            task.last_progress = progress_data
+            task.last_update = datetime.now().timestamp() * 1000
+            if status:
+                task.status = status
+            if status in ('completed', 'error') and not finished_before:
+                finish_task(session_id, task_id)
+                if status == 'completed' and task.start_time:
+                    execution_time = task.last_update - task.start_time
+        
+        touch_session(session_id)
         
-        active_sessions[session_id]['lastActivity'] = datetime.now().timestamp() * 1000
+        # Agent status or load may have changed
+        agent_id = progress_data.get('agentId')
+        if agent_id in registered_agents:
+            released = status in ('completed', 'error') and in_flight.release(
+                session_id, task_id, registered_agents[agent_id]
+            )
+            refresh_agent(agent_id)
+            if released:
+                await publish_agent_load(registered_agents[agent_id])
         
         # Update metrics if task completed
-        if progress_data.get('status') == 'completed':
-            active_sessions[session_id]['metrics']['completedTasks'] += 1
-            server_stats['tasks_completed'] += 1
+        if status == 'completed':
+            active_sessions[session_id].metrics.completed_tasks += 1
+            if execution_time is not None:
+                record_task_execution(session_id, task.type, agent_id, execution_time)
+            await record_stat('tasks_completed')
+        elif status == 'error':
+            active_sessions[session_id].metrics.error_count += 1
+        
+        # Release or fail queued tasks that depend on this one
+        queue = task_queue.get(session_id)
+        if queue is not None and status == 'completed':
+            queue.resolve(task_id)
+        elif queue is not None and status == 'error':
+            dropped = queue.fail(task_id)
+            await record_stat('task_queue_size', -len(dropped))
+            for dependent in dropped:
+                await fail_task(session_id, dependent['id'], f'Dependency {task_id} failed')
+        
+        # Finished work may have freed an agent or unblocked dependents
+        if status in ('completed', 'error'):
+            await dispatch_queued_tasks(session_id)
+            await publish_session(session_id)
     
-    # Broadcast progress to session with enhanced data
-    await sio.emit('task-progress', {
+    # Broadcast progress to session with enhanced data, coalesced per task
+    await progress_coalescer.submit(session_id, {
+        **progress_data,
+        'environment': environment,
+        'serverTimestamp': datetime.now().timestamp() * 1000
+    })
+
+async def emit_task_progress(session_id: str, progress: Dict):
+    """Deliver one coalesced progress update to a session room"""
+    await emit_event('task-progress', {
         'sessionId': session_id,
-        'progress': {
-            **progress_data,
-            'environment': environment,
-            'serverTimestamp': datetime.now().timestamp() * 1000
-        },
+        'progress': progress,
         'timestamp': datetime.now().timestamp() * 1000
     }, room=session_id)
 
@@ -306,140 +857,247 @@ async def collaboration_request(sid, request_data):
     request_id = request_data.get('requestId')
     target_agent = request_data.get('targetAgent')
     
-    server_stats['messages_processed'] += 1
+    await record_stat('messages_processed')
     
     # Store collaboration request
     if session_id in active_sessions:
-        active_sessions[session_id]['collaborationRequests'][request_id] = {
+        requests = active_sessions[session_id].collaboration_requests
+        retained_before = len(requests)
+        requests[request_id] = {
             **request_data,
             'timestamp': datetime.now().timestamp() * 1000,
             'status': 'pending'
         }
+        
+        # Keep only the most recent collaboration requests
+        while len(requests) > retained_collaborations:
+            del requests[next(iter(requests))]
+        await record_stat('collaboration_requests', len(requests) - retained_before)
+        touch_session(session_id)
+        await publish_session(session_id)
     
     if target_agent:
-        # Send to specific agent
-        target_socket = None
-        for agent_id, agent in registered_agents.items():
-            if agent_id == target_agent:
-                target_socket = agent.get('socket_id')
-                break
+        # Send to specific agent, which may be connected to another worker
+        target_socket = agent_registry.socket_for(target_agent)
+        if not target_socket:
+            target_socket = ((await state_store.hget('agent_sockets', target_agent)) or {}).get('socket_id')
         
         if target_socket:
-            await sio.emit('collaboration-request', {
+            await emit_event('collaboration-request', {
                 **request_data,
                 'timestamp': datetime.now().timestamp() * 1000
             }, room=target_socket)
         else:
-            await sio.emit('collaboration-error', {
+            await emit_event('collaboration-error', {
                 'requestId': request_id,
                 'error': f'Target agent {target_agent} not found',
                 'timestamp': datetime.now().timestamp() * 1000
             }, room=sid)
     else:
         # Broadcast to all agents in session
-        await sio.emit('collaboration-request', {
+        await emit_event('collaboration-request', {
             **request_data,
             'timestamp': datetime.now().timestamp() * 1000
         }, room=session_id)
     
     logger.info(f"Collaboration request {request_id} processed")
 
-def find_suitable_agents(task_definition: Dict, session_id: str) -> List[Dict]:
+# ARGS message types accepted by args_batch and the handlers that process them
+ARGS_BATCH_HANDLERS = {
+    'AGENT_REGISTER': register_agent,
+    'TASK_START': start_task,
+    'TASK_PROGRESS': agent_progress,
+    'COLLABORATION_REQUEST': collaboration_request
+}
+
+@sio.event
+async def args_batch(sid, batch_data):
+    """Handle many ARGS messages in one pass with one delivery per room"""
+    messages = batch_data.get('messages', []) if isinstance(batch_data, dict) else batch_data
+    if not isinstance(messages, list) or len(messages) > max_batch_size:
+        await sio.emit('error', {'message': f'args_batch expects a list of at most {max_batch_size} messages'}, room=sid)
+        return {'processed': 0, 'errors': 1}
+    
+    errors = 0
+    with EmitBatch() as batch:
+        for message in messages:
+            handler = ARGS_BATCH_HANDLERS.get(message.get('type')) if isinstance(message, dict) else None
+            if handler is None:
+                errors += 1
+                batch.add_emit('error', {
+                    'message': 'Unsupported ARGS message in batch',
+                    'messageId': message.get('id') if isinstance(message, dict) else None
+                }, sid)
+                continue
+            
+            payload = dict(message.get('payload') or {})
+            if handler is not register_agent:
+                payload.setdefault('sessionId', message.get('sessionId', 'default'))
+            try:
+                await handler(sid, payload)
+            except Exception as e:
+                errors += 1
+                logger.error(f"ARGS batch message {message.get('id')} failed: {e}")
+                batch.add_emit('error', {'message': 'ARGS message failed', 'messageId': message.get('id')}, sid)
+    
+    # Write touched state once, then deliver one aggregated event per room
+    for name, amount in batch.stats.items():
+        await state_store.incr(name, amount)
+    for session_id in batch.dirty_sessions:
+        if session_id in active_sessions:
+            await publish_session(session_id)
+    for room, events in batch.rooms.items():
+        await sio.emit('args-batch', {
+            'events': events,
+            'timestamp': datetime.now().timestamp() * 1000
+        }, room=room)
+    
+    return {'processed': len(messages) - errors, 'errors': errors}
+
+def check_dependencies(task_definition: Dict, session_id: str) -> Tuple[List[str], List[str]]:
+    """Return the dependencies of a task still pending, and those that can no longer complete.
+    
+    A dependency that errored or was rejected never completes, and neither
+    does one the session does not know: never submitted, or compacted so
+    long ago that its outcome has been forgotten.
+    """
+    session = active_sessions.get(session_id)
+    tasks = session.tasks if session is not None else {}
+    unmet, failed = [], []
+    for dependency in task_definition.get('dependencies') or []:
+        task = tasks.get(dependency)
+        # Compacted tasks are no longer resident but their outcome is remembered
+        status = task.status if task else session_lifecycle.compacted_status(session_id, dependency)
+        if status in (None, 'error', 'rejected'):
+            failed.append(dependency)
+        elif status != 'completed':
+            unmet.append(dependency)
+    return unmet, failed
+
+def find_suitable_agents(task_definition: Dict, session_id: str) -> List[AgentRecord]:
     """Find agents suitable for a given task using ARGS protocol logic"""
     if session_id not in active_sessions:
         return []
     
-    session_agents = active_sessions[session_id].get('agents', {})
     requirements = task_definition.get('requirements', {})
     required_capabilities = requirements.get('capabilities', [])
     required_agent_types = requirements.get('agentTypes', [])
     
-    suitable_agents = []
-    for agent_id, agent in session_agents.items():
-        # Check agent type
-        if required_agent_types and agent.get('type') not in required_agent_types:
-            continue
-        
-        # Check capabilities
-        agent_capabilities = agent.get('capabilities', [])
-        if not all(cap in agent_capabilities for cap in required_capabilities):
-            continue
-        
-        # Check availability
-        if agent.get('status') == 'idle':
-            current_tasks = agent.get('metadata', {}).get('currentTasks', 0)
-            max_tasks = agent.get('metadata', {}).get('maxConcurrentTasks', 1)
-            if current_tasks < max_tasks:
-                suitable_agents.append(agent)
-    
-    return suitable_agents
+    return session_indexes[session_id].match(required_capabilities, required_agent_types)
 
 # REST API endpoints for WebSocket management
+# Polled constantly by load balancers and dashboards: every view answers from the
+# shared counters in one round trip and revalidates with ETag / If-None-Match
 @app.get("/api/ws/stats")
-async def get_websocket_stats():
+async def get_websocket_stats(request: Request):
     """Get comprehensive WebSocket server statistics"""
+    counters = await state_store.counters()
+    # The body also names this worker and its uptime, so a version is per worker
+    # (and per restart); a 304 from another worker must not vouch for them
+    etag = version_etag('stats', worker_id, server_stats['start_time'], sorted(counters.items()))
     uptime = datetime.now().timestamp() * 1000 - server_stats['start_time']
     
-    return {
+    return not_modified(request, etag) or view_response(etag, json_codec.encode({
         'environment': environment,
         'server': 'python-fastapi',
+        'worker': worker_id,
         'uptime': uptime,
-        'active_sessions': len(active_sessions),
-        'registered_agents': len(registered_agents),
-        'connected_clients': server_stats['connections'],
-        'messages_processed': server_stats['messages_processed'],
-        'tasks_completed': server_stats['tasks_completed'],
-        'error_count': server_stats['errors'],
-        'task_queue_size': sum(len(tasks) for tasks in task_queue.values()),
-        'collaboration_requests': sum(len(session.get('collaborationRequests', {})) for session in active_sessions.values()),
+        'active_sessions': counters.get('active_sessions', 0),
+        'registered_agents': counters.get('registered_agents', 0),
+        'connected_clients': counters.get('connections', 0),
+        'messages_processed': counters.get('messages_processed', 0),
+        'tasks_completed': counters.get('tasks_completed', 0),
+        'error_count': counters.get('errors', 0),
+        'task_queue_size': counters.get('task_queue_size', 0),
+        'collaboration_requests': counters.get('collaboration_requests', 0),
         'timestamp': datetime.now().timestamp() * 1000
-    }
+    }))
+
+async def listing_page(limit: int, cursor: Optional[str], fetch, **kwargs):
+    """One page of a sorted index, answering a bad cursor with a 400"""
+    try:
+        return await paginate(state_store, limit=limit, cursor=cursor, fetch=fetch, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+# Listings are paged through sorted indexes in the shared store: a page costs a
+# range read plus one multi-get, however many sessions or agents exist
 @app.get("/api/ws/sessions")
-async def get_active_sessions():
-    """Get all active sessions with detailed information"""
-    session_details = []
-    for session_id, session in active_sessions.items():
-        session_details.append({
-            'sessionId': session_id,
-            'status': session.get('status'),
-            'agentCount': len(session.get('agents', {})),
-            'taskCount': len(session.get('tasks', {})),
-            'activeStreams': len(session.get('activeStreams', {})),
-            'collaborationRequests': len(session.get('collaborationRequests', {})),
-            'createdAt': session.get('createdAt'),
-            'lastActivity': session.get('lastActivity'),
-            'metrics': session.get('metrics', {})
-        })
+async def get_active_sessions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[float] = Query(None, description="Earliest lastActivity (ms)"),
+    until: Optional[float] = Query(None, description="Latest lastActivity (ms)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return")
+):
+    """Get a page of active sessions, ordered by last activity"""
+    workers = set(await state_store.hgetall('workers')) | {worker_id}
+    
+    async def fetch(session_ids: List[str]) -> List[Optional[Dict]]:
+        keys = [f'{session_id}@{worker}' for session_id in session_ids for worker in workers]
+        merged = merge_session_summaries([doc for doc in await state_store.hmget('sessions', keys) if doc])
+        return [merged.get(session_id) for session_id in session_ids]
+    
+    sessions, next_cursor = await listing_page(
+        limit, cursor, fetch,
+        index='session_index',
+        min_score=since if since is not None else float('-inf'),
+        max_score=until if until is not None else float('inf'),
+        predicate=(lambda session: session['status'] == status) if status else None
+    )
+    selected = parse_fields(fields)
     
     return {
-        'count': len(active_sessions),
-        'sessions': list(active_sessions.keys()),
-        'details': session_details,
+        'count': (await state_store.counters()).get('active_sessions', 0),
+        'sessions': [session['sessionId'] for session in sessions],
+        'details': [project(session, selected) for session in sessions],
+        'nextCursor': next_cursor,
         'environment': environment
     }
 
 @app.get("/api/ws/agents")
-async def get_registered_agents():
-    """Get all registered agents"""
-    agent_details = []
-    for agent_id, agent in registered_agents.items():
-        # Remove sensitive socket information
-        safe_agent = {k: v for k, v in agent.items() if k != 'socket_id'}
-        safe_agent['online'] = True  # If in registered_agents, it's online
-        agent_details.append(safe_agent)
+async def get_registered_agents(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    agent_type: Optional[str] = Query(None, alias='type'),
+    capability: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return")
+):
+    """Get a page of registered agents, ordered by registration time"""
+    # The most selective index answers the query; remaining filters apply per agent
+    if capability:
+        index = f'agent_index:capability:{capability}'
+    elif agent_type:
+        index = f'agent_index:type:{agent_type}'
+    else:
+        index = 'agent_index'
     
-    return {
-        'count': len(registered_agents),
-        'agents': agent_details,
-        'capabilities': list(set(
-            cap for agent in registered_agents.values() 
-            for cap in agent.get('capabilities', [])
-        )),
-        'agent_types': list(set(
-            agent.get('type') for agent in registered_agents.values()
-        ))
-    }
+    def matches(agent: Dict) -> bool:
+        return ((not status or agent.get('status') == status) and
+                (not agent_type or agent.get('type') == agent_type))
+    
+    async def build() -> Dict:
+        agents, next_cursor = await listing_page(
+            limit, cursor, lambda agent_ids: state_store.hmget('agents', agent_ids),
+            index=index,
+            predicate=matches if status or (agent_type and capability) else None
+        )
+        selected = parse_fields(fields)
+        return {
+            'count': (await state_store.counters()).get('registered_agents', 0),
+            'agents': [project(agent, selected) for agent in agents],
+            'capabilities': sorted(await state_store.refcounts('agent_facets:capability')),
+            'agent_types': sorted(await state_store.refcounts('agent_facets:type')),
+            'nextCursor': next_cursor
+        }
+    
+    version = (await state_store.counters()).get('agents_version', 0)
+    variant = (limit, cursor, status, agent_type, capability, fields)
+    etag, body = await agents_views.get(variant, version, build)
+    return not_modified(request, etag) or view_response(etag, body)
 
 @app.post("/api/ws/broadcast")
 async def broadcast_message(message_data: dict):
@@ -456,13 +1114,13 @@ async def broadcast_message(message_data: dict):
     }
     
     if session_id:
-        await sio.emit(event, enhanced_data, room=session_id)
+        await emit_event(event, enhanced_data, room=session_id)
         target_count = 1
     else:
         await sio.emit(event, enhanced_data)
         target_count = len(active_sessions)
     
-    server_stats['messages_processed'] += 1
+    await record_stat('messages_processed')
     
     return {
         'status': 'sent',
@@ -471,6 +1129,136 @@ async def broadcast_message(message_data: dict):
         'timestamp': datetime.now().timestamp() * 1000
     }
 
+def require_admin(request: Request):
+    """Key management needs ARGS_ADMIN_TOKEN in X-Admin-Token; without one set, only in development"""
+    if admin_token:
+        presented = request.headers.get('x-admin-token', '')
+        if not hmac.compare_digest(presented.encode(), admin_token.encode()):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+    elif environment != "development":
+        raise HTTPException(status_code=403, detail="Set ARGS_ADMIN_TOKEN to manage API keys")
+
+@app.post("/api/ws/keys")
+async def issue_api_key(request_data: dict, request: Request):
+    """Issue an API key; the key itself is returned only in this response"""
+    require_admin(request)
+    owner = request_data.get('owner')
+    if not owner:
+        raise HTTPException(status_code=400, detail="owner is required")
+    api_key, issued = await api_keys.issue(str(owner))
+    return {
+        'apiKey': api_key,
+        'keyId': issued.key_id,
+        'owner': issued.owner,
+        'created': issued.created * 1000
+    }
+
+@app.delete("/api/ws/keys/{key_id}")
+async def revoke_api_key(key_id: str, request: Request):
+    """Revoke an API key by its id (the prefix shown when it was issued)"""
+    require_admin(request)
+    if not await api_keys.revoke(key_id):
+        raise HTTPException(status_code=404, detail="Unknown API key")
+    return {'keyId': key_id, 'revoked': True}
+
+async def sync_owner(request: Request) -> str:
+    """Whose stores a sync request reads and writes: the owner of its X-API-Key"""
+    api_key = request.headers.get('x-api-key')
+    if api_key:
+        verified = await api_keys.verify(api_key)
+        if verified is None:
+            raise HTTPException(status_code=401, detail="Invalid or revoked API key")
+        return verified.owner
+    if environment == "production":
+        raise HTTPException(status_code=401, detail="API key required in production")
+    return 'anonymous'
+
+def store_change(body: Dict[str, Any]) -> Dict[str, Any]:
+    """A whole document (data) or a JSON patch, optionally pinned to base_version and hash"""
+    if 'patch' in body:
+        change = {'patch': body['patch']}
+    elif 'data' in body:
+        change = {'data': body['data']}
+    else:
+        raise HTTPException(status_code=400, detail="Either data or patch is required")
+    for field in ('base_version', 'hash'):
+        if body.get(field) is not None:
+            change[field] = body[field]
+    return change
+
+async def commit_stores(owner: str, changes: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    try:
+        return await store_sync.commit(owner, changes)
+    except PatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except SyncConflict as e:
+        raise HTTPException(status_code=409, detail={
+            'message': str(e),
+            'stores': {name: {'version': head['version'], 'hash': head['hash']} if head else None
+                       for name, head in e.heads.items()}
+        })
+
+@app.post("/api/brolostack/sync/store")
+async def sync_store(request_data: dict, request: Request):
+    """Sync one store: the whole document, or a JSON patch against base_version
+    
+    Only entries that changed are written, and the version moves on only
+    when something did. A base_version that is no longer current, or an
+    expected hash the result would not have, is a 409 with the store's
+    current version and hash.
+    """
+    owner = await sync_owner(request)
+    store_name = request_data.get('store_name')
+    if not isinstance(store_name, str) or not store_name:
+        raise HTTPException(status_code=400, detail="store_name is required")
+    result = (await commit_stores(owner, {store_name: store_change(request_data)}))[store_name]
+    return {'success': True, 'store_name': store_name, **result}
+
+@app.get("/api/brolostack/sync/store/{store_name}")
+async def restore_store(store_name: str, request: Request, since: Optional[int] = Query(None, ge=0)):
+    """Restore a store: 304 when If-None-Match names its version, the patch
+    from version since when that is still kept, otherwise the whole document"""
+    owner = await sync_owner(request)
+    head = await store_sync.head(owner, store_name)
+    if head is None:
+        raise HTTPException(status_code=404, detail="Unknown store")
+    etag = version_etag('store', owner, store_name, head['version'], head['hash'])
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    
+    if since is not None:
+        ops = await store_sync.changes_since(owner, store_name, since, head)
+        if ops is not None:
+            return view_response(etag, json_codec.encode({
+                'store_name': store_name, **head, 'since': since, 'patch': ops
+            }))
+    head, data = await store_sync.document(owner, store_name)
+    etag = version_etag('store', owner, store_name, head['version'], head['hash'])
+    return view_response(etag, json_codec.encode({'store_name': store_name, **head, 'data': data}))
+
+@app.post("/api/brolostack/sync/bulk")
+async def bulk_sync(request_data: dict, request: Request):
+    """Sync many stores in one transaction: all of them change or none do
+    
+    stores maps store names to whole documents, as FastAPIAdapter.bulkSync
+    sends them; changes maps store names to {patch | data, base_version?,
+    hash?}. A store may appear in only one of the two.
+    """
+    owner = await sync_owner(request)
+    stores = request_data.get('stores') or {}
+    deltas = request_data.get('changes') or {}
+    if not isinstance(stores, dict) or not isinstance(deltas, dict) or not (stores or deltas):
+        raise HTTPException(status_code=400, detail="stores or changes is required")
+    if stores.keys() & deltas.keys():
+        raise HTTPException(status_code=400, detail="A store may appear in stores or changes, not both")
+    changes = {name: {'data': data} for name, data in stores.items()}
+    for name, body in deltas.items():
+        if not isinstance(body, dict):
+            raise HTTPException(status_code=400, detail=f"Change for '{name}' must be an object")
+        changes[name] = store_change(body)
+    return {'success': True, 'stores': await commit_stores(owner, changes)}
+
 @app.post("/api/demo/simulate-agent")
 async def simulate_agent_activity(request_data: dict):
     """Simulate agent activity for demonstration"""
@@ -479,55 +1267,49 @@ async def simulate_agent_activity(request_data: dict):
     task_type = request_data.get('taskType', 'data-analysis')
     
     # Create demo agent
-    demo_agent = {
-        'id': f'demo-agent-{int(datetime.now().timestamp())}',
-        'type': agent_type,
-        'capabilities': ['data-analysis', 'machine-learning', 'visualization'],
-        'status': 'idle',
-        'metadata': {
+    demo_agent = AgentRecord(
+        f'demo-agent-{int(datetime.now().timestamp())}',
+        agent_type,
+        ('data-analysis', 'machine-learning', 'visualization'),
+        'idle',
+        max_concurrent_tasks=3,
+        metadata={
             'name': f'Demo {agent_type.title()} Agent',
             'version': '1.0.0',
-            'description': f'Simulated {agent_type} for demonstration',
-            'maxConcurrentTasks': 3,
-            'currentTasks': 0
+            'description': f'Simulated {agent_type} for demonstration'
         },
-        'socket_id': 'demo',
-        'registered_at': datetime.now().timestamp() * 1000,
-        'environment': environment
-    }
+        socket_id='demo',
+        registered_at=datetime.now().timestamp() * 1000,
+        environment=environment
+    )
     
     # Register demo agent
-    registered_agents[demo_agent['id']] = demo_agent
+    registered_agents[demo_agent.id] = demo_agent
+    agent_registry.register(demo_agent.id, demo_agent.socket_id)
+    await publish_agent(demo_agent)
     
     if session_id not in active_sessions:
-        active_sessions[session_id] = {
-            'sessionId': session_id,
-            'createdAt': datetime.now().timestamp() * 1000,
-            'lastActivity': datetime.now().timestamp() * 1000,
-            'status': 'active',
-            'agents': {},
-            'tasks': {},
-            'activeStreams': {},
-            'collaborationRequests': {},
-            'metrics': {'totalTasks': 0, 'completedTasks': 0, 'errorCount': 0, 'avgExecutionTime': 0}
-        }
+        await create_session(session_id)
     
-    active_sessions[session_id]['agents'][demo_agent['id']] = demo_agent
+    active_sessions[session_id].agents[demo_agent.id] = demo_agent
+    session_indexes[session_id].add(demo_agent)
+    agent_registry.join(demo_agent.id, session_id)
+    await publish_session(session_id)
     
     # Broadcast agent registration
-    await sio.emit('agent-registered', {
+    await emit_event('agent-registered', {
         'sessionId': session_id,
-        'agent': demo_agent,
+        'agent': demo_agent.to_dict(),
         'timestamp': datetime.now().timestamp() * 1000
     }, room=session_id)
     
     # Simulate task execution
-    asyncio.create_task(simulate_task_execution(session_id, demo_agent['id'], task_type))
+    asyncio.create_task(simulate_task_execution(session_id, demo_agent.id, task_type))
     
     return {
         'status': 'simulation-started',
         'sessionId': session_id,
-        'agentId': demo_agent['id'],
+        'agentId': demo_agent.id,
         'agentType': agent_type,
         'taskType': task_type,
         'timestamp': datetime.now().timestamp() * 1000
@@ -554,7 +1336,7 @@ async def simulate_task_execution(session_id: str, agent_id: str, task_type: str
         # Send progress update
         progress = int((elapsed_time / total_duration) * 100)
         
-        await sio.emit('task-progress', {
+        await emit_event('task-progress', {
             'sessionId': session_id,
             'progress': {
                 'agentId': agent_id,
@@ -580,7 +1362,7 @@ async def simulate_task_execution(session_id: str, agent_id: str, task_type: str
         elapsed_time += step['duration']
     
     # Send completion
-    await sio.emit('task-completed', {
+    await emit_event('task-completed', {
         'taskId': task_id,
         'agentId': agent_id,
         'result': {
@@ -598,22 +1380,55 @@ async def simulate_task_execution(session_id: str, agent_id: str, task_type: str
     
     # Update session metrics
     if session_id in active_sessions:
-        active_sessions[session_id]['metrics']['completedTasks'] += 1
-        metrics = active_sessions[session_id]['metrics']
-        completed = metrics['completedTasks']
-        current_avg = metrics['avgExecutionTime']
-        metrics['avgExecutionTime'] = (current_avg * (completed - 1) + elapsed_time * 1000) / completed
+        active_sessions[session_id].metrics.completed_tasks += 1
+        record_task_execution(session_id, task_type, agent_id, elapsed_time * 1000)
+        await publish_session(session_id)
     
-    server_stats['tasks_completed'] += 1
+    await record_stat('tasks_completed')
     logger.info(f"Demo task {task_id} completed in {elapsed_time}s")
 
+@app.get("/api/ws/memory")
+async def get_memory_gauges():
+    """Resident state gauges for this worker, to verify the session bounds hold"""
+    return {
+        'worker': worker_id,
+        'sessions': len(active_sessions),
+        'max_sessions': session_lifecycle.max_sessions,
+        'session_ttl': session_lifecycle.ttl,
+        'sessions_evicted': server_stats['sessions_evicted'],
+        'tasks_retained': sum(len(session.tasks) for session in active_sessions.values()),
+        'tasks_compacted': sum(session.metrics.compacted_tasks for session in active_sessions.values()),
+        'collaboration_requests_retained': sum(
+            len(session.collaboration_requests) for session in active_sessions.values()
+        ),
+        'queued_tasks': sum(len(queue) for queue in task_queue.values()),
+        'pending_progress': progress_coalescer.pending_count,
+        'buffered_events': sum(len(log) for log in session_logs.values()),
+        'registered_agents': len(registered_agents),
+        'bytes_estimate': estimate_bytes(active_sessions),
+        'timestamp': datetime.now().timestamp() * 1000
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus exposition of this worker's metrics"""
+    return Response(metrics_registry.render(), media_type=CONTENT_TYPE)
+
 # Health check endpoint
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """Comprehensive health check"""
+    counters = await state_store.counters()
+    etag = version_etag('health', sorted(counters.items()))
     uptime = datetime.now().timestamp() * 1000 - server_stats['start_time']
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
     
-    return {
+    # Task execution percentiles (ms) across all workers, overall and per agent / task type
+    execution = await global_execution_report()
+    
+    return view_response(etag, json_codec.encode({
         'status': 'healthy',
         'environment': environment,
         'framework': 'fastapi',
@@ -621,13 +1436,19 @@ async def health_check():
         'args_protocol': 'enabled',
         'uptime': uptime,
         'performance': {
-            'active_sessions': len(active_sessions),
-            'registered_agents': len(registered_agents),
+            'active_sessions': counters.get('active_sessions', 0),
+            'registered_agents': counters.get('registered_agents', 0),
             'messages_per_second': server_stats['messages_processed'] / max(uptime / 1000, 1),
-            'error_rate': server_stats['errors'] / max(server_stats['messages_processed'], 1) * 100
+            'error_rate': counters.get('errors', 0) / max(counters.get('messages_processed', 0), 1) * 100,
+            'execution_time': execution['overall'],
+            'execution_time_by_agent_type': execution['agentTypes'],
+            'execution_time_by_task_type': execution['taskTypes']
         },
         'timestamp': datetime.now().timestamp() * 1000
-    }
+    }))
+
+# Time every Socket.IO handler registered above
+instrument_handlers(sio.handlers['/'], event_latency, event_errors)
 
 # Environment-specific startup message
 @app.on_event("startup")
@@ -639,6 +1460,7 @@ Environment: {environment}
 ARGS Protocol: Enabled
 Multi-Agent Support: Active
 Real-time Streaming: Ready
+JSON Codec: {json_codec.name}
 
 Features:
 - Environment-aware configurations
@@ -650,17 +1472,59 @@ Features:
 
 Ready for connections! 🎉
 """)
+    
+    await state_store.hset('workers', worker_id, {'startedAt': server_stats['start_time']})
+    progress_coalescer.start()
+    loop_lag_monitor.start()
+    
+    # Background reaper for idle sessions
+    async def session_reaper():
+        while True:
+            await asyncio.sleep(reaper_interval)
+            try:
+                await reap_sessions()
+            except Exception as e:
+                logger.error(f"Session reaper failed: {e}")
+    
+    asyncio.create_task(session_reaper())
+    
+    # Publish this worker's execution time sketches for the global percentiles
+    async def sketch_publisher():
+        while True:
+            await asyncio.sleep(sketch_publish_interval)
+            try:
+                await publish_sketches()
+            except Exception as e:
+                logger.error(f"Publishing execution sketches failed: {e}")
+    
+    asyncio.create_task(sketch_publisher())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await progress_coalescer.stop()
+    await loop_lag_monitor.stop()
+    await state_store.hdel('workers', worker_id)
+    await state_store.hdel('execution_sketches', worker_id)
+    await state_store.close()
 
 if __name__ == "__main__":
     # Environment-aware server configuration
+    workers = int(os.getenv('WORKERS', 1 if environment == "development" else 4))
+    if workers > 1 and not redis_url:
+        # Without a shared store every worker would see a different world
+        logger.warning("REDIS_URL is not set; running a single worker instead of %d", workers)
+        workers = 1
+    
     config = {
         "host": "0.0.0.0",
         "port": int(os.getenv('PORT', 8000)),
         "reload": environment == "development",
         "log_level": "debug" if environment == "development" else "info",
         "access_log": environment == "development",
-        "workers": 1 if environment == "development" else 4
+        "workers": workers
     }
     
     logger.info(f"Starting Brolostack WebSocket server in {environment} mode")
-    uvicorn.run(socket_app, **config)
+    # An import string lets uvicorn spawn workers and reload; Socket.IO clients
+    # must use the websocket transport or a sticky load balancer across workers
+    uvicorn.run("fastapi_server:socket_app", **config)
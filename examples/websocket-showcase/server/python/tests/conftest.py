@@ -0,0 +1,22 @@
+import os
+import secrets
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('ENVIRONMENT', 'test')
+
+from args_state import InMemoryStateStore, RedisStateStore  # noqa: E402
+
+
+@pytest.fixture(params=['memory', 'fakeredis'])
+def connect(request):
+    """Opens views of one shared store, as separate workers would; fakeredis stands in for Redis"""
+    if request.param == 'memory':
+        store = InMemoryStateStore()
+        return lambda: store
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    prefix = f'test_{secrets.token_hex(4)}'
+    return lambda: RedisStateStore(fakeredis.FakeAsyncRedis(server=server, decode_responses=True), prefix)
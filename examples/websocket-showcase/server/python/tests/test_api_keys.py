@@ -0,0 +1,37 @@
+"""
+API keys: secret length, verification and revocation
+"""
+
+import asyncio
+import secrets
+
+from args_keys import KEY_ID_LENGTH, KEY_PREFIX, ApiKeyStore, generate_api_key, key_id
+from args_state import InMemoryStateStore
+
+
+def test_keys_keep_128_secret_bits_beyond_the_public_id():
+    api_key = generate_api_key()
+    kid = key_id(api_key)
+    assert kid == api_key[:len(KEY_PREFIX) + KEY_ID_LENGTH]
+    secret = api_key[len(kid):]
+    assert len(secret) * 4 == 128
+    int(secret, 16)
+
+
+def test_issued_keys_verify_until_revoked():
+    async def scenario():
+        keys = ApiKeyStore(InMemoryStateStore())
+        api_key, issued = await keys.issue('ada')
+        # Keys issued before the secret was lengthened still verify
+        short_key, _ = await keys.issue('bob', lambda: f'{KEY_PREFIX}{secrets.token_hex(16)}')
+
+        assert (await keys.verify(api_key)).owner == 'ada'
+        assert (await keys.verify(short_key)).owner == 'bob'
+        assert await keys.verify(api_key[:-1] + ('0' if api_key[-1] != '0' else '1')) is None
+        assert await keys.verify('not-a-key') is None
+
+        assert await keys.revoke(issued.key_id)
+        assert await keys.verify(api_key) is None
+        assert not await keys.revoke('bro_py_000000000000')
+
+    asyncio.run(scenario())
@@ -0,0 +1,36 @@
+"""
+Session metrics: execution time means over timed tasks, merged across workers
+"""
+
+import pytest
+
+from args_records import Metrics
+
+
+def test_mean_ignores_completed_tasks_without_a_time():
+    metrics = Metrics()
+    metrics.completed_tasks += 1
+    metrics.completed_tasks += 1
+    metrics.record_execution_time(100.0)
+    metrics.completed_tasks += 1
+    metrics.record_execution_time(300.0)
+
+    assert metrics.avg_execution_time == 200.0
+    assert metrics.to_dict()['timedTasks'] == 2
+
+
+def test_merged_mean_is_weighted_by_timed_tasks():
+    from fastapi_server import merge_session_summaries
+
+    def summary(times, completed):
+        metrics = Metrics()
+        metrics.completed_tasks = completed
+        for time in times:
+            metrics.record_execution_time(time)
+        return {'sessionId': 's', 'agentCount': 0, 'taskCount': 0, 'activeStreams': 0,
+                'collaborationRequests': 0, 'queuedTasks': 0, 'createdAt': 0, 'lastActivity': 0,
+                'metrics': metrics.to_dict()}
+
+    merged = merge_session_summaries([summary([10.0], 5), summary([20.0, 30.0], 2)])['s']['metrics']
+    assert merged['avgExecutionTime'] == pytest.approx(20.0)
+    assert (merged['completedTasks'], merged['timedTasks']) == (7, 3)
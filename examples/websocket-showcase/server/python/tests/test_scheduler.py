@@ -0,0 +1,194 @@
+"""
+Task queueing: dependency failures, queue-full rejections and dispatch order
+"""
+
+import asyncio
+import secrets
+
+import pytest
+
+from args_dispatch import InFlightTracker
+from args_lifecycle import SessionLifecycle
+from args_registry import AgentRegistry
+from args_scheduler import TaskQueue
+from args_state import InMemoryStateStore
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """fastapi_server with a fresh store and lifecycle, recording the events it emits"""
+    import fastapi_server
+
+    events = []
+
+    async def record(event, data, room=None):
+        events.append((event, data))
+
+    monkeypatch.setattr(fastapi_server, 'state_store', InMemoryStateStore())
+    monkeypatch.setattr(fastapi_server, 'session_lifecycle', SessionLifecycle())
+    monkeypatch.setattr(fastapi_server, 'registered_agents', {})
+    monkeypatch.setattr(fastapi_server, 'agent_registry', AgentRegistry())
+    monkeypatch.setattr(fastapi_server, 'in_flight', InFlightTracker())
+    monkeypatch.setattr(fastapi_server, 'emit_event', record)
+    monkeypatch.setattr(fastapi_server, 'events', events, raising=False)
+    return fastapi_server
+
+
+def new_session_id():
+    return f'sched-{secrets.token_hex(4)}'
+
+
+def test_task_depending_on_an_errored_task_fails_at_submit(server):
+    async def scenario():
+        session_id = new_session_id()
+        await server.create_session(session_id)
+        # No agents, so the parent waits in the queue
+        await server.start_task('sid', {'id': 'parent', 'sessionId': session_id})
+        assert 'parent' in server.task_queue[session_id]
+        server.active_sessions[session_id].tasks['parent'].status = 'error'
+
+        await server.start_task('sid', {'id': 'child', 'sessionId': session_id, 'dependencies': ['parent']})
+
+        assert server.active_sessions[session_id].tasks['child'].status == 'error'
+        assert 'child' not in server.task_queue[session_id]
+        assert ('task-error', 'child') in [(event, data.get('taskId')) for event, data in server.events]
+
+    asyncio.run(scenario())
+
+
+def test_task_depending_on_an_unknown_task_fails_at_submit(server):
+    async def scenario():
+        session_id = new_session_id()
+        await server.create_session(session_id)
+
+        await server.start_task('sid', {'id': 'orphan', 'sessionId': session_id, 'dependencies': ['ghost']})
+        await server.start_task('sid', {'id': 'self', 'sessionId': session_id, 'dependencies': ['self']})
+
+        tasks = server.active_sessions[session_id].tasks
+        assert tasks['orphan'].status == 'error' and tasks['self'].status == 'error'
+        assert len(server.task_queue.get(session_id, ())) == 0
+        errors = [data['error'] for event, data in server.events if event == 'task-error']
+        assert errors == ['Dependency ghost failed or is unknown', 'Dependency self failed or is unknown']
+
+    asyncio.run(scenario())
+
+
+def test_task_depending_on_a_compacted_failure_fails_at_submit(server):
+    async def scenario():
+        session_id = new_session_id()
+        await server.create_session(session_id)
+        server.session_lifecycle.remember_compacted(session_id, 'old-ok', 'completed')
+        server.session_lifecycle.remember_compacted(session_id, 'old-bad', 'error')
+
+        await server.start_task('sid', {'id': 'fine', 'sessionId': session_id, 'dependencies': ['old-ok']})
+        await server.start_task('sid', {'id': 'doomed', 'sessionId': session_id, 'dependencies': ['old-bad']})
+
+        tasks = server.active_sessions[session_id].tasks
+        # Its dependency is done, so it only waits for an agent
+        assert tasks['fine'].status == 'queued' and 'fine' in server.task_queue[session_id]
+        assert tasks['doomed'].status == 'error' and 'doomed' not in server.task_queue[session_id]
+
+    asyncio.run(scenario())
+
+
+def test_queue_full_rejections_are_bounded_by_retention(server, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(server, 'max_queued_tasks', 5)
+        monkeypatch.setattr(server.session_lifecycle, 'retained_tasks', 10)
+        session_id = new_session_id()
+        await server.create_session(session_id)
+
+        for number in range(500):
+            await server.start_task('sid', {'id': f'burst-{number}', 'sessionId': session_id})
+
+        session = server.active_sessions[session_id]
+        assert len(server.task_queue[session_id]) == 5
+        # The queued tasks plus the most recent rejections, the rest compacted into metrics
+        assert len(session.tasks) == 5 + 10
+        assert session.metrics.total_tasks == 500
+        assert session.metrics.compacted_tasks == 500 - 5 - 10
+        assert all(session.tasks[f'burst-{number}'].status == 'rejected' for number in range(490, 500))
+        # Rejected tasks are remembered as failed dependencies once compacted
+        await server.start_task('sid', {'id': 'late', 'sessionId': session_id, 'dependencies': ['burst-5']})
+        assert session.tasks['late'].status == 'error'
+
+    asyncio.run(scenario())
+
+
+def test_evicting_a_session_releases_its_in_flight_tasks(server, monkeypatch):
+    async def scenario():
+        evicted, kept = new_session_id(), new_session_id()
+        await server.create_session(evicted)
+        await server.create_session(kept)
+        monkeypatch.setattr(server.sio, 'rooms', lambda sid, namespace=None: [sid, evicted, kept])
+        await server.register_agent('sock', {'id': 'ag', 'status': 'idle', 'capabilities': ['code']})
+        agent = server.registered_agents['ag']
+
+        await server.start_task('sid', {'id': 'busy', 'sessionId': evicted})
+        assert agent.current_tasks == 1
+        # The agent is at capacity, so work in the other session waits
+        await server.start_task('sid', {'id': 'waiting', 'sessionId': kept})
+        assert 'waiting' in server.task_queue[kept]
+
+        await server.evict_session(evicted, 'test')
+
+        # The queued task took the capacity the evicted session gave back
+        assert agent.current_tasks == 1 and server.in_flight.count('ag') == 1
+        assert server.active_sessions[kept].tasks['waiting'].status == 'started'
+        assert len(server.task_queue[kept]) == 0
+        assert (await server.state_store.hget('agents', 'ag'))['metadata']['currentTasks'] == 1
+
+        await server.evict_session(kept, 'test')
+        assert agent.current_tasks == 0 and server.in_flight.count('ag') == 0
+        assert (await server.state_store.hget('agents', 'ag'))['available']
+
+    asyncio.run(scenario())
+
+
+def test_dispatch_stops_each_key_at_its_first_refusal():
+    queue = TaskQueue(key=lambda task: task['kind'])
+    tasks = [
+        {'id': 'a1', 'kind': 'a', 'priority': 'low'},
+        {'id': 'b1', 'kind': 'b', 'priority': 'high'},
+        {'id': 'a2', 'kind': 'a', 'priority': 'critical'},
+        {'id': 'b2', 'kind': 'b', 'priority': 'medium'},
+        {'id': 'b3', 'kind': 'b', 'priority': 'medium'},
+        {'id': 'a3', 'kind': 'a', 'priority': 'medium'},
+    ]
+    for task in tasks:
+        queue.push(task)
+
+    # Kind a has room for one task, kind b for two
+    room = {'a': 1, 'b': 2}
+    offered = []
+
+    def try_assign(task):
+        offered.append(task['id'])
+        if room[task['kind']] == 0:
+            return False
+        room[task['kind']] -= 1
+        return True
+
+    assigned = queue.dispatch(try_assign)
+
+    assert [task['id'] for task in assigned] == ['a2', 'b1', 'b2']
+    # One refusal per key, and nothing offered behind it
+    assert offered == ['a2', 'b1', 'b2', 'b3', 'a3']
+    assert len(queue) == 3 and queue.ready_count == 3
+
+    # What was left keeps its priority then arrival order
+    offered.clear()
+    room.update(a=5, b=5)
+    assert [task['id'] for task in queue.dispatch(try_assign)] == ['b3', 'a3', 'a1']
+    assert len(queue) == 0
+
+
+def test_dispatch_with_no_capacity_costs_one_attempt_per_key():
+    queue = TaskQueue()
+    for number in range(1000):
+        queue.push({'id': f't{number}', 'requirements': {'capabilities': [f'cap-{number % 3}']}})
+    offered = []
+
+    assert queue.dispatch(lambda task: offered.append(task['id']) or False) == []
+    assert len(offered) == 3
+    assert len(queue) == 1000
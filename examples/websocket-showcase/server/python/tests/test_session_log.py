@@ -0,0 +1,106 @@
+"""
+Session event sequencing and join_session resume
+"""
+
+import asyncio
+import json
+import secrets
+
+import pytest
+
+from args_state import InMemoryStateStore
+from args_sync import SessionLog
+
+
+def test_since_returns_only_missed_events():
+    log = SessionLog(capacity=3)
+    for number in range(5):
+        assert log.record('tick', {'n': number}) == number + 1
+
+    assert log.since(5) == []
+    assert [event['seq'] for event in log.since(3)] == [4, 5]
+    assert [event['seq'] for event in log.since(2, log.epoch)] == [3, 4, 5]
+    # Evicted from the buffer, ahead of the log, or from another epoch
+    assert log.since(1) is None
+    assert log.since(6) is None
+    assert log.since(-1) is None
+    assert log.since(4, 'other') is None
+
+
+def test_snapshot_is_cached_until_the_session_changes():
+    log = SessionLog()
+    build = lambda: {'sessionId': 's'}
+    encode = lambda value: json.dumps(value).encode()
+
+    first = log.snapshot(build, encode)
+    assert log.snapshot(build, encode) is first
+    log.record('tick', {})
+    second = log.snapshot(build, encode)
+    assert second is not first and json.loads(second.text)['seq'] == 1
+    log.invalidate()
+    log.snapshot(build, encode)
+    assert log.snapshots_built == 3
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """fastapi_server with a fresh store, recording what it sends instead of sending it"""
+    import fastapi_server
+
+    sent = []
+
+    async def emit(event, data=None, room=None, **kwargs):
+        sent.append((event, data, room))
+
+    async def enter_room(sid, room, namespace=None):
+        pass
+
+    monkeypatch.setattr(fastapi_server, 'state_store', InMemoryStateStore())
+    monkeypatch.setattr(fastapi_server.sio, 'emit', emit)
+    monkeypatch.setattr(fastapi_server.sio, 'enter_room', enter_room)
+    monkeypatch.setattr(fastapi_server, 'sent', sent, raising=False)
+    return fastapi_server
+
+
+def test_rejoining_client_gets_only_what_it_missed(server):
+    async def scenario():
+        session_id = f'resume-{secrets.token_hex(4)}'
+        first = await server.join_session('c1', {'sessionId': session_id})
+        assert first['mode'] == 'snapshot' and first['seq'] == 0
+
+        for number in range(3):
+            await server.emit_event('note', {'n': number}, room=session_id)
+        assert [data['seq'] for event, data, room in server.sent if event == 'note'] == [1, 2, 3]
+
+        server.sent.clear()
+        ack = await server.join_session('c1', {'sessionId': session_id, 'lastSeq': 1, 'epoch': first['epoch']})
+        assert ack == {'sessionId': session_id, 'mode': 'delta', 'seq': 3, 'epoch': first['epoch']}
+        [(event, batch, room)] = server.sent
+        assert (event, room) == ('args-batch', 'c1')
+        assert [(item['seq'], item['data']['n']) for item in batch['events']] == [(2, 1), (3, 2)]
+
+        # A sequence from another epoch cannot be resumed
+        server.sent.clear()
+        ack = await server.join_session('c1', {'sessionId': session_id, 'lastSeq': 1, 'epoch': 'stale'})
+        assert ack['mode'] == 'snapshot' and server.sent[0][0] == 'session-state'
+
+        await server.evict_session(session_id, 'test')
+
+    asyncio.run(scenario())
+
+
+def test_events_are_not_sequenced_with_several_workers(server, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(server, 'sequence_events', False)
+        session_id = f'resume-{secrets.token_hex(4)}'
+        first = await server.join_session('c1', {'sessionId': session_id})
+
+        await server.emit_event('note', {'n': 0}, room=session_id)
+        assert 'seq' not in server.sent[-1][1]
+
+        ack = await server.join_session('c1', {'sessionId': session_id, 'lastSeq': 0, 'epoch': first['epoch']})
+        assert ack['mode'] == 'snapshot' and server.sent[-1][0] == 'session-state'
+
+        await server.evict_session(session_id, 'test')
+
+    asyncio.run(scenario())
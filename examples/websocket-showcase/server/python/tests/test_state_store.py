@@ -0,0 +1,164 @@
+"""
+The StateStore contract, run against the in-memory store and Redis (through fakeredis)
+"""
+
+import asyncio
+
+from args_stores import StoreSync
+
+
+def test_hashes_round_trip(connect):
+    async def scenario():
+        store = connect()
+        await store.hset('agents', 'a1', {'id': 'a1', 'tags': ['x']})
+        await store.hset('agents', 'a2', {'id': 'a2'})
+        assert await store.hget('agents', 'a1') == {'id': 'a1', 'tags': ['x']}
+        assert await store.hmget('agents', ['a2', 'missing', 'a1']) == [{'id': 'a2'}, None, {'id': 'a1', 'tags': ['x']}]
+        assert await store.hmget('agents', []) == []
+        assert await store.hlen('agents') == 2
+        await store.hdel('agents', 'a1')
+        assert await store.hgetall('agents') == {'a2': {'id': 'a2'}}
+        assert await store.hget('other', 'a2') is None
+
+    asyncio.run(scenario())
+
+
+def test_pages_follow_score_then_key_order(connect):
+    async def scenario():
+        store = connect()
+        scores = {'d': 2.0, 'a': 1.0, 'c': 2.0, 'b': 2.0, 'e': 3.5, 'f': 1.0}
+        for key, score in scores.items():
+            await store.zadd('index', key, score)
+        expected = sorted(scores.items(), key=lambda item: (item[1], item[0]))
+
+        pages, cursor = [], None
+        while True:
+            page = await store.zrange('index', after=cursor, limit=2)
+            if not page:
+                break
+            pages.append(page)
+            cursor = (page[-1][1], page[-1][0])
+        assert [entry for page in pages for entry in page] == expected
+        assert all(len(page) == 2 for page in pages)
+
+        # A cursor inside a run of equal scores resumes after the key, not the score
+        assert await store.zrange('index', after=(2.0, 'b'), limit=10) == [('c', 2.0), ('d', 2.0), ('e', 3.5)]
+        assert await store.zrange('index', min_score=1.5, max_score=2.0) == [('b', 2.0), ('c', 2.0), ('d', 2.0)]
+
+        # Re-adding moves a key, removing drops it
+        await store.zadd('index', 'a', 5.0)
+        await store.zrem('index', 'c')
+        assert [key for key, _ in await store.zrange('index')] == ['f', 'b', 'd', 'e', 'a']
+
+    asyncio.run(scenario())
+
+
+def test_counters_and_refcounts(connect):
+    async def scenario():
+        store = connect()
+        assert await store.incr('tasks') == 1
+        assert await store.incr('tasks', 4) == 5
+        assert await store.refcount('refs', 's1', 1) == 1
+        assert await store.refcount('refs', 's1', 1) == 2
+        assert await store.refcounts('refs') == {'s1': 2}
+        assert await store.refcount('refs', 's1', -2) == 0
+        assert await store.refcounts('refs') == {}
+        assert (await store.counters())['tasks'] == 5
+
+    asyncio.run(scenario())
+
+
+def test_refcount_drops_only_counts_that_reach_zero(connect):
+    async def scenario():
+        first, second = connect(), connect()
+        # One worker releases the last reference while another takes a new one
+        for _ in range(50):
+            await first.refcount('refs', 's1', 1)
+            await asyncio.gather(first.refcount('refs', 's1', -1), second.refcount('refs', 's1', 1))
+            assert await first.refcounts('refs') == {'s1': 1}
+            await second.refcount('refs', 's1', -1)
+        assert await first.refcounts('refs') == {}
+
+    asyncio.run(scenario())
+
+
+def test_transact_writes_all_or_nothing(connect):
+    async def scenario():
+        store = connect()
+        await store.hset('heads', 'doc', {'version': 1})
+        await store.hset('entries', 'old', {'value': 0})
+
+        writes = [('heads', 'doc', {'version': 2}), ('entries', 'new', {'value': 1}), ('entries', 'old', None)]
+        assert await store.transact(writes, ('heads', {'doc': {'version': 1}}))
+        assert await store.hget('heads', 'doc') == {'version': 2}
+        assert await store.hgetall('entries') == {'new': {'value': 1}}
+
+        # Planned against version 1, which is gone: nothing is written
+        stale = [('heads', 'doc', {'version': 3}), ('entries', 'stale', {'value': 2})]
+        assert not await store.transact(stale, ('heads', {'doc': {'version': 1}}))
+        assert await store.hget('heads', 'doc') == {'version': 2}
+        assert await store.hget('entries', 'stale') is None
+
+        # Expecting a key to be absent
+        assert not await store.transact([('heads', 'doc', {'version': 9})], ('heads', {'doc': None}))
+        assert await store.transact([('heads', 'fresh', {'version': 1})], ('heads', {'fresh': None}))
+
+    asyncio.run(scenario())
+
+
+def test_transact_conflict_between_workers_retries(connect):
+    async def scenario():
+        first, second = connect(), connect()
+        sync = StoreSync(first)
+        await sync.commit('owner', {'todos': {'data': {'a': 1}}})
+
+        # The second worker commits between the first one's plan and its transaction
+        transact = first.transact
+        raced = []
+
+        async def racing_transact(writes, expect=None):
+            if not raced:
+                raced.append(None)
+                raced[0] = await StoreSync(second).commit('owner', {'todos': {'data': {'a': 1, 'b': 2}}})
+            return await transact(writes, expect)
+
+        first.transact = racing_transact
+        result = await sync.commit('owner', {'todos': {'data': {'a': 1, 'c': 3}}})
+
+        assert raced[0]['todos']['version'] == 2
+        assert result['todos']['version'] == 3
+        head, document = await StoreSync(second).document('owner', 'todos')
+        assert head['version'] == 3
+        assert document == {'a': 1, 'c': 3}
+
+    asyncio.run(scenario())
+
+
+def test_idle_sessions_expire_from_the_shared_store(connect, monkeypatch):
+    import fastapi_server
+
+    async def scenario():
+        store = connect()
+        monkeypatch.setattr(fastapi_server, 'state_store', store)
+        monkeypatch.setattr(fastapi_server.session_lifecycle, 'ttl', 0.2)
+
+        await fastapi_server.create_session('ttl-idle')
+        await fastapi_server.publish_session('ttl-idle')
+        assert 'ttl-idle' in await store.refcounts('session_refs')
+
+        # Idle past the TTL while another session stays active
+        await asyncio.sleep(0.3)
+        await fastapi_server.create_session('ttl-active')
+        await fastapi_server.publish_session('ttl-active')
+        await fastapi_server.reap_sessions()
+
+        assert 'ttl-idle' not in fastapi_server.active_sessions
+        assert 'ttl-active' in fastapi_server.active_sessions
+        assert 'ttl-idle' not in await store.refcounts('session_refs')
+        listed = [key for key, _ in await store.zrange('session_index', limit=1000)]
+        assert 'ttl-idle' not in listed and 'ttl-active' in listed
+        assert not [key for key in await store.hgetall('sessions') if key.startswith('ttl-idle@')]
+
+        await fastapi_server.evict_session('ttl-active', 'test')
+
+    asyncio.run(scenario())
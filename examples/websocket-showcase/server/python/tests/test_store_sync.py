@@ -0,0 +1,154 @@
+"""
+Store sync: JSON patches, diffs, stale versions and failed tests
+"""
+
+import asyncio
+import copy
+
+import pytest
+
+from args_state import InMemoryStateStore
+from args_stores import PatchError, StoreSync, SyncConflict, apply_patch, diff
+
+DOCUMENTS = [
+    ({}, {'a': 1}),
+    ({'a': 1, 'b': 2}, {'b': 3, 'c': 4}),
+    ({'todos': [1, 2, 3]}, {'todos': [1, 3, 4, 5]}),
+    ({'todos': [1, 2, 3, 4]}, {'todos': [2]}),
+    ({'user': {'name': 'ada', 'tags': ['x']}}, {'user': {'name': 'ada', 'tags': ['x', 'y'], 'age': 36}}),
+    ({'a/b': {'~c': 1}}, {'a/b': {'~c': 2}}),
+    ({'a': [{'id': 1}, {'id': 2}]}, {'a': {'id': 1}}),
+    ({'a': None}, {'a': False}),
+]
+
+
+@pytest.mark.parametrize('old, new', DOCUMENTS)
+def test_patch_from_diff_reproduces_the_new_document(old, new):
+    ops = diff(old, new)
+    assert apply_patch(copy.deepcopy(old), ops) == new
+    assert diff(new, new) == []
+
+
+def test_patch_operations():
+    document = {'todos': [{'id': 1, 'done': False}], 'owner': 'ada'}
+    patched = apply_patch(copy.deepcopy(document), [
+        {'op': 'test', 'path': '/owner', 'value': 'ada'},
+        {'op': 'add', 'path': '/todos/-', 'value': {'id': 2, 'done': False}},
+        {'op': 'replace', 'path': '/todos/0/done', 'value': True},
+        {'op': 'copy', 'from': '/owner', 'path': '/author'},
+        {'op': 'move', 'from': '/owner', 'path': '/editor'},
+        {'op': 'remove', 'path': '/todos/1'},
+    ])
+    assert patched == {'todos': [{'id': 1, 'done': True}], 'author': 'ada', 'editor': 'ada'}
+
+
+@pytest.mark.parametrize('ops', [
+    [{'op': 'test', 'path': '/owner', 'value': 'bob'}],
+    [{'op': 'remove', 'path': '/missing'}],
+    [{'op': 'replace', 'path': '/todos/5', 'value': 1}],
+    [{'op': 'move', 'from': '/todos', 'path': '/todos/0'}],
+    [{'op': 'frobnicate', 'path': '/owner'}],
+    {'op': 'add', 'path': '/x', 'value': 1},
+])
+def test_invalid_patches_raise_patch_error(ops):
+    with pytest.raises(PatchError):
+        apply_patch({'todos': [1], 'owner': 'ada'}, ops)
+
+
+def test_committed_patches_round_trip_through_the_log():
+    async def scenario():
+        sync = StoreSync(InMemoryStateStore())
+        old, new = {'todos': [1, 2], 'owner': 'ada'}, {'todos': [2, 3], 'count': 2}
+        first = (await sync.commit('me', {'notes': {'data': old}}))['notes']
+        second = (await sync.commit('me', {'notes': {'patch': diff(old, new), 'base_version': 1}}))['notes']
+
+        assert (first['version'], second['version']) == (1, 2)
+        head, document = await sync.document('me', 'notes')
+        assert document == new
+        # The same document synced whole has the same hash and moves nothing on
+        assert (await sync.commit('me', {'notes': {'data': new}}))['notes'] == {**head, 'changed': False}
+        assert apply_patch(copy.deepcopy(old), await sync.changes_since('me', 'notes', 1, head)) == new
+
+    asyncio.run(scenario())
+
+
+def test_stale_base_version_is_a_conflict():
+    async def scenario():
+        sync = StoreSync(InMemoryStateStore())
+        await sync.commit('me', {'notes': {'data': {'a': 1}}})
+        await sync.commit('me', {'notes': {'patch': [{'op': 'add', 'path': '/b', 'value': 2}], 'base_version': 1}})
+
+        with pytest.raises(SyncConflict) as conflict:
+            await sync.commit('me', {'notes': {'patch': [{'op': 'add', 'path': '/c', 'value': 3}], 'base_version': 1}})
+        assert conflict.value.heads['notes']['version'] == 2
+        assert (await sync.document('me', 'notes'))[1] == {'a': 1, 'b': 2}
+
+    asyncio.run(scenario())
+
+
+def test_failed_test_op_leaves_the_store_unchanged():
+    async def scenario():
+        sync = StoreSync(InMemoryStateStore())
+        await sync.commit('me', {'notes': {'data': {'owner': 'ada', 'n': 1}}})
+        ops = [{'op': 'replace', 'path': '/n', 'value': 2}, {'op': 'test', 'path': '/owner', 'value': 'bob'}]
+
+        with pytest.raises(PatchError):
+            await sync.commit('me', {'notes': {'patch': ops, 'base_version': 1}})
+        head, document = await sync.document('me', 'notes')
+        assert head['version'] == 1 and document == {'owner': 'ada', 'n': 1}
+
+    asyncio.run(scenario())
+
+
+def test_owners_and_store_names_cannot_collide():
+    async def scenario():
+        sync = StoreSync(InMemoryStateStore())
+        await sync.commit('a', {'b/c': {'data': {'secret': 1}}})
+        await sync.commit('a/b', {'c': {'data': {'other': 2}}})
+        await sync.commit('a%2Fb', {'c': {'data': {'third': 3}}})
+
+        assert (await sync.document('a', 'b/c'))[1] == {'secret': 1}
+        assert (await sync.document('a/b', 'c'))[1] == {'other': 2}
+        assert (await sync.document('a%2Fb', 'c'))[1] == {'third': 3}
+        assert await sync.head('a/b', 'c') != await sync.head('a', 'b/c')
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """The HTTP API over a fresh store; TestClient is used without its lifespan, so no reaper runs"""
+    from fastapi.testclient import TestClient
+
+    import fastapi_server
+
+    monkeypatch.setattr(fastapi_server, 'store_sync', StoreSync(InMemoryStateStore()))
+    return TestClient(fastapi_server.app)
+
+
+def test_sync_route_answers_conflicts_with_409(client):
+    created = client.post('/api/brolostack/sync/store', json={'store_name': 'notes', 'data': {'a': 1}})
+    assert created.status_code == 200 and created.json()['version'] == 1
+
+    patch = [{'op': 'add', 'path': '/b', 'value': 2}]
+    applied = client.post('/api/brolostack/sync/store', json={'store_name': 'notes', 'patch': patch, 'base_version': 1})
+    assert applied.status_code == 200 and applied.json()['version'] == 2
+
+    stale = client.post('/api/brolostack/sync/store', json={'store_name': 'notes', 'patch': patch, 'base_version': 1})
+    assert stale.status_code == 409
+    assert stale.json()['detail']['stores']['notes'] == {'version': 2, 'hash': applied.json()['hash']}
+
+    restored = client.get('/api/brolostack/sync/store/notes', params={'since': 1})
+    assert restored.json()['patch'] == patch
+
+
+def test_sync_route_rejects_failed_tests_with_422(client):
+    client.post('/api/brolostack/sync/store', json={'store_name': 'notes', 'data': {'owner': 'ada'}})
+    ops = [{'op': 'add', 'path': '/n', 'value': 1}, {'op': 'test', 'path': '/owner', 'value': 'bob'}]
+
+    failed = client.post('/api/brolostack/sync/store', json={'store_name': 'notes', 'patch': ops, 'base_version': 1})
+    assert failed.status_code == 422
+    assert 'Test failed' in failed.json()['detail']
+
+    restored = client.get('/api/brolostack/sync/store/notes')
+    assert restored.json()['version'] == 1 and restored.json()['data'] == {'owner': 'ada'}
@@ -0,0 +1,31 @@
+"""
+Polled views: ETag revalidation of the stats endpoint
+"""
+
+import pytest
+
+from args_state import InMemoryStateStore
+
+
+@pytest.fixture
+def server(monkeypatch):
+    import fastapi_server
+
+    monkeypatch.setattr(fastapi_server, 'state_store', InMemoryStateStore())
+    return fastapi_server
+
+
+def test_stats_revalidate_per_worker(server, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(server.app)
+    first = client.get('/api/ws/stats')
+    etag = first.headers['etag']
+    assert first.json()['worker'] == server.worker_id
+    assert client.get('/api/ws/stats', headers={'if-none-match': etag}).status_code == 304
+
+    # Same counters on another worker: its body names a different worker and uptime
+    monkeypatch.setattr(server, 'worker_id', 'other-host:1')
+    other = client.get('/api/ws/stats', headers={'if-none-match': etag})
+    assert other.status_code == 200 and other.json()['worker'] == 'other-host:1'
+    assert other.headers['etag'] != etag
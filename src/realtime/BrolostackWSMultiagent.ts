@@ -733,6 +733,7 @@ export class BrolostackWSMultiagent extends EventEmitter {
     }
     
     this.io.to(session.sessionId).emit('task-assigned', {
+      sessionId: session.sessionId,
       taskId: task.id,
       agentId: agent.id,
       mode: 'sequential',
@@ -748,6 +749,7 @@ export class BrolostackWSMultiagent extends EventEmitter {
     // Assign to all suitable agents
     for (const agent of agents) {
       this.io.to(session.sessionId).emit('task-assigned', {
+        sessionId: session.sessionId,
         taskId: task.id,
         agentId: agent.id,
         mode: 'parallel',
@@ -772,6 +774,7 @@ export class BrolostackWSMultiagent extends EventEmitter {
     }
     
     this.io.to(session.sessionId).emit('task-assigned', {
+      sessionId: session.sessionId,
       taskId: task.id,
       primaryAgent: primaryAgent.id,
       supportAgents: supportAgents.map(a => a.id),
@@ -213,14 +213,22 @@ async def start_task(sid, task_definition):
         }, room=session_id)
         return
     
-    # Assign task to agents
+    # Send the task to each assigned agent's socket, and one summary to the session
     for agent in suitable_agents:
         await sio.emit('task-assigned', {
+            'sessionId': session_id,
             'taskId': task_id,
             'agentId': agent['id'],
             'taskDefinition': task_definition,
             'timestamp': datetime.now().timestamp() * 1000
-        }, room=session_id)
+        }, room=agent['socket_id'])
+    
+    await sio.emit('task-assignment', {
+        'sessionId': session_id,
+        'taskId': task_id,
+        'agentIds': [agent['id'] for agent in suitable_agents],
+        'timestamp': datetime.now().timestamp() * 1000
+    }, room=session_id)
     
     logger.info(f"Task {task_id} started with {len(suitable_agents)} agents")
 
@@ -901,7 +909,7 @@ import socketio
 import asyncio
 import json
 from datetime import datetime
-from typing import Dict, Callable, Any, Optional
+from typing import Dict, Callable, Any, List, Optional
 import logging
 
 # Configure logging
@@ -920,8 +928,32 @@ class BrolostackWSClient:
         self.auth = auth or {}
         self.connected = False
         self.session_id = None
+        self.last_seq = None
+        self.epoch = None
+        self.handlers: Dict[str, Callable] = {}
         self.setup_handlers()
     
+    def on(self, event: str, handler: Optional[Callable] = None):
+        """Register an event handler (or use as a decorator); deliveries are seq-tracked first"""
+        def register(handler: Callable):
+            self.handlers[event] = handler
+            
+            async def tracked(data=None):
+                await self.deliver(event, data)
+            
+            self.sio.on(event, tracked)
+            return handler
+        return register(handler) if handler else register
+    
+    async def deliver(self, event: str, data: Any):
+        """Track an event's seq, then run its handler, whether it came alone or in an args-batch"""
+        self.track_seq(data)
+        handler = self.handlers.get(event)
+        if handler:
+            result = handler(data)
+            if asyncio.iscoroutine(result):
+                await result
+    
     def setup_handlers(self):
         """Setup event handlers"""
         
@@ -935,9 +967,26 @@ class BrolostackWSClient:
             self.connected = False
             logger.info("Disconnected from Brolostack WebSocket server")
         
-        @self.sio.event
+        @self.sio.on('args-welcome')
         async def args_welcome(data):
             logger.info(f"ARGS Protocol welcome: {data}")
+        
+        @self.on('session-state')
+        async def session_state(data):
+            # A snapshot restarts tracking, possibly in a new epoch
+            self.epoch = data.get('epoch')
+            self.last_seq = data.get('seq')
+        
+        # Only fires for events without a handler of their own; those are tracked by on()
+        @self.sio.on('*')
+        async def any_event(event, data=None):
+            await self.deliver(event, data)
+        
+        @self.sio.on('args-batch')
+        async def args_batch(data):
+            # Unpack aggregated deliveries into the regular event handlers
+            for item in data.get('events', []):
+                await self.deliver(item.get('event'), item.get('data'))
     
     async def connect_to_server(self):
         """Connect to WebSocket server"""
@@ -948,18 +997,43 @@ class BrolostackWSClient:
             logger.error(f"Connection failed: {e}")
             return False
     
-    async def join_session(self, session_id: str):
-        """Join a session"""
+    def track_seq(self, data):
+        """Remember the last session event seen, to resume from on rejoin"""
+        if isinstance(data, dict) and isinstance(data.get('seq'), int):
+            self.last_seq = max(self.last_seq or 0, data['seq'])
+    
+    async def join_session(self, session_id: str, resume: bool = True):
+        """Join a session, catching up on missed events when rejoining.
+        
+        Returns the server's ack: mode ('delta' or 'snapshot'), seq and epoch.
+        """
+        request = {'sessionId': session_id}
+        if resume and session_id == self.session_id and self.last_seq is not None:
+            request.update({'lastSeq': self.last_seq, 'epoch': self.epoch})
+        else:
+            self.last_seq = None
+            self.epoch = None
         self.session_id = session_id
-        await self.sio.emit('join-session', {'sessionId': session_id})
+        ack = await self.sio.call('join_session', request)
+        if isinstance(ack, dict):
+            # The snapshot or replayed delta brings the client up to the ack's seq
+            if ack.get('epoch') != self.epoch:
+                self.epoch = ack.get('epoch')
+                self.last_seq = None
+            self.track_seq(ack)
+        return ack
     
     async def register_agent(self, agent_info: Dict):
         """Register an agent"""
-        await self.sio.emit('register-agent', agent_info)
+        await self.sio.emit('register_agent', agent_info)
     
     async def send_progress(self, progress_data: Dict):
         """Send agent progress update"""
-        await self.sio.emit('agent-progress', progress_data)
+        await self.sio.emit('agent_progress', progress_data)
+    
+    async def send_batch(self, messages: List[Dict]):
+        """Send many ARGS messages (TASK_START, TASK_PROGRESS, ...) in one event"""
+        return await self.sio.call('args_batch', {'messages': messages})
     
     async def disconnect_from_server(self):
         """Disconnect from server"""
@@ -277,7 +277,8 @@ export interface WebSocketEvents {
   
   // Agent events
   'agent-registered': { sessionId: string; agent: any; timestamp: number };
-  'task-assigned': { taskId: string; agentId: string; mode: string; timestamp: number };
+  'task-assigned': { sessionId: string; taskId: string; agentId: string; mode: string; timestamp: number };
+  'task-assignment': { sessionId: string; taskId: string; mode: string; agentIds: string[]; timestamp: number };
   'task-progress': { sessionId: string; progress: AgentProgressUpdate; timestamp: number };
   'task-completed': { taskId: string; result: any; timestamp: number };
   'task-error': { taskId: string; error: string; timestamp: number };